@@ -1,42 +1,55 @@
 plp_commands = [
    {'description': 'Dat Files + Etapa2Dates',
     'command': 'python -c "from macros.filter_files import main; main()"',
+    'calls': [('macros.filter_files', {})],
     'parallel': False},
    {'description': 'Demand',
     'command': 'python -c "from macros.dem import main; main()"',
+    'calls': [('macros.dem', {})],
     'parallel': True},
    {'description': 'Inflow',
     'command': 'python -c "from macros.inflows import main; main(plp_enable=True, plx_enable=False)"',
+    'calls': [('macros.inflows', {'plp_enable': True, 'plx_enable': False})],
     'parallel': True},
    {'description': 'Variable Cost',
     'command': 'python -c "from macros.cvar import main; main()"',
+    'calls': [('macros.cvar', {})],
     'parallel': True},
    {'description': 'Buses',
     'command': 'python -c "from macros.bar import main; main()"',
+    'calls': [('macros.bar', {})],
     'parallel': False},
    {'description': 'Blocks',
     'command': 'python -c "from macros.blo import main; main()"',
+    'calls': [('macros.blo', {})],
     'parallel': False},
    {'description': 'Lines',
     'command': 'python -c "from macros.lin import main; main()"',
+    'calls': [('macros.lin', {})],
     'parallel': False},
    {'description': 'Lines Maintenance (In/Out)',
     'command': 'python -c "from macros.manli import main; main()"',
+    'calls': [('macros.manli', {})],
     'parallel': False},
    {'description': 'Lines Maintenance (Exp)',
     'command': 'python -c "from macros.manlix import main; main()"',
+    'calls': [('macros.manlix', {})],
     'parallel': False},
    {'description': 'Generators',
     'command': 'python -c "from macros.cen import main; main()"',
+    'calls': [('macros.cen', {})],
     'parallel': False},
    {'description': 'Generators Maintenance (Exp)',
     'command': 'python -c "from macros.mantcen import main; main()"',
+    'calls': [('macros.mantcen', {})],
     'parallel': False},
    {'description': 'Generators ERNC',
     'command': 'python -c "from macros.ernc import main; main()"',
+    'calls': [('macros.ernc', {})],
     'parallel': False},
    {'description': 'GNL',
     'command': 'python -c "from macros.PLPGNL import main; main()"',
+    'calls': [('macros.PLPGNL', {})],
     'parallel': False},
    {'description': 'Other Commands',
     'command': 'python -c "from macros.mat import main; main();'
@@ -54,14 +67,116 @@ plp_commands = [
                           'from macros.PLPPLEM2 import main; main(); '
                           'from macros.PLPRALCO import main; main(); '
                           'from macros.PLPVREBEMB import main; main()"',
+    'calls': [('macros.mat', {}),
+              ('macros.PLPCENPMAX', {}),
+              ('macros.PLPCENRE', {}),
+              ('macros.PLPDEB', {}),
+              ('macros.PLPEXTRAC', {}),
+              ('macros.PLPFILTEMB', {}),
+              ('macros.PLPIDSIMAPE_MANUAL', {}),
+              ('macros.PLPLAJA_M', {}),
+              ('macros.PLPMANEM_ETA', {}),
+              ('macros.PLPMAULE_N', {}),
+              ('macros.PLPMINEMBH', {}),
+              ('macros.PLPPLEM1', {}),
+              ('macros.PLPPLEM2', {}),
+              ('macros.PLPRALCO', {}),
+              ('macros.PLPVREBEMB', {})],
     'parallel': False},
 ]
 
 plexos_commands = [
     {'description': 'Plexos CSV folder',
      'command': 'python -c "from macros.csv_plexos import main; main()"',
+     'calls': [('macros.csv_plexos', {})],
      'parallel': True},
     {'description': 'Inflow Plexos',
      'command': 'python -c "from macros.inflows import main; main(plp_enable=False, plx_enable=True)"',
+     'calls': [('macros.inflows', {'plp_enable': False, 'plx_enable': True})],
      'parallel': True},
 ]
+
+# Files consumed and produced by each macro, relative to the IPLP file
+# folder. Used to schedule macros as a dependency graph: a macro starts
+# as soon as every macro producing one of its inputs has finished.
+# Wildcards are allowed. Inputs not produced by any macro (such as the
+# IPLP file itself) are assumed to exist.
+ETAPAS_FILES = ['Temp/Dat/plpetapas.csv', 'Temp/Dat/block2day.csv']
+
+macro_io = {
+    'macros.filter_files': {
+        'inputs': [],
+        'outputs': ETAPAS_FILES + ['Temp/Dat/plpparam.csv',
+                                   'Temp/Dat/SimToHyd.csv',
+                                   'Temp/Dat Plexos/*']},
+    'macros.dem': {
+        'inputs': ETAPAS_FILES,
+        'outputs': ['Temp/plpdem.dat', 'Temp/uni_plpdem.dat',
+                    'Temp/plpfal.prn']},
+    'macros.inflows': {
+        'inputs': ETAPAS_FILES,
+        'outputs': ['Temp/plpaflce.dat', 'Temp/PIB/*']},
+    'macros.cvar': {
+        'inputs': ETAPAS_FILES,
+        'outputs': ['Temp/plpcosce.dat', 'Temp/df/df_fuels.csv',
+                    'Temp/df/df_cvar.csv',
+                    'Temp/df/df_cvar_with_emissions.csv',
+                    'Temp/df/df_units.csv']},
+    'macros.bar': {
+        'inputs': [],
+        'outputs': ['Temp/plpbar.dat', 'Temp/uni_plpbar.dat',
+                    'Temp/plpbar_full.dat']},
+    'macros.blo': {
+        'inputs': ETAPAS_FILES,
+        'outputs': ['Temp/plpblo.dat', 'Temp/plpeta.dat',
+                    'Temp/Etapa2Dates.csv']},
+    'macros.lin': {
+        'inputs': [],
+        'outputs': ['Temp/plpcnfli.dat', 'Temp/uni_plpcnfli.dat']},
+    'macros.manli': {
+        'inputs': ETAPAS_FILES,
+        'outputs': ['Temp/plpmanli.dat', 'Temp/uni_plpmanli.dat',
+                    'Temp/df/df_manli_*.csv']},
+    'macros.manlix': {
+        'inputs': ETAPAS_FILES + ['Temp/df/df_mantcen_pmax.csv'],
+        'outputs': ['Temp/plpmanlix.dat', 'Temp/df/df_manlix_*.csv']},
+    'macros.cen': {
+        'inputs': [],
+        'outputs': ['Temp/plpcnfce.dat', 'Temp/plptec.dat',
+                    'Temp/df/df_centrales.csv']},
+    'macros.mantcen': {
+        'inputs': ETAPAS_FILES,
+        'outputs': ['Temp/plpmance_ini.dat', 'Temp/df/df_mantcen_*.csv']},
+    'macros.ernc': {
+        'inputs': ETAPAS_FILES + ['Temp/plpmance_ini.dat'],
+        'outputs': ['Temp/plpmance.dat', 'Temp/df/ernc_*.csv',
+                    'Temp/df/df_ernc_*.csv']},
+    'macros.PLPGNL': {'inputs': [], 'outputs': ['Temp/plpcnfgnl.dat']},
+    'macros.mat': {'inputs': [], 'outputs': ['Temp/plpmat.dat']},
+    'macros.PLPCENPMAX': {'inputs': [], 'outputs': ['Temp/plpcenpmax.dat']},
+    'macros.PLPCENRE': {'inputs': [], 'outputs': ['Temp/plpcenre.dat']},
+    'macros.PLPDEB': {'inputs': [], 'outputs': ['Temp/plpdeb.dat']},
+    'macros.PLPEXTRAC': {'inputs': [], 'outputs': ['Temp/plpextrac.dat']},
+    'macros.PLPFILTEMB': {'inputs': [], 'outputs': ['Temp/plpfilemb.dat']},
+    'macros.PLPIDSIMAPE_MANUAL': {
+        'inputs': ETAPAS_FILES,
+        'outputs': ['Temp/plpidap2.dat', 'Temp/plpidape.dat',
+                    'Temp/plpidsim.dat']},
+    'macros.PLPLAJA_M': {
+        'inputs': ETAPAS_FILES, 'outputs': ['Temp/plplajam.dat']},
+    'macros.PLPMANEM_ETA': {'inputs': [], 'outputs': ['Temp/plpmanem.dat']},
+    'macros.PLPMAULE_N': {
+        'inputs': ETAPAS_FILES, 'outputs': ['Temp/plpmaulen.dat']},
+    'macros.PLPMINEMBH': {
+        'inputs': ETAPAS_FILES, 'outputs': ['Temp/plpminembh.dat']},
+    'macros.PLPPLEM1': {'inputs': [], 'outputs': ['Temp/plpplem1.dat']},
+    'macros.PLPPLEM2': {'inputs': [], 'outputs': ['Temp/plpplem2.dat']},
+    'macros.PLPRALCO': {'inputs': [], 'outputs': ['Temp/plpralco.dat']},
+    'macros.PLPVREBEMB': {'inputs': [], 'outputs': ['Temp/plpvrebemb.dat']},
+    'macros.csv_plexos': {
+        'inputs': ETAPAS_FILES + ['Temp/df/df_mantcen_pmax_plexos.csv',
+                                  'Temp/df/df_cvar_with_emissions.csv',
+                                  'Temp/df/ernc_*.csv'],
+        'outputs': ['Temp/CSV/*', 'Temp/df/df_bess_properties.csv',
+                    'Temp/df/dem_*.csv']},
+}
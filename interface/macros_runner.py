@@ -1,5 +1,9 @@
 import concurrent.futures
+import fnmatch
+import importlib
+import logging
 import subprocess
+import sys
 
 # Example of predefined cmd commands mapped to boolean values
 command_dict = {
@@ -78,6 +82,186 @@ def execute_parallel(commands, logger=None):
                 logger.error(f"{cmd} generated an exception: {e}")
 
 
+# Function to run a macro's main routine in the current process
+def run_main(module_name, kwargs, file_path, logger=None):
+    # Macros read the input file path from the command line
+    argv = sys.argv
+    sys.argv = [module_name, '-f', str(file_path)]
+    try:
+        module = importlib.import_module(module_name)
+        module.main(**kwargs)
+        success = True
+    except (Exception, SystemExit) as e:
+        # Keep running the remaining steps
+        logger.error(f"{module_name} generated an exception: {e}")
+        success = False
+    finally:
+        sys.argv = argv
+    logger.info(f"In-process command success ({module_name}): {success}\n")
+    return success
+
+
+# Handler counting error messages logged by macros, which usually
+# catch their own exceptions
+class ErrorCounter(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+# Function to run a macro's main routine, returning also the number of
+# errors logged and the IPLP sheets it read
+def run_main_tracked(module_name, kwargs, file_path, logger=None):
+    from utils.workbook import reset_sheets_read, get_sheets_read
+    error_counter = ErrorCounter()
+    root_logger = logging.getLogger()
+    root_logger.addHandler(error_counter)
+    reset_sheets_read()
+    try:
+        success = run_main(module_name, kwargs, file_path, logger)
+    finally:
+        root_logger.removeHandler(error_counter)
+    return success, error_counter.count, get_sheets_read()
+
+
+# Function to execute all calls in the current process, sharing the
+# parsed workbook and block definitions between steps.
+# Series calls run first, then parallel calls, as in execute_commands
+def execute_in_process(bool_dict, parallel_dict, calls_dict, file_path,
+                       logger=None):
+    series_calls = []
+    parallel_calls = []
+
+    for cmd_key, run_cmd in bool_dict.items():
+        if run_cmd:
+            if parallel_dict.get(cmd_key, False):
+                parallel_calls += calls_dict[cmd_key]
+            else:
+                series_calls += calls_dict[cmd_key]
+
+    results = {}
+    for module_name, kwargs in series_calls + parallel_calls:
+        logger.info(f"Executing in process: {module_name}")
+        results[module_name] = run_main(
+            module_name, kwargs, file_path, logger)
+    return results
+
+
+# Inputs and outputs of macros without declarations
+NO_IO = {'inputs': [], 'outputs': []}
+
+
+# Function to check if two file patterns may refer to the same file
+def files_overlap(pattern_a, pattern_b):
+    return (fnmatch.fnmatchcase(pattern_a, pattern_b) or
+            fnmatch.fnmatchcase(pattern_b, pattern_a))
+
+
+# Function to build the dependency graph of a list of calls.
+# A call depends on every call producing one of its inputs, and on
+# earlier calls writing the same outputs
+def build_dependencies(calls, macro_io):
+    io = [macro_io.get(module_name, NO_IO) for module_name, _ in calls]
+    dependencies = {idx: set() for idx in range(len(calls))}
+    for idx, io_node in enumerate(io):
+        for idx_other, io_other in enumerate(io):
+            if idx == idx_other:
+                continue
+            produces_input = any(
+                files_overlap(output_file, input_file)
+                for output_file in io_other['outputs']
+                for input_file in io_node['inputs'])
+            same_output = idx_other < idx and any(
+                files_overlap(output_file, output_other)
+                for output_file in io_node['outputs']
+                for output_other in io_other['outputs'])
+            if produces_input or same_output:
+                dependencies[idx].add(idx_other)
+    check_acyclic(calls, dependencies)
+    return dependencies
+
+
+# Function to make sure the dependency graph can be scheduled
+def check_acyclic(calls, dependencies):
+    pending = {idx: set(deps) for idx, deps in dependencies.items()}
+    while pending:
+        ready = [idx for idx, deps in pending.items() if not deps]
+        if not ready:
+            names = [calls[idx][0] for idx in pending]
+            raise ValueError(f"Circular dependency between {names}")
+        for idx in ready:
+            pending.pop(idx)
+        for deps in pending.values():
+            deps.difference_update(ready)
+
+
+# Function to execute calls as a dependency graph on a process pool.
+# Every call starts as soon as all of its dependencies finished, and
+# calls depending on a failed call are skipped.
+# If a build manifest is given, calls whose inputs did not change since
+# their last successful run are skipped too
+def execute_dag(calls, macro_io, file_path, logger=None, max_workers=None,
+                manifest=None):
+    dependencies = build_dependencies(calls, macro_io)
+    results = {}
+    running = {}
+    pending = set(dependencies)
+
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers) as executor:
+        while pending or running:
+            # Skip calls depending on failed calls
+            for idx in sorted(pending):
+                if any(results.get(dep) is False
+                       for dep in dependencies[idx]):
+                    logger.error(f"{calls[idx][0]} skipped, "
+                                 "a dependency failed")
+                    results[idx] = False
+                    pending.discard(idx)
+            # Submit calls with all dependencies done
+            for idx in sorted(pending):
+                if all(results.get(dep) for dep in dependencies[idx]):
+                    module_name, kwargs = calls[idx]
+                    io = macro_io.get(module_name, NO_IO)
+                    pending.discard(idx)
+                    if manifest is not None and manifest.is_up_to_date(
+                            module_name, kwargs, io):
+                        logger.info(f"Up to date, skipping: {module_name}")
+                        results[idx] = True
+                        continue
+                    logger.info(f"Executing in pool: {module_name}")
+                    future = executor.submit(
+                        run_main_tracked, module_name, kwargs, file_path,
+                        logger)
+                    running[future] = idx
+            if not running:
+                continue
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                idx = running.pop(future)
+                module_name, kwargs = calls[idx]
+                try:
+                    success, n_errors, sheets = future.result()
+                except Exception as e:
+                    logger.error(f"{module_name} generated an "
+                                 f"exception: {e}")
+                    success, n_errors, sheets = False, 1, []
+                results[idx] = success
+                if manifest is None:
+                    continue
+                # Record only clean runs, so steps with errors run again
+                io = macro_io.get(module_name, NO_IO)
+                if success and n_errors == 0:
+                    manifest.record(module_name, kwargs, io, sheets)
+                else:
+                    manifest.remove(module_name, kwargs)
+    return [(calls[idx][0], results[idx]) for idx in sorted(results)]
+
+
 # Main function to run both parallel and series commands
 def execute_commands(bool_dict, parallel_dict, command_dict, logger=None):
     series_commands = []
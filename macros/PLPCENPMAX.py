@@ -10,7 +10,7 @@ from utils.utils import (timeit,
                          get_iplp_input_path,
                          check_is_path)
 from utils.logger import add_file_handler, create_logger
-import pandas as pd
+from utils.workbook import read_iplp_sheet
 from pathlib import Path
 
 
@@ -19,8 +19,8 @@ logger = create_logger('PLPCENPMAX')
 
 def create_plpcenpmax_file(iplp_file: Path, path_inputs: Path):
     # Read data from the specified excel sheet
-    df = pd.read_excel(iplp_file, sheet_name="PMAXEmb",
-                       usecols="C:F", skiprows=3, engine='pyxlsb')
+    df = read_iplp_sheet(iplp_file, sheet_name="PMAXEmb",
+                         usecols="C:F", skiprows=3, engine='pyxlsb')
 
     # Get number of reservoirs
     num_reservoirs_value = int(df.iloc[0, 1])
@@ -10,7 +10,7 @@ from utils.utils import (timeit,
                          get_iplp_input_path,
                          check_is_path)
 from utils.logger import add_file_handler, create_logger
-import pandas as pd
+from utils.workbook import read_iplp_sheet
 from pathlib import Path
 
 
@@ -26,8 +26,8 @@ def create_plpcenre_file(iplp_file: Path, path_inputs: Path):
     """
 
     # Read data from the specified Excel sheet
-    df = pd.read_excel(iplp_file, sheet_name="RENDIMIENTOS",
-                       engine='pyxlsb')
+    df = read_iplp_sheet(iplp_file, sheet_name="RENDIMIENTOS",
+                         engine='pyxlsb')
 
     # Open output file for writing
     with open(path_inputs / "plpcenre.dat", "w", encoding='latin1') as f:
@@ -9,7 +9,7 @@ from utils.utils import (timeit,
                          get_iplp_input_path,
                          check_is_path)
 from utils.logger import add_file_handler, create_logger
-import pandas as pd
+from utils.workbook import read_iplp_sheet, get_iplp_workbook
 from pathlib import Path
 
 
@@ -19,7 +19,7 @@ logger = create_logger('PLPGNL')
 def create_plpgnl_file(iplp_file: Path, path_inputs: Path):
 
     # Check if PLPGNL_ships sheet exists
-    if "PLPGNL_ships" not in pd.ExcelFile(iplp_file).sheet_names:
+    if "PLPGNL_ships" not in get_iplp_workbook(iplp_file).sheet_names:
         logger.error("Sheet PLPGNL_ships not found in input file")
         logger.error("GNL data was not generated")
         return
@@ -27,20 +27,20 @@ def create_plpgnl_file(iplp_file: Path, path_inputs: Path):
     logger.warning("Maximum 30 contracts in PLPGNL_ships sheet (columns J:AM)")
 
     # Read data from Excel sheet
-    df_params = pd.read_excel(iplp_file, sheet_name='PLPGNL_ships',
-                              usecols="H,J:AM", skiprows=3, nrows=6,
-                              index_col=0, engine='pyxlsb')
+    df_params = read_iplp_sheet(iplp_file, sheet_name='PLPGNL_ships',
+                                usecols="H,J:AM", skiprows=3, nrows=6,
+                                index_col=0, engine='pyxlsb')
 
-    df_ships = pd.read_excel(iplp_file, sheet_name='PLPGNL_ships',
-                             usecols="I:AM", skiprows=12,
-                             index_col=0, engine='pyxlsb').dropna(how='all')
+    df_ships = read_iplp_sheet(iplp_file, sheet_name='PLPGNL_ships',
+                               usecols="I:AM", skiprows=12,
+                               index_col=0, engine='pyxlsb').dropna(how='all')
 
-    df_rend = pd.read_excel(iplp_file, sheet_name='PLPGNL_ships',
-                            usecols="B:F", skiprows=3,
-                            engine='pyxlsb').dropna(how='all')
+    df_rend = read_iplp_sheet(iplp_file, sheet_name='PLPGNL_ships',
+                              usecols="B:F", skiprows=3,
+                              engine='pyxlsb').dropna(how='all')
 
-    df_etapas = pd.read_excel(iplp_file, sheet_name="Etapas",
-                              usecols="A:F", skiprows=3)
+    df_etapas = read_iplp_sheet(iplp_file, sheet_name="Etapas",
+                                usecols="A:F", skiprows=3)
 
     etapa_max = df_etapas['Etapa'].max()
     df_ships = df_ships[df_ships.index.isin(range(1, etapa_max + 1))]
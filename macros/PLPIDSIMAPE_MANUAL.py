@@ -1,8 +1,8 @@
 import os
-import pandas as pd
 from pathlib import Path
 
 from utils.logger import add_file_handler, create_logger
+from utils.workbook import read_iplp_sheet
 from utils.utils import (timeit,
                          check_is_path,
                          define_arg_parser,
@@ -22,33 +22,33 @@ def crea_archivo_PLPIDSIMAPE_MANUAL(iplp_path: Path, path_inputs: Path):
                  7: 4, 8: 5, 9: 6, 10: 7, 11: 8, 12: 9}
 
     # Rango de etapas
-    df_etapas = pd.read_excel(iplp_path, sheet_name='Etapas', skiprows=3)
+    df_etapas = read_iplp_sheet(iplp_path, sheet_name='Etapas', skiprows=3)
     n_eta = len(df_etapas)
 
     df_etapas['Inicial'] = df_etapas['Inicial'].apply(from_excel)
     df_etapas['Final'] = df_etapas['Final'].apply(from_excel)
 
     # Rango de simulaciones
-    sim_df = pd.read_excel(iplp_path, sheet_name='ConfigSim', usecols="A:U")
+    sim_df = read_iplp_sheet(iplp_path, sheet_name='ConfigSim', usecols="A:U")
     n_sim = sim_df.shape[1] - 1
-    # n_sim_hid = pd.read_excel(iplp_path, sheet_name='Hidrología').iloc[1, 3]
+    # n_sim_hid = read_iplp_sheet(iplp_path, sheet_name='Hidrología').iloc[1, 3]
 
     # Rango de aperturas
-    ape_df = pd.read_excel(iplp_path, sheet_name='ConfigApe', usecols="A:L")
+    ape_df = read_iplp_sheet(iplp_path, sheet_name='ConfigApe', usecols="A:L")
     n_ape = ape_df.shape[1] - 1
 
-    # n_sim = pd.read_excel(iplp_path, sheet_name='Hidrología').iloc[0, 3]
-    # n_ape = pd.read_excel(iplp_path, sheet_name='Hidrología').iloc[1, 3]
-    n_ape_hid = pd.read_excel(iplp_path, sheet_name='Hidrología').iloc[1, 3]
+    # n_sim = read_iplp_sheet(iplp_path, sheet_name='Hidrología').iloc[0, 3]
+    # n_ape = read_iplp_sheet(iplp_path, sheet_name='Hidrología').iloc[1, 3]
+    n_ape_hid = read_iplp_sheet(iplp_path, sheet_name='Hidrología').iloc[1, 3]
 
     # Meses de deshielo
-    f_desh = True if pd.read_excel(
+    f_desh = True if read_iplp_sheet(
         iplp_path, sheet_name='Path').iloc[33, 0].upper() != "OFF" else False
-    m_lluv_ini = pd.read_excel(iplp_path, sheet_name='Path').iloc[34, 0] if \
-        str(pd.read_excel(
+    m_lluv_ini = read_iplp_sheet(iplp_path, sheet_name='Path').iloc[34, 0] if \
+        str(read_iplp_sheet(
             iplp_path, sheet_name='Path').iloc[35, 0]).isnumeric() else 4
-    m_lluv_fin = pd.read_excel(iplp_path, sheet_name='Path').iloc[35, 0] if \
-        str(pd.read_excel(
+    m_lluv_fin = read_iplp_sheet(iplp_path, sheet_name='Path').iloc[35, 0] if \
+        str(read_iplp_sheet(
             iplp_path, sheet_name='Path').iloc[36, 0]).isnumeric() else 9
 
     # Escribe plpidap2.dat
@@ -1,7 +1,7 @@
-import pandas as pd
 from pathlib import Path
 
 from utils.logger import add_file_handler, create_logger
+from utils.workbook import read_iplp_sheet
 from utils.utils import (timeit,
                          check_is_path,
                          define_arg_parser,
@@ -15,8 +15,8 @@ logger = create_logger('PLPLAJA_M')
 def create_plplaja_m(iplp_path: Path, path_inputs: Path):
 
     # Read the necessary sheets using pandas and pyxlsb
-    path_df = pd.read_excel(iplp_path, sheet_name='Path', engine='pyxlsb')
-    laja_df = pd.read_excel(iplp_path, sheet_name='LAJAm', engine='pyxlsb')
+    path_df = read_iplp_sheet(iplp_path, sheet_name='Path', engine='pyxlsb')
+    laja_df = read_iplp_sheet(iplp_path, sheet_name='LAJAm', engine='pyxlsb')
 
     # Verify initial condition
     if str(path_df.iloc[30, 0]).upper() == 'OFF':
@@ -9,32 +9,14 @@ from utils.utils import (process_etapas_blocks, timeit,
                          get_iplp_input_path,
                          check_is_path)
 from utils.logger import add_file_handler, create_logger
-import pandas as pd
+from utils.workbook import read_iplp_sheet
 import math
 from pathlib import Path
-from macros.func_cdec.lmaule import Vol_LMAULE
-from macros.func_cdec.cipreses import Vol_CIPRESES
-from macros.func_cdec.pehuenche import Vol_PEHUENCHE
-from macros.func_cdec.colbun import Vol_COLBUN
-from macros.func_cdec.eltoro import Vol_ELTORO
-from macros.func_cdec.rapel import Vol_RAPEL
-from macros.func_cdec.canutillar import Vol_CANUTILLAR
-from macros.func_cdec.ralco import Vol_RALCO
-from macros.func_cdec.pangue import Vol_PANGUE
+from macros.func_cdec.dams import get_dam_functions
 from openpyxl.utils.datetime import from_excel
 
 
-dict_dam_volfunc = {
-    "LMAULE": Vol_LMAULE,
-    "CIPRESES": Vol_CIPRESES,
-    "PEHUENCHE": Vol_PEHUENCHE,
-    "COLBUN": Vol_COLBUN,
-    "ELTORO": Vol_ELTORO,
-    "RAPEL": Vol_RAPEL,
-    "CANUTILLAR": Vol_CANUTILLAR,
-    "RALCO": Vol_RALCO,
-    "PANGUE": Vol_PANGUE
-}
+dict_dam_volfunc = get_dam_functions('Vol', vectorized=True)
 
 
 logger = create_logger('PLPMINEMBH')
@@ -42,12 +24,12 @@ logger = create_logger('PLPMINEMBH')
 
 def create_plpminembh_file(iplp_file: Path, path_inputs: Path):
     # Load Excel sheets into pandas DataFrames
-    df_centrales = pd.read_excel(iplp_file, sheet_name="Centrales",
-                                 usecols="A:Z", skiprows=4)
-    df_etapas = pd.read_excel(iplp_file, sheet_name="Etapas",
-                              usecols="A:F", skiprows=3)
-    df_mant = pd.read_excel(iplp_file, sheet_name="MantEMBh",
-                            usecols="B:F", skiprows=4)
+    df_centrales = read_iplp_sheet(iplp_file, sheet_name="Centrales",
+                                   usecols="A:Z", skiprows=4)
+    df_etapas = read_iplp_sheet(iplp_file, sheet_name="Etapas",
+                                usecols="A:F", skiprows=3)
+    df_mant = read_iplp_sheet(iplp_file, sheet_name="MantEMBh",
+                              usecols="B:F", skiprows=4)
 
     # df_etapas['Date_Ini'] = df_etapas['Inicial'].apply(from_excel)
     # df_etapas['Date_Fin'] = df_etapas['Final'].apply(from_excel)
@@ -85,8 +67,8 @@ def create_plpminembh_file(iplp_file: Path, path_inputs: Path):
                 logger.warning(f"Dam '{emb_name}' not found in vol functions")
                 logger.warning(f"Skipping dam '{emb_name}'")
             # Create Vol column using function
-            mant_records['Vol'] = mant_records['COTA [msnm]'].apply(
-                dict_dam_volfunc[emb_name]).round(7)
+            mant_records['Vol'] = dict_dam_volfunc[emb_name](
+                mant_records['COTA [msnm]']).round(7)
 
             # Warn if any Vol is out of bounds
             if (mant_records['Vol'] > mant_records['Vnom_max']).any():
@@ -9,7 +9,8 @@ from utils.utils import (timeit,
                          get_iplp_input_path,
                          check_is_path)
 from utils.logger import add_file_handler, create_logger
-import pandas as pd
+from utils.dat_table import format_dat_table
+from utils.workbook import read_iplp_sheet
 from pathlib import Path
 
 
@@ -18,8 +19,8 @@ logger = create_logger('PLPPLEM1')
 
 def create_plpplem1_file(iplp_file: Path, path_inputs: Path):
     # Read the Excel file
-    df = pd.read_excel(iplp_file, sheet_name='PLPPlanosEmb1', engine='pyxlsb',
-                       usecols='A:K')
+    df = read_iplp_sheet(iplp_file, sheet_name='PLPPlanosEmb1', engine='pyxlsb',
+                         usecols='A:K')
 
     # Remove spaces from column names
     df.columns = df.columns.str.strip()
@@ -54,8 +55,7 @@ def create_plpplem1_file(iplp_file: Path, path_inputs: Path):
     # Create the output string
     output_str = "#Numero, Nombre, Tipo, Barra, N/A, VolMin, VolMax, VolMinNECF, VolMaxNECF, FEscala, FactRendim\n"
     # output_str += df.to_csv(index=False, header=False, sep=',')
-    output_str += df.to_string(index=False, header=False,
-                               formatters=formatter_plpplem1_full)
+    output_str += format_dat_table(df, formatter_plpplem1_full)
 
     # Write the output to a file
     with open(path_inputs / 'plpplem1.dat', 'w', encoding='latin1') as f:
@@ -9,7 +9,7 @@ from utils.utils import (timeit,
                          get_iplp_input_path,
                          check_is_path)
 from utils.logger import add_file_handler, create_logger
-import pandas as pd
+from utils.workbook import read_iplp_sheet
 from pathlib import Path
 
 
@@ -18,7 +18,7 @@ logger = create_logger('PLPPLEM2')
 
 def create_plpplem2_file(iplp_file: Path, path_inputs: Path):
 
-    df = pd.read_excel(iplp_file, sheet_name='PLPPlanosEmb2', engine='pyxlsb')
+    df = read_iplp_sheet(iplp_file, sheet_name='PLPPlanosEmb2', engine='pyxlsb')
 
     # Prepare the header
     header = ["IPDNumIte", "IEtapa", "ISimul", "LDPhiPrv"]
@@ -1,7 +1,7 @@
-import pandas as pd
 from pathlib import Path
 
 from utils.logger import add_file_handler, create_logger
+from utils.workbook import read_iplp_sheet
 from utils.utils import (timeit,
                          check_is_path,
                          define_arg_parser,
@@ -13,7 +13,7 @@ logger = create_logger('PLPRALCO')
 
 def create_plpralco(iplp_path: Path, path_inputs: Path):
 
-    df = pd.read_excel(iplp_path, sheet_name='RestRalco', engine='pyxlsb')
+    df = read_iplp_sheet(iplp_path, sheet_name='RestRalco', engine='pyxlsb')
 
     # Read data from the DataFrame
     rest1_name = df.iloc[3, 2]
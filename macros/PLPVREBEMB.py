@@ -9,7 +9,7 @@ from utils.utils import (timeit,
                          get_iplp_input_path,
                          check_is_path)
 from utils.logger import add_file_handler, create_logger
-import pandas as pd
+from utils.workbook import read_iplp_sheet
 from pathlib import Path
 
 
@@ -19,7 +19,7 @@ logger = create_logger('PLPVREBEMB')
 def create_plpvrebemb_file(iplp_file: Path, path_inputs: Path):
 
     # Read data from the specified excel sheet
-    df = pd.read_excel(iplp_file, sheet_name="REBVERT", engine='pyxlsb')
+    df = read_iplp_sheet(iplp_file, sheet_name="REBVERT", engine='pyxlsb')
 
     # Read data from the DataFrame
     num_dams_name = df.iloc[3, 2]
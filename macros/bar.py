@@ -11,6 +11,8 @@ from utils.utils import (timeit,
                          check_is_path,
                          write_lines_from_scratch)
 from utils.logger import add_file_handler, create_logger
+from utils.dat_table import format_dat_table
+from utils.workbook import read_iplp_sheet
 import pandas as pd
 from pathlib import Path
 
@@ -55,8 +57,7 @@ def print_plpbar(path_inputs: Path, df_barras: pd.DataFrame):
     lines += ['# Numero de Barras']
     lines += ['     %s' % len(df_barras)]
     lines += ['# Numero       Nombre']
-    lines += [df_aux.to_string(
-            index=False, header=False, formatters=formatter_plpbar)]
+    lines += [format_dat_table(df_aux, formatter_plpbar)]
     write_lines_from_scratch(lines, path_plpbar)
 
 
@@ -79,18 +80,17 @@ def print_plpbar_full(path_inputs: Path, df_barras: pd.DataFrame):
     lines += ['     %s' % len(df_barras)]
     lines += ['# Numero       Nombre                                 '
               '      Tension   FL FI']
-    lines += [df_aux.to_string(
-        index=False, header=False, formatters=formatter_plpbar_full)]
+    lines += [format_dat_table(df_aux, formatter_plpbar_full)]
     write_lines_from_scratch(lines, path_plpbar_full)
 
 
 def get_barras_info(iplp_path: Path, add_flag_falla: bool = False):
     if not add_flag_falla:
-        return pd.read_excel(iplp_path, sheet_name="Barras",
-                             skiprows=4, usecols="A:C,E:F").dropna(how='any')
+        return read_iplp_sheet(iplp_path, sheet_name="Barras",
+                               skiprows=4, usecols="A:C,E:F").dropna(how='any')
     else:
-        return pd.read_excel(iplp_path, sheet_name="Barras",
-                             skiprows=4, usecols="A:C,E:G").dropna(how='any')
+        return read_iplp_sheet(iplp_path, sheet_name="Barras",
+                               skiprows=4, usecols="A:C,E:G").dropna(how='any')
 
 
 @timeit
@@ -12,6 +12,7 @@ from utils.utils import (timeit,
                          translate_to_hydromonthyear,
                          write_lines_from_scratch)
 from utils.logger import add_file_handler, create_logger
+from utils.dat_table import format_dat_table
 import pandas as pd
 from pathlib import Path
 
@@ -118,8 +119,7 @@ def print_plpblo(path_inputs: Path, df_blo_eta: pd.DataFrame):
     lines += ['# Bloques']
     lines += ['    %s' % len(df_blo_eta)]
     lines += ['# Bloque   Etapa   NHoras  Ano   Mes  TipoBloque']
-    lines += [df_blo_eta.to_string(
-        index=False, header=False, formatters=formatter_plpblo)]
+    lines += [format_dat_table(df_blo_eta, formatter_plpblo)]
     write_lines_from_scratch(lines, path_plpblo)
 
 
@@ -132,8 +132,7 @@ def print_plpeta(path_inputs: Path, df_etapas: pd.DataFrame):
     lines += ['# Etapas']
     lines += ["     %s   'H'" % len(df_etapas)]
     lines += ['# Ano  Mes  Etapa FDesh   NHoras    FactTasa    TipoEtapa']
-    lines += [df_etapas.to_string(
-        index=False, header=False, formatters=formatter_plpetapas)]
+    lines += [format_dat_table(df_etapas, formatter_plpetapas)]
     write_lines_from_scratch(lines, path_plpeta)
 
 
@@ -10,46 +10,23 @@ from utils.utils import (timeit,
                          check_is_path,
                          write_lines_from_scratch)
 from macros.bar import get_barras_info
-from macros.func_cdec.lmaule import Vol_LMAULE, Rend_LMAULE
-from macros.func_cdec.cipreses import Vol_CIPRESES, Rend_CIPRESES
-from macros.func_cdec.pehuenche import Vol_PEHUENCHE, Rend_PEHUENCHE
-from macros.func_cdec.colbun import Vol_COLBUN, Rend_COLBUN
-from macros.func_cdec.eltoro import Vol_ELTORO, Rend_ELTORO
-from macros.func_cdec.rapel import Vol_RAPEL, Rend_RAPEL
-from macros.func_cdec.canutillar import Vol_CANUTILLAR, Rend_CANUTILLAR
-from macros.func_cdec.ralco import Vol_RALCO, Rend_RALCO
-from macros.func_cdec.pangue import Vol_PANGUE, Rend_PANGUE
+from macros.func_cdec.dams import get_dam_functions
 
 from utils.logger import add_file_handler, create_logger
+from utils.dat_table import format_dat_table
+from utils.workbook import read_iplp_sheet
 import pandas as pd
 from pathlib import Path
 
 
 logger = create_logger('cen')
 
-dict_dam_volfunc = {
-    "'LMAULE'": Vol_LMAULE,
-    "'CIPRESES'": Vol_CIPRESES,
-    "'PEHUENCHE'": Vol_PEHUENCHE,
-    "'COLBUN'": Vol_COLBUN,
-    "'ELTORO'": Vol_ELTORO,
-    "'RAPEL'": Vol_RAPEL,
-    "'CANUTILLAR'": Vol_CANUTILLAR,
-    "'RALCO'": Vol_RALCO,
-    "'PANGUE'": Vol_PANGUE
-}
+# Names in sheet Centrales are quoted, e.g. 'COLBUN'
+dict_dam_volfunc = {"'%s'" % dam: func for dam, func in
+                    get_dam_functions('Vol').items()}
 
-dict_dam_rendfunc = {
-    "'LMAULE'": Rend_LMAULE,
-    "'CIPRESES'": Rend_CIPRESES,
-    "'PEHUENCHE'": Rend_PEHUENCHE,
-    "'COLBUN'": Rend_COLBUN,
-    "'ELTORO'": Rend_ELTORO,
-    "'RAPEL'": Rend_RAPEL,
-    "'CANUTILLAR'": Rend_CANUTILLAR,
-    "'RALCO'": Rend_RALCO,
-    "'PANGUE'": Rend_PANGUE
-}
+dict_dam_rendfunc = {"'%s'" % dam: func for dam, func in
+                     get_dam_functions('Rend').items()}
 
 
 formatter_plpcnfce = {
@@ -67,8 +44,8 @@ def read_df_centrales_all(iplp_path: Path) -> pd.DataFrame:
     '''
     Read Centrales sheet and get all required fields
     '''
-    df = pd.read_excel(iplp_path, sheet_name="Centrales",
-                       skiprows=4, usecols="A:AX,BG,CF")
+    df = read_iplp_sheet(iplp_path, sheet_name="Centrales",
+                         skiprows=4, usecols="A:AX,BG,CF")
     '''
     'E EMBALSE
     'S PASADA EN SERIE HIDRÁULICA
@@ -196,7 +173,7 @@ def add_failure_generators(iplp_path: Path,
     df_buses = get_barras_info(iplp_path, add_flag_falla=True)
     df_buses_falla = df_buses[df_buses['FlagFalla']]
 
-    df_gx_falla = pd.read_excel(iplp_path, sheet_name="GxFalla", skiprows=1)
+    df_gx_falla = read_iplp_sheet(iplp_path, sheet_name="GxFalla", skiprows=1)
     # Drop rows if any value is nan
     df_gx_falla = df_gx_falla.dropna()
     # Check shape
@@ -482,8 +459,7 @@ def print_plptec(path_inputs: Path, df_centrales: pd.DataFrame):
     lines += ['# Numero de centrales']
     lines += ['  %s' % len(df_centrales)]
     lines += ['# Central        Tecnologia      FlagPerfil']
-    lines += [df_centrales.to_string(
-                index=False, header=False, formatters=formatter_plptec)]
+    lines += [format_dat_table(df_centrales, formatter_plptec)]
     write_lines_from_scratch(lines, path_plptec)
 
 
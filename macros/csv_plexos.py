@@ -12,6 +12,7 @@ from macros.manli import (add_manli_data_row_by_row,
 from macros.manlix import get_df_manlix
 from macros.ernc import get_input_names
 from utils.logger import add_file_handler, create_logger
+from utils.workbook import read_iplp_sheet, get_iplp_workbook
 from utils.utils import (define_arg_parser,
                          get_plx_dem_skip_bool,
                          get_iplp_input_path,
@@ -21,6 +22,7 @@ from utils.utils import (define_arg_parser,
                          process_etapas_blocks,
                          read_plexos_end_date,
                          get_scenarios)
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from openpyxl.utils.datetime import from_excel
@@ -60,15 +62,15 @@ def read_centrales_plexos(iplp_path: Path,
     '''
     if not add_specs:
         # Get only Pmax
-        df = pd.read_excel(iplp_path, sheet_name="Centrales",
-                           skiprows=4, usecols="B,C,AB")
+        df = read_iplp_sheet(iplp_path, sheet_name="Centrales",
+                             skiprows=4, usecols="B,C,AB")
         df = df.rename(columns={
             'CENTRALES': 'Nombre',
             'Máxima.1': 'Pmax'})
     else:
         # Get MinTecNeto, MinDown, MinUp, ShutDownCost, StartCost
-        df = pd.read_excel(iplp_path, sheet_name="Centrales",
-                           skiprows=4, usecols="B,C,AT:AX")
+        df = read_iplp_sheet(iplp_path, sheet_name="Centrales",
+                             skiprows=4, usecols="B,C,AT:AX")
         df = df.rename(columns={
             'CENTRALES': 'Nombre',
             'MinTec Neto': 'MinTecNeto',
@@ -246,8 +248,8 @@ def print_generator_heatrate_fuel(df_daily, iplp_path, path_csv):
 
     # Read gas consumption from PLPGNL_ships sheet
     # Use it to replace different values
-    df_gas = pd.read_excel(iplp_path, sheet_name="PLPGNL_ships",
-                           usecols="B:F", skiprows=3).dropna(how="all")
+    df_gas = read_iplp_sheet(iplp_path, sheet_name="PLPGNL_ships",
+                             usecols="B:F", skiprows=3).dropna(how="all")
     # Dictionary with data
     gas_cons_dict = df_gas.set_index('Central Gas')[
         "Rendimiento [MMBtu/MWh]"].to_dict()
@@ -465,8 +467,8 @@ def print_gas_files(
     check_is_path(path_csv / ('GNL_' + scen))
 
     # read gnl sheet PLPGNL_PolCom y seleccionar escenario
-    df_gnl = pd.read_excel(iplp_path, sheet_name='PLPGNL_PolCom',
-                           skiprows=1, header=[0, 1])
+    df_gnl = read_iplp_sheet(iplp_path, sheet_name='PLPGNL_PolCom',
+                             skiprows=1, header=[0, 1])
     df_gnl = df_gnl.dropna(axis=1, how='all')
 
     # Warn if there are any NaN values
@@ -544,8 +546,8 @@ def read_bess_properties(iplp_path: Path, path_df: Path) -> pd.DataFrame:
     '''
     Read BESS properties from iplp_path
     '''
-    df_bess = pd.read_excel(iplp_path, sheet_name='Centrales',
-                            skiprows=4, usecols="B,C,AB,BG,DL:DO")
+    df_bess = read_iplp_sheet(iplp_path, sheet_name='Centrales',
+                              skiprows=4, usecols="B,C,AB,BG,DL:DO")
     # Rename by position
     df_bess.columns = ['Name', 'Type', 'Pmax MW', 'Tech', 'Eff_Charge',
                        'Eff_Discharge', 'Duration_h', 'Associated_Unit']
@@ -745,12 +747,13 @@ def get_monthly_demand_plexos(iplp_path: Path,
     return df_monthly_demand
 
 
-def format_node_load_file(df_hourly: pd.DataFrame, df: pd.DataFrame):
+def unstack_node_load(df_hourly: pd.DataFrame, df: pd.DataFrame,
+                      buses: list = None) -> pd.DataFrame:
     '''
-    Format Node Load file for plexos
+    Get hourly consumption with one column per node
 
-    Start from df_hourly to make sure all real hours are considered,
-    fill missing days (Feb-29) with previous day
+    Start from df_hourly to make sure all real hours are considered.
+    If buses is given, use them as columns
     '''
     cols_to_merge_on = ['Year', 'Month', 'Day', 'Hour']
     df = pd.merge(df_hourly, df, on=cols_to_merge_on)
@@ -761,14 +764,50 @@ def format_node_load_file(df_hourly: pd.DataFrame, df: pd.DataFrame):
            .unstack('Barra Consumo')
     # Drop level
     df.columns = df.columns.droplevel()
-    # For each column, if entire Day has 0 Consumption, copy previous day
-    df = df.fillna(0)
-    for col in df.columns:
-        mask = df.groupby(['Year', 'Month', 'Day'])[col].transform(
-            'sum') == 0
-        df.loc[mask, col] = df.loc[:, col].shift(24)
+    if buses is not None:
+        df = df.reindex(columns=buses)
+    return df.fillna(0)
+
+
+def fill_zero_days(df: pd.DataFrame,
+                   df_previous: pd.DataFrame = None) -> pd.DataFrame:
+    '''
+    For each column, if entire Day has 0 Consumption, copy previous day
+
+    df_previous holds the rows before df, before filling, so that the
+    first day of df can be copied from them
+    '''
+    values = df.to_numpy(dtype=float)
+    if len(values) == 0:
+        return df.copy()
+    # Rows are sorted by day, so each day is a contiguous block of rows
+    day_code = (df.index.get_level_values('Year') * 10000 +
+                df.index.get_level_values('Month') * 100 +
+                df.index.get_level_values('Day')).to_numpy()
+    day_starts = np.flatnonzero(np.r_[True, day_code[1:] != day_code[:-1]])
+    day_lengths = np.diff(np.r_[day_starts, len(values)])
+    # Sum each day for all columns at once
+    day_sums = np.add.reduceat(values, day_starts, axis=0)
+    mask = np.repeat(day_sums == 0, day_lengths, axis=0)
+    # Values of the previous day (24 rows before)
+    if df_previous is not None and len(df_previous) > 0:
+        values_all = np.vstack([df_previous.to_numpy(dtype=float), values])
+    else:
+        values_all = values
+    n_previous = len(values_all) - len(values)
+    shifted = np.full_like(values, np.nan)
+    first = max(0, 24 - n_previous)
+    if first < len(values):
+        shifted[first:] = values_all[n_previous + first - 24:-24]
+    return pd.DataFrame(np.where(mask, shifted, values),
+                        index=df.index, columns=df.columns)
+
+
+def rename_node_load_index(df: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Round values and rename index columns
+    '''
     df = df.round(4)
-    # Rename index columns
     df.reset_index(inplace=True)
     df.columns.values[0] = 'YEAR'
     df.columns.values[1] = 'MONTH'
@@ -777,6 +816,66 @@ def format_node_load_file(df_hourly: pd.DataFrame, df: pd.DataFrame):
     return df
 
 
+def format_node_load_file(df_hourly: pd.DataFrame, df: pd.DataFrame):
+    '''
+    Format Node Load file for plexos
+
+    Start from df_hourly to make sure all real hours are considered,
+    fill missing days (Feb-29) with previous day
+    '''
+    df = unstack_node_load(df_hourly, df)
+    df = fill_zero_days(df)
+    return rename_node_load_index(df)
+
+
+def write_node_load_file(df_hourly: pd.DataFrame, profiles_per_year,
+                         path_csv: Path, path_temp: Path):
+    '''
+    Write Node_Load.csv one year at a time
+
+    First pass stores the consumption of each year in path_temp and
+    gets all nodes, which are the columns of the file. Second pass
+    formats and appends each year, carrying the last day of the previous
+    year to fill zero days. Memory is bounded by one year of data
+    '''
+    year_paths = {}
+    # Remove pickles left by errors, so later runs do not mix them in
+    try:
+        buses = set()
+        for year, df_cons in profiles_per_year:
+            year_paths[year] = path_temp / ('node_load_%s.pkl' % year)
+            df_cons.to_pickle(year_paths[year])
+            buses.update(df_cons['Barra Consumo'].unique())
+        buses = sorted(buses)
+
+        node_load_path = path_csv / 'Node_Load.csv'
+        df_previous = None
+        header = True
+        for year in sorted(year_paths):
+            df_cons = pd.read_pickle(year_paths[year])
+            year_paths[year].unlink()
+            if len(df_cons) == 0:
+                continue
+            df_year = unstack_node_load(df_hourly, df_cons, buses)
+            if len(df_year) == 0:
+                continue
+            df_out = rename_node_load_index(
+                fill_zero_days(df_year, df_previous))
+            df_out.to_csv(node_load_path, index=False,
+                          mode='w' if header else 'a', header=header)
+            header = False
+            # Keep last day, before filling zero days, for the next year
+            if df_previous is not None:
+                df_year = pd.concat([df_previous, df_year])
+            df_previous = df_year.iloc[-24:]
+            del df_cons, df_year, df_out
+    finally:
+        for year_path in year_paths.values():
+            year_path.unlink(missing_ok=True)
+    if header:
+        logger.error('No demand data to print in %s' % node_load_path)
+
+
 def print_node_load_new(df_hourly: pd.DataFrame, path_csv: Path,
                         iplp_path: Path, path_df: Path):
     '''
@@ -792,17 +891,12 @@ def print_node_load_new(df_hourly: pd.DataFrame, path_csv: Path,
         iplp_path, year_ini, year_end)
     df_hourly_profiles_plexos = get_hourly_profiles_plexos(iplp_path)
 
-    logger.info('Merging dataframes to get hourly demand per node')
-    # Get all profiles with hourly resolution for Plexos
-    df = get_all_profiles_plexos(df_monthly_demand,
-                                 df_hourly_profiles_plexos,
-                                 df_dem_por_barra)
-
-    logger.info('Formatting Node Load file')
-    df = format_node_load_file(df_hourly, df)
-
-    logger.info('Printing Node Load file')
-    df.to_csv(path_csv / 'Node_Load.csv', index=False)
+    logger.info('Merging dataframes to get hourly demand per node, '
+                'and printing Node Load file per year')
+    # Get all profiles with hourly resolution for Plexos, year by year
+    profiles_per_year = get_profiles_plexos_per_year(
+        df_monthly_demand, df_hourly_profiles_plexos, df_dem_por_barra)
+    write_node_load_file(df_hourly, profiles_per_year, path_csv, path_df)
 
     logger.info('Printing demand dataframes')
     df_dem_por_barra.to_csv(path_df / 'dem_dem_por_barra.csv', index=False)
@@ -815,8 +909,8 @@ def get_hourly_profiles_plexos(iplp_path: Path) -> pd.DataFrame:
     # Read PerfilesDDA_Plx sheet, skipping first column and first row,
     # and the using the 3 first rows as header,
     # and the 3 first columns as index
-    df = pd.read_excel(iplp_path, sheet_name='PerfilesDDA_Plx',
-                       skiprows=1, header=[0, 1], index_col=[1, 3])
+    df = read_iplp_sheet(iplp_path, sheet_name='PerfilesDDA_Plx',
+                         skiprows=1, header=[0, 1], index_col=[1, 3])
     # Drop first two columns (Escenario, mes in str)
     df = df.drop([df.columns[0], df.columns[1]], axis=1)
     # Drop first rows (hora in str, column names)
@@ -833,12 +927,12 @@ def get_hourly_profiles_plexos(iplp_path: Path) -> pd.DataFrame:
     return df
 
 
-def get_all_profiles_plexos(df_monthly_demand: pd.DataFrame,
-                            df_hourly_profiles_plexos: pd.DataFrame,
-                            df_dem_por_barra: pd.DataFrame) -> pd.DataFrame:
+def get_profiles_plexos_per_year(df_monthly_demand: pd.DataFrame,
+                                 df_hourly_profiles_plexos: pd.DataFrame,
+                                 df_dem_por_barra: pd.DataFrame):
     '''
-    Get all profiles with hourly resolution for Plexos by merging
-    the three dataframes given
+    Yield (year, hourly consumption per Barra) for each year, merging
+    the three dataframes given one year at a time to bound memory usage
     '''
     # First drop columns that won't be used, to accelerate merge
     df_monthly_demand = df_monthly_demand.drop(['DaysInMonth'], axis=1)
@@ -856,21 +950,29 @@ def get_all_profiles_plexos(df_monthly_demand: pd.DataFrame,
     df_hourly_profiles_plexos['Profile'] = df_hourly_profiles_plexos[
         'Profile'].astype(str)
     # Merge with hourly profiles
-    # To avoid memory problems, merge by year, then concatenate
-    list_of_df = []
+    # To avoid memory problems, merge by year
     for year in df['Year'].unique():
         logger.info('Node Load - Processing year %s' % year)
         df_aux = pd.merge(df[df['Year'] == year],
                           df_hourly_profiles_plexos,
                           on=['Profile', 'Month'])
         # Calculate consumption, group by Barra and sum, reorder and sort
-        df_cons = get_consumption_per_barra_plexos(df_aux)
-        list_of_df.append(df_cons)
+        yield year, get_consumption_per_barra_plexos(df_aux)
         # Free memory
-        del df_aux, df_cons
+        del df_aux
+
+
+def get_all_profiles_plexos(df_monthly_demand: pd.DataFrame,
+                            df_hourly_profiles_plexos: pd.DataFrame,
+                            df_dem_por_barra: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Get all profiles with hourly resolution for Plexos by merging
+    the three dataframes given
+    '''
+    list_of_df = [df_cons for _, df_cons in get_profiles_plexos_per_year(
+        df_monthly_demand, df_hourly_profiles_plexos, df_dem_por_barra)]
     # Concatenate all dataframes
-    df = pd.concat(list_of_df)
-    return df
+    return pd.concat(list_of_df)
 
 
 def get_consumption_per_barra_plexos(df: pd.DataFrame) -> pd.DataFrame:
@@ -878,11 +980,9 @@ def get_consumption_per_barra_plexos(df: pd.DataFrame) -> pd.DataFrame:
     Calculate consumption, group by Barra and sum
     Then reorder and sort
     '''
-    df['Consumo'] = df.apply(lambda x: calculate_consumption_plexos(x), axis=1)
-    cols_to_drop = ['Demand', 'Factor Barra Consumo', 'PowerFactor']
+    df['Consumo'] = calculate_consumption_plexos(df)
     cols_for_groupby = ['Year', 'Month', 'Day', 'Hour', 'Barra Consumo']
-    df = df.drop(cols_to_drop, axis=1)
-    df = df.groupby(cols_for_groupby).sum(numeric_only=True).reset_index()
+    df = df.groupby(cols_for_groupby)['Consumo'].sum().reset_index()
     # Reorder columns and sort
     cols_to_select = ['Barra Consumo', 'Year', 'Month', 'Day', 'Hour',
                       'Consumo']
@@ -892,11 +992,13 @@ def get_consumption_per_barra_plexos(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def calculate_consumption_plexos(x):
+def calculate_consumption_plexos(df: pd.DataFrame) -> pd.Series:
     # Consumption is calculated as follows:
     # [Yearly demand] * [% of demand in current bus] *
     #   [% of demand in current hour] * 1000
-    return x['Demand'] * x['Factor Barra Consumo'] * x['PowerFactor'] * 1000
+    return df['Demand'].astype(float) * \
+        df['Factor Barra Consumo'].astype(float) * \
+        df['PowerFactor'].astype(float) * 1000
 
 
 def print_units_file(iplp_path: Path,
@@ -907,8 +1009,8 @@ def print_units_file(iplp_path: Path,
     '''
     # Read cols CENTRALES, Tipo de Central, Conectada a la Barra,
     # Estado
-    df = pd.read_excel(iplp_path, sheet_name="Centrales",
-                       skiprows=4, usecols="B,C,F,BJ")
+    df = read_iplp_sheet(iplp_path, sheet_name="Centrales",
+                         skiprows=4, usecols="B,C,F,BJ")
     df = df.rename(columns={'CENTRALES': 'NAME'})
     df['YEAR'] = df_daily['YEAR'][0]
     df['MONTH'] = 1
@@ -949,7 +1051,7 @@ def print_other_plexos_files(iplp_path: Path,
                              df_daily: pd.DataFrame,
                              path_csv: Path):
 
-    df = pd.read_excel(
+    df = read_iplp_sheet(
         iplp_path, sheet_name="Centrales",
         skiprows=4, usecols="B,C,F,BJ,DP:DU")
     df = df.rename(columns={'CENTRALES': 'NAME'})
@@ -992,18 +1094,18 @@ def print_control_freq_files(iplp_path: Path,
                              path_csv: Path):
 
     # Check if CtrlFrec sheet is present
-    if 'CtrlFrec' not in pd.ExcelFile(iplp_path).sheet_names:
+    if 'CtrlFrec' not in get_iplp_workbook(iplp_path).sheet_names:
         logger.error('Sheet CtrlFrec not found in %s' % iplp_path)
         logger.error('File Freq_Control could not be printed')
         return
 
-    df_params = pd.read_excel(iplp_path, sheet_name='CtrlFrec',
-                              usecols="E:R",
-                              skiprows=2, nrows=2, index_col=0,
+    df_params = read_iplp_sheet(iplp_path, sheet_name='CtrlFrec',
+                                usecols="E:R",
+                                skiprows=2, nrows=2, index_col=0,
+                                engine='pyxlsb')
+    df_reqs = read_iplp_sheet(iplp_path, sheet_name='CtrlFrec',
+                              usecols="B:R", skiprows=6,
                               engine='pyxlsb')
-    df_reqs = pd.read_excel(iplp_path, sheet_name='CtrlFrec',
-                            usecols="B:R", skiprows=6,
-                            engine='pyxlsb')
 
     # Rename df_hourly col names
     df_hourly = df_hourly.rename(columns={'Year': 'YEAR',
@@ -11,9 +11,9 @@ from utils.utils import (timeit,
                          check_is_path,
                          process_etapas_blocks,
                          translate_to_hydromonth,
-                         write_lines_from_scratch,
-                         write_lines_appending)
+                         DatWriter)
 from utils.logger import add_file_handler, create_logger
+from utils.workbook import read_iplp_sheet
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -40,7 +40,7 @@ def read_fuel_price_iplp(iplp_path: Path, fuel: str):
     if fuel not in fuel2sheetname.keys():
         logger.error('Fuel %s not recognized' % fuel)
         logger.error('Valid fuels are: Coal, Gas, Diesel')
-    df = pd.read_excel(
+    df = read_iplp_sheet(
         iplp_path, sheet_name=fuel2sheetname[fuel])
     df = df.set_index(['Combustible', 'Unidad'])
     # Warn if there are missing values
@@ -91,9 +91,9 @@ def read_unit_cvar_nominal(iplp_path: Path, ernc_zero: bool = False):
     '''
     Read nominal variable cost for each unit
     '''
-    df = pd.read_excel(iplp_path, sheet_name='Centrales',
-                       usecols='B:D', skiprows=4,
-                       index_col='CENTRALES')
+    df = read_iplp_sheet(iplp_path, sheet_name='Centrales',
+                         usecols='B:D', skiprows=4,
+                         index_col='CENTRALES')
     df = df[df['Tipo de Central'] == 'T']
     # If enrc_zero is true, set ernc units to 0
     if ernc_zero:
@@ -116,15 +116,15 @@ def read_heatrate_and_unit_fuel_mapping(iplp_path: Path):
     - Gas MMBtu/MWh,
     - Diesel ton/MWh
     '''
-    df = pd.read_excel(iplp_path, sheet_name='Rendimientos y CVarNcomb',
-                       usecols='B,D:F')
+    df = read_iplp_sheet(iplp_path, sheet_name='Rendimientos y CVarNcomb',
+                         usecols='B,D:F')
     df = df.rename(columns={
         'Rendimiento': 'Heat Rate Unit/MWh',
         'Combustible OSE': 'Fuel Name',
         'Costo Variable No Combustible': 'Non-Fuel Cost USD/MWh'})
     # Filter out missing units
-    df_cen = pd.read_excel(iplp_path, sheet_name='Centrales',
-                           usecols='B:C', skiprows=4)
+    df_cen = read_iplp_sheet(iplp_path, sheet_name='Centrales',
+                             usecols='B:C', skiprows=4)
     df = df.merge(df_cen, left_on='Central', right_on='CENTRALES')
     df = df[df['Tipo de Central'] == 'T']
     df = df.drop(columns=['Tipo de Central', 'CENTRALES'])
@@ -146,8 +146,8 @@ def read_year_co2_tax(iplp_path: Path):
     '''
     Read CO2 tax per year for current scenario
     '''
-    df = pd.read_excel(iplp_path, sheet_name='CVariable',
-                       usecols='J:K', skiprows=4).dropna(how='any')
+    df = read_iplp_sheet(iplp_path, sheet_name='CVariable',
+                         usecols='J:K', skiprows=4).dropna(how='any')
     df = df.rename(columns={'CO2 Tax in USD/TonCO2': 'CO2 Tax USD/TonCO2'})
     # Set tax type to float
     df['CO2 Tax USD/TonCO2'] = df['CO2 Tax USD/TonCO2'].astype(float)
@@ -158,8 +158,8 @@ def read_unit_emissions_mapping(iplp_path: Path):
     '''
     Read CO2 emissions per unit
     '''
-    df = pd.read_excel(iplp_path, sheet_name='Centrales',
-                       usecols='B,C,BY', skiprows=4)
+    df = read_iplp_sheet(iplp_path, sheet_name='Centrales',
+                         usecols='B,C,BY', skiprows=4)
     df = df[df['Tipo de Central'] == 'T']
     df = df.drop(columns=['Tipo de Central'])
     df = df.fillna(0)
@@ -280,29 +280,28 @@ def print_plpcosce(path_inputs: Path,
     lines = ['# Archivo de precios de termicas (plpcosce.dat)']
     lines += ['# Numero de centrales termicas con cambio de costo variable']
     lines += [' %s' % len(df_cvar_with_emissions['Central'].unique())]
-    write_lines_from_scratch(lines, path_plpcosce)
     df = df_cvar_with_emissions[['Central', 'Month', 'Etapa',
                                  'Variable Cost + CO2 Tax USD/MWh']]
-    for central in df['Central'].unique():
-        # Filter and select columns
-        df_aux = df[df['Central'] == central]
-        df_aux = df_aux.drop(columns=['Central'])
-        # Write lines to append
-        lines = ['\n# Nombre de la central']
-        lines += ["'%s'" % central]
-        lines += ['# Numero de etapas']
-        lines += ['   %s' % len(df_aux)]
-        lines += ['# Mes   Etapa    CosVar']
-        lines += [df_aux.to_string(
-                  index=False, header=False, formatters=formatter_plpcosce)]
-        write_lines_appending(lines, path_plpcosce)
+    with DatWriter(path_plpcosce) as writer:
+        writer.write_lines(lines)
+        for central in df['Central'].unique():
+            # Filter and select columns
+            df_aux = df[df['Central'] == central]
+            df_aux = df_aux.drop(columns=['Central'])
+            # Write header and table of current unit
+            lines = ['\n# Nombre de la central']
+            lines += ["'%s'" % central]
+            lines += ['# Numero de etapas']
+            lines += ['   %s' % len(df_aux)]
+            lines += ['# Mes   Etapa    CosVar']
+            writer.write_df(lines, df_aux, formatter_plpcosce)
 
 
 def print_df_units(iplp_path: Path, path_df: Path):
     # Print df_units file for Sobrecostos
     try:
-        df = pd.read_excel(iplp_path, sheet_name='Rendimientos y CVarNcomb',
-                           usecols='L:U')
+        df = read_iplp_sheet(iplp_path, sheet_name='Rendimientos y CVarNcomb',
+                             usecols='L:U')
     except Exception as e:
         logger.error("Could not read sheet 'Rendimientos y CVarNcomb', cols L:U")
         # logger.error(e)
@@ -22,10 +22,14 @@ from utils.utils import (timeit,
                          process_etapas_blocks,
                          get_list_of_all_barras,
                          write_lines_from_scratch,
-                         write_lines_appending,
+                         DatWriter,
+                         get_group_slices,
                          translate_to_hydromonth,
                          represents_int)
 from utils.logger import add_file_handler, create_logger
+from utils.dat_table import format_dat_table
+from utils.hour_block_map import HourBlockMap
+from utils.workbook import read_iplp_sheet
 
 logger = create_logger('demanda')
 
@@ -67,7 +71,7 @@ def dda_por_barra_to_row_format(iplp_path: Path) -> pd.DataFrame:
     '''
     Read DdaPorBarra sheet and transform it to row format
     '''
-    df = pd.read_excel(iplp_path, sheet_name="DdaPorBarra")
+    df = read_iplp_sheet(iplp_path, sheet_name="DdaPorBarra")
     # Validate DdaPorBarra sheet
     validate_dda_por_barra(df)
     # Transform to row format
@@ -159,7 +163,7 @@ def get_monthly_demand(iplp_path: Path, plexos: bool = False) -> pd.DataFrame:
     '''
     Get monthly demand and add timedata
     '''
-    df = pd.read_excel(iplp_path, sheet_name='DdaEnergia')
+    df = read_iplp_sheet(iplp_path, sheet_name='DdaEnergia')
     validate_monthly_demand(df)
     # Clean data
     df = clean_monthly_demand_data(df)
@@ -200,8 +204,8 @@ def validate_monthly_demand(df: pd.DataFrame):
 
 
 def get_hourly_profiles(iplp_path: Path) -> pd.DataFrame:
-    df = pd.read_excel(iplp_path, sheet_name='PerfilesDDA',
-                       usecols='A:AC')
+    df = read_iplp_sheet(iplp_path, sheet_name='PerfilesDDA',
+                         usecols='A:AC')
     validate_hourly_profiles(df)
     # Clean data
     cols_to_drop = ['#', 'Año', 'Verificador consumo']
@@ -249,21 +253,27 @@ def validate_hourly_profiles(df: pd.DataFrame):
 
 def get_blockly_profiles(df_hourly_profiles: pd.DataFrame,
                          block2day: pd.DataFrame) -> pd.DataFrame:
-    df = pd.merge(df_hourly_profiles, block2day, on=['Month', 'Hour'],
-                  how='left')
-    df = df.drop('Hour', axis=1)
-    df = df.groupby(['Profile', 'Month', 'Block']).sum().reset_index()
-    return df
-
-
-def calculate_consumption(x):
+    codes, profiles = pd.factorize(df_hourly_profiles['Profile'], sort=True)
+    index, values = HourBlockMap(block2day).aggregate(
+        df_hourly_profiles['PowerFactor'].to_numpy(dtype=float),
+        df_hourly_profiles['Month'].to_numpy(),
+        df_hourly_profiles['Hour'].to_numpy(), how='sum', groups=codes)
+    return pd.DataFrame({'Profile': profiles[index['Group']],
+                         'Month': index['Month'],
+                         'Block': index['Block'],
+                         'PowerFactor': values[:, 0]})
+
+
+def calculate_consumption(df: pd.DataFrame) -> pd.Series:
     # Consumption is calculated as follows:
     # [Monthly demand] * [% of demand in current bus] *
     #   [% of demand in current block] * 1000
     # divided by
     #  ([Days in Month] * [Hours per day in current block])
-    num = x['Demand'] * x['Factor Barra Consumo'] * x['PowerFactor'] * 1000
-    den = (x['DaysInMonth'] * x['Block_Len'])
+    num = df['Demand'].astype(float) * \
+        df['Factor Barra Consumo'].astype(float) * \
+        df['PowerFactor'].astype(float) * 1000
+    den = (df['DaysInMonth'] * df['Block_Len'])
     return num / den
 
 
@@ -285,12 +295,9 @@ def get_consumption_per_barra(df: pd.DataFrame) -> pd.DataFrame:
     Calculate consumption, group by Barra and sum
     Then reorder and sort
     '''
-    df['Consumo'] = df.apply(lambda x: calculate_consumption(x), axis=1)
-    cols_to_drop = ['Demand', 'Factor Barra Consumo', 'PowerFactor',
-                    'Block_Len', 'DaysInMonth']
+    df['Consumo'] = calculate_consumption(df)
     cols_for_groupby = ['Year', 'Month', 'Block', 'Etapa', 'Barra Consumo']
-    df = df.drop(cols_to_drop, axis=1)
-    df = df.groupby(cols_for_groupby).sum(numeric_only=True).reset_index()
+    df = df.groupby(cols_for_groupby)['Consumo'].sum().reset_index()
     # Reorder columns and sort
     cols_to_select = ['Barra Consumo', 'Year', 'Month', 'Block',
                       'Etapa', 'Consumo']
@@ -328,35 +335,40 @@ def write_plpdem_dat(df_all_profiles: pd.DataFrame, iplp_path: Path):
     plpdem_path = iplp_path.parent / 'Temp' / 'plpdem.dat'
 
     list_all_barras = get_list_of_all_barras(iplp_path)
-    list_dem_barras = df_all_profiles['Barra Consumo'].unique().tolist()
 
     # Translate month to hydromonth
     df_all_profiles = translate_to_hydromonth(df_all_profiles)
 
+    # Sort by barra once, and get the rows of each barra
+    df_all_profiles, dem_barras_slices = get_group_slices(
+        df_all_profiles[['Barra Consumo', 'Month', 'Etapa', 'Consumo']],
+        'Barra Consumo')
+    df_all_profiles = df_all_profiles[['Month', 'Etapa', 'Consumo']]
+
     lines = ['# Archivo de demandas por barra (plpdem.dat)']
     lines += ['#  Numero de barras']
     lines += ['%s' % len(list_all_barras)]
 
-    #  Write data from scratch
-    write_lines_from_scratch(lines, plpdem_path)
-
-    for barra in list_all_barras:
-        lines = ['\n# Nombre de la Barra']
-        lines += ["'%s'" % barra]
-        lines += ['# Numero de Demandas']
-        if barra in list_dem_barras:
-            df_aux = df_all_profiles[df_all_profiles['Barra Consumo'] == barra]
-            df_aux = df_aux[['Month', 'Etapa', 'Consumo']]
-            lines += ['%s' % len(df_aux)]
-            if len(df_aux) > 0:
-                lines += ['# Mes  Etapa   Demanda']
-                # Dataframe to string
-                lines += [df_aux.to_string(
-                    index=False, header=False, formatters=formatters_plpdem)]
-        else:
-            lines += ['%s' % 0]
-        #  write data for current barra
-        write_lines_appending(lines, plpdem_path)
+    with DatWriter(plpdem_path) as writer:
+        #  Write data from scratch
+        writer.write_lines(lines)
+
+        for barra in list_all_barras:
+            lines = ['\n# Nombre de la Barra']
+            lines += ["'%s'" % barra]
+            lines += ['# Numero de Demandas']
+            if barra in dem_barras_slices:
+                df_aux = df_all_profiles.iloc[dem_barras_slices[barra]]
+                lines += ['%s' % len(df_aux)]
+                if len(df_aux) > 0:
+                    lines += ['# Mes  Etapa   Demanda']
+                    #  write data for current barra
+                    writer.write_df(lines, df_aux, formatters_plpdem)
+                    continue
+            else:
+                lines += ['%s' % 0]
+            #  write data for current barra
+            writer.write_lines(lines)
 
 
 def write_uni_plpdem_dat(df_all_profiles: pd.DataFrame, iplp_path: Path):
@@ -380,8 +392,7 @@ def write_uni_plpdem_dat(df_all_profiles: pd.DataFrame, iplp_path: Path):
     lines += ['# Numero de Demandas']
     lines += ['%s' % len(df_aggregated)]
     lines += ['# Mes  Etapa   Demanda']
-    lines += [df_aggregated.to_string(
-        index=False, header=False, formatters=formatters_plpdem)]
+    lines += [format_dat_table(df_aggregated, formatters_plpdem)]
 
     # Write data from scratch
     write_lines_from_scratch(lines, uni_plpdem_path)
@@ -393,7 +404,6 @@ def write_plpfal_prn(blo_eta: pd.DataFrame, df_all_profiles: pd.DataFrame,
 
     df_buses = get_barras_info(iplp_path, add_flag_falla=True)
     df_buses_falla = df_buses[df_buses['FlagFalla']]
-    list_dem_barras = df_all_profiles['Barra Consumo'].unique().tolist()
 
     # Build df with zero-consumption barras
     df_zero_demand = blo_eta[['Month', 'Etapa']].copy()
@@ -413,28 +423,31 @@ def write_plpfal_prn(blo_eta: pd.DataFrame, df_all_profiles: pd.DataFrame,
     df_all_profiles = translate_to_hydromonth(df_all_profiles)
     df_zero_demand = translate_to_hydromonth(df_zero_demand)
 
+    # Sort by barra once, and get the rows of each barra
+    df_all_profiles, dem_barras_slices = get_group_slices(
+        df_all_profiles, 'Barra Consumo')
+    df_all_profiles = df_all_profiles.drop('Barra Consumo', axis=1)
+
     lines = ['# Archivo de maximos de centrales de falla (plpfal.prn)']
 
-    # Write data from scratch
-    write_lines_from_scratch(lines, plpfal_path)
-
-    for _, row in df_buses_falla.iterrows():
-        lines = ['\n# Nombre de la central']
-        lines += ["'Falla_%03d'" % row['Nº']]
-        lines += ['#   Numero de Etapas e Intervalos']
-        if row['BARRA'] in list_dem_barras:
-            df_aux = df_all_profiles[
-                df_all_profiles['Barra Consumo'] == row['BARRA']]
-            df_aux = df_aux.drop('Barra Consumo', axis=1)
-        else:
-            df_aux = df_zero_demand
-        lines += ['  %s                 01' % len(df_aux)]
-        lines += ['#   Mes    Etapa  NIntPot   PotMin   PotMax']
-        lines += [df_aux.to_string(
-            index=False, header=False, formatters=formatters_plpfal)]
-
-        #  write data for current barra
-        write_lines_appending(lines, plpfal_path)
+    with DatWriter(plpfal_path) as writer:
+        # Write data from scratch
+        writer.write_lines(lines)
+
+        for number, barra in zip(df_buses_falla['Nº'],
+                                 df_buses_falla['BARRA']):
+            lines = ['\n# Nombre de la central']
+            lines += ["'Falla_%03d'" % number]
+            lines += ['#   Numero de Etapas e Intervalos']
+            if barra in dem_barras_slices:
+                df_aux = df_all_profiles.iloc[dem_barras_slices[barra]]
+            else:
+                df_aux = df_zero_demand
+            lines += ['  %s                 01' % len(df_aux)]
+            lines += ['#   Mes    Etapa  NIntPot   PotMin   PotMax']
+
+            #  write data for current barra
+            writer.write_df(lines, df_aux, formatters_plpfal)
 
 
 @timeit
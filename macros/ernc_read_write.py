@@ -1,12 +1,13 @@
+import numpy as np
 import pandas as pd
-from shutil import copy
 from pathlib import Path
 from openpyxl.utils.datetime import from_excel
 
 from utils.utils import (check_is_file,
-                         remove_blank_lines,
-                         write_lines_appending,
+                         DatWriter,
                          translate_to_hydromonth)
+from utils.dat_table import format_dat_tables
+from utils.workbook import read_iplp_sheet
 
 OUTPUT_FILENAME = 'plpmance.dat'
 
@@ -87,18 +88,38 @@ def read_ernc_files(path_df: Path, input_names: dict) -> dict:
     return ernc_data
 
 
+def build_df_plpmance_ernc(df_scaled_profiles: pd.DataFrame,
+                           unit_names: list, pmin: dict) -> pd.DataFrame:
+    '''
+    Get Month, Etapa, NIntPot, Pmin and Pmax of all units, with the table
+    of each unit stacked in the order of unit_names
+    '''
+    num_blo = len(df_scaled_profiles)
+    pmax = df_scaled_profiles[unit_names].to_numpy(dtype=float).T.ravel()
+    pmin_units = np.repeat([pmin[unit] for unit in unit_names], num_blo)
+    return pd.DataFrame({
+        'Month': np.tile(df_scaled_profiles['Month'].to_numpy(),
+                         len(unit_names)),
+        'Etapa': np.tile(df_scaled_profiles['Etapa'].to_numpy(),
+                         len(unit_names)),
+        'NIntPot': 1,
+        'Pmin': np.minimum(pmin_units, pmax),
+        'Pmax': pmax})
+
+
 def write_plpmance_ernc_dat(ernc_data: dict, df_scaled_profiles: pd.DataFrame,
                             unit_names: list, iplp_path: Path):
     '''
-    Write dat file in PLP format
+    Write dat file in PLP format, with the units of plpmance_ini.dat
+    followed by the ernc units
     '''
     # Get initial file
     plpmance_ini_path = iplp_path.parent / 'Temp' / 'plpmance_ini.dat'
     check_is_file(plpmance_ini_path)
-    # Copy initial file to output destination
-    source = plpmance_ini_path
     dest = iplp_path.parent / 'Temp' / OUTPUT_FILENAME
-    copy(source, dest)
+    lines_ini = plpmance_ini_path.read_text().split('\n')
+    # Modify number of units
+    lines_ini[2] = '     %s' % (int(lines_ini[2]) + len(unit_names))
 
     num_blo = len(df_scaled_profiles)
     pmin = ernc_data['dict_min_capacity']
@@ -106,61 +127,34 @@ def write_plpmance_ernc_dat(ernc_data: dict, df_scaled_profiles: pd.DataFrame,
     # Translate month to hidromonth
     df_scaled_profiles = translate_to_hydromonth(df_scaled_profiles)
 
-    # Append ernc profiles
-    for unit in unit_names:
-        lines = ['\n# Nombre de la central']
-        lines += ["'%s'" % unit]
-        lines += ['#   Numero de Bloques e Intervalos']
-        lines += ['  %04d                 01' % num_blo]
-        lines += ['#   Mes    Bloque  NIntPot   PotMin   PotMax']
-
-        # Format unit dataframe
-        df_aux = df_scaled_profiles[['Month', 'Etapa', unit]]
-        df_aux = df_aux.rename(columns={unit: 'Pmax'})
-        df_aux['Pmin'] = pmin[unit]
-        df_aux['Pmin'] = df_aux.apply(lambda x: min(x['Pmin'], x['Pmax']),
-                                      axis=1)
-        df_aux['NIntPot'] = 1
-        df_aux = df_aux[['Month', 'Etapa', 'NIntPot', 'Pmin', 'Pmax']]
-
-        # Dataframe to string
-        lines += [df_aux.to_string(index=False, header=False,
-                                   formatters=formatters)]
-
-        #  write data for current unit
-        write_lines_appending(lines, dest)
-
-    # Modify number of units
-    new_units_number = len(unit_names)
-    add_ernc_units(dest, new_units_number)
-    # Make sure there are no blank lines
-    remove_blank_lines(dest)
+    # Format tables of all units at once
+    if num_blo > 0 and len(unit_names) > 0:
+        df_plpmance = build_df_plpmance_ernc(
+            df_scaled_profiles, unit_names, pmin)
+        tables = format_dat_tables(df_plpmance, formatters, len(unit_names))
+
+    # Write initial units and append ernc profiles, with no blank lines
+    with DatWriter(dest, skip_blank_lines=True) as writer:
+        writer.write_lines(lines_ini)
+        for idx, unit in enumerate(unit_names):
+            lines = ['\n# Nombre de la central']
+            lines += ["'%s'" % unit]
+            lines += ['#   Numero de Bloques e Intervalos']
+            lines += ['  %04d                 01' % num_blo]
+            lines += ['#   Mes    Bloque  NIntPot   PotMin   PotMax']
+            if num_blo > 0:
+                lines += [tables[idx]]
+            writer.write_lines(lines)
     # Warning if there are repeated generation units
     # check_plpmance(dest)
 
 
-def add_ernc_units(plpmance_file: Path, new_units_number: int):
-    # open file in read mode
-    file = open(plpmance_file, "r")
-    lines = file.readlines()
-    old_units_number = int(lines[2])
-    lines[2] = "     %s\n" % (old_units_number + new_units_number)
-    # close the file
-    file.close()
-    # Open file in write mode
-    write_file = open(plpmance_file, "w")
-    # overwriting the old file contents with the new/replaced content
-    write_file.writelines(lines)
-    # close the file
-    write_file.close()
-
-
 def generate_max_capacity_csv(iplp_path: Path, path_df: Path,
                               input_names: dict):
     '''
     Read iplp file, sheet ERNC, and extract max capacities
     '''
-    df = pd.read_excel(iplp_path, sheet_name='ERNC', usecols="A:B")
+    df = read_iplp_sheet(iplp_path, sheet_name='ERNC', usecols="A:B")
     validate_max_capacity_csv(df)
     df = df.dropna()
     df.to_csv(Path(path_df, input_names["MAX_CAPACITY_FILENAME"]),
@@ -180,8 +174,8 @@ def generate_min_capacity_csv(iplp_path: Path, path_df: Path,
 
     Note: Only CSP units should have Pmin
     '''
-    df = pd.read_excel(iplp_path, sheet_name='Centrales',
-                       skiprows=4, usecols="B,AA")
+    df = read_iplp_sheet(iplp_path, sheet_name='Centrales',
+                         skiprows=4, usecols="B,AA")
     validate_min_capacity_csv(df)
     df = df.dropna()
     df = df.rename(columns={'CENTRALES': 'Name', 'Mínima.1': 'Pmin'})
@@ -200,7 +194,7 @@ def generate_rating_factor_csv(iplp_path: Path, path_df: Path,
     '''
     Read iplp file, sheet ERNC, and extract rating factors
     '''
-    df = pd.read_excel(iplp_path, sheet_name='ERNC', usecols="E:G")
+    df = read_iplp_sheet(iplp_path, sheet_name='ERNC', usecols="E:G")
     validate_rating_factor_csv(df)
     df['DateFrom'] = df['DateFrom'].apply(from_excel)
     df = df.dropna()
@@ -225,11 +219,11 @@ def generate_profiles_csv(iplp_path: Path, path_df: Path,
     '''
     h_sheetname = 'ernc_H_%s' % input_names["SCENARIO"]
     hm_sheetname = 'ernc_MH_%s' % input_names["SCENARIO"]
-    df_h = pd.read_excel(iplp_path, sheet_name=h_sheetname)
+    df_h = read_iplp_sheet(iplp_path, sheet_name=h_sheetname)
     validate_profiles_csv(df_h, resolution='h')
     df_h.to_csv(Path(path_df, input_names["H_PROFILES_FILENAME"]),
                 index=False, header=True)
-    df_hm = pd.read_excel(iplp_path, sheet_name=hm_sheetname)
+    df_hm = read_iplp_sheet(iplp_path, sheet_name=hm_sheetname)
     validate_profiles_csv(df_hm, resolution='hm')
     df_hm.to_csv(Path(path_df, input_names["HM_PROFILES_FILENAME"]),
                  index=False, header=True)
@@ -254,8 +248,8 @@ def get_unit_type(iplp_path: Path) -> dict:
     '''
     Read iplp file, sheet Centrales, and extract unit type
     '''
-    df = pd.read_excel(iplp_path, sheet_name='Centrales',
-                       skiprows=4, usecols="B,C")
+    df = read_iplp_sheet(iplp_path, sheet_name='Centrales',
+                         skiprows=4, usecols="B,C")
     df = df.dropna()
     df = df.rename(columns={'CENTRALES': 'Name', 'Tipo de Central': 'Type'})
     df = df.set_index('Name')
@@ -1,8 +1,10 @@
 import sys
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
-from utils.utils import append_rows
+from utils.utils import get_group_slices
+from utils.hour_block_map import HourBlockMap
 
 PRINT_FILES = False
 HOURS_IN_MONTH = 24
@@ -14,22 +16,15 @@ def hour2block(df: pd.DataFrame, block2day: pd.DataFrame) -> pd.DataFrame:
     '''
     Reshape dataframe to show energy per block
     '''
-    df = pd.merge(df, block2day, on=['Month', 'Hour'])
-    df = df.drop(['Hour'], axis=1)
-
-    # Build dictionary with functions to apply
     # Use mean to get Pmax across hours in each block
-    agg_dict = {}
-    colnames = df.columns.tolist()
-    for colname in colnames:
-        # if colname is not Month nor Block
-        if colname != 'Month' and colname != 'Block':
-            agg_dict[colname] = 'mean'
-    if len(agg_dict) > 0:
-        df = df.groupby(['Month', 'Block']).agg(agg_dict)
-        # Reset index to get Block and Month as columns
-        return df.reset_index()
-    return df
+    value_cols = [col for col in df.columns if col not in ('Month', 'Hour')]
+    index, values = HourBlockMap(block2day).aggregate(
+        df[value_cols].to_numpy(dtype=float), df['Month'].to_numpy(),
+        df['Hour'].to_numpy(), how='mean')
+    df_blocks = pd.DataFrame(values, columns=value_cols)
+    df_blocks.insert(0, 'Month', index['Month'].astype(df['Month'].dtype))
+    df_blocks.insert(1, 'Block', index['Block'])
+    return df_blocks
 
 
 def get_profiles_blo(ernc_data: dict, block2day: pd.DataFrame) -> dict:
@@ -133,42 +128,74 @@ def process_semi_months(df_rf: pd.DataFrame) -> pd.DataFrame:
     The only fields that will be used are 'Initial_Eta' and 'Value [MW]',
     so the other fields are not modified.
     '''
-    new_df_rf = pd.DataFrame(columns=df_rf.columns)
-    previous_row = ''
-    previous_value = 0
-
-    for idx, row in df_rf.iterrows():
-        if row['Day'] == 1:
-            new_df_rf = append_rows(new_df_rf, row)
-        else:
-            fraction_before = row['Day'] / row['DaysInMonth']
-            fraction_after = 1 - fraction_before
-
-            if (idx >= 1):
-                if (previous_row['Name'] == row['Name']):
-                    previous_value = previous_row['Value [MW]']
-            # Replace current row
-            new_row1 = row.copy()
-            new_row1['Value [MW]'] = \
-                (row['Value [MW]'] * fraction_after) + \
-                (previous_value * fraction_before)
-            # Insert new row
-            new_row2 = row.copy()
-            new_row2['DateFrom'] = row['DateFrom'] + pd.DateOffset(months=1)
-            new_row2['DateFrom'] = new_row2['DateFrom'].replace(day=1)
-            new_row2['Year'] = new_row2['DateFrom'].year
-            new_row2['Month'] = new_row2['DateFrom'].month
-            new_row2['Day'] = new_row2['DateFrom'].day
-            new_row2['DaysInMonth'] = new_row2['DateFrom'].days_in_month
-            new_row2['Year-Month'] = (new_row2['Year'], new_row2['Month'])
-            new_row2['Initial_Eta'] = row['Initial_Eta'] + BLOCKS_IN_MONTH
-            # Concat all
-            new_df_rf = append_rows(new_df_rf, new_row1, new_row2)
-        previous_row = row
-        previous_value = 0
+    # As in the former row loop, the row labelled 0 (first row of the
+    # sheet) does not use the previous value, wherever it is after sorting
+    first_row = ~np.asarray(df_rf.index >= 1)
+    df_rf = df_rf.reset_index(drop=True)
+    semi_month = (df_rf['Day'] != 1).to_numpy()
+    # Value of the previous rating factor of the same unit, 0 if none
+    previous_value = df_rf.groupby('Name', sort=False)['Value [MW]'].shift(
+        fill_value=0)
+    previous_value[first_row] = 0
+    fraction_before = df_rf['Day'] / df_rf['DaysInMonth']
+    fraction_after = 1 - fraction_before
+
+    # Replace current rows
+    new_rows1 = df_rf.copy()
+    new_rows1['Value [MW]'] = np.where(
+        semi_month,
+        (df_rf['Value [MW]'] * fraction_after) +
+        (previous_value * fraction_before),
+        df_rf['Value [MW]'])
+    # Insert new rows, starting on the 1st of next month
+    new_rows2 = df_rf[semi_month].copy()
+    date_from = new_rows2['DateFrom'] + pd.DateOffset(months=1)
+    date_from -= pd.to_timedelta(date_from.dt.day - 1, unit='D')
+    new_rows2['DateFrom'] = date_from
+    new_rows2['Year'] = date_from.dt.year
+    new_rows2['Month'] = date_from.dt.month
+    new_rows2['Day'] = date_from.dt.day
+    new_rows2['DaysInMonth'] = date_from.dt.days_in_month
+    new_rows2['Year-Month'] = list(zip(new_rows2['Year'],
+                                       new_rows2['Month']))
+    new_rows2['Initial_Eta'] = new_rows2['Initial_Eta'] + BLOCKS_IN_MONTH
+
+    # Concat all, each new row right after the row it splits
+    positions = np.concatenate([np.arange(len(df_rf)),
+                                np.flatnonzero(semi_month)])
+    new_df_rf = pd.concat([new_rows1, new_rows2])
+    new_df_rf = new_df_rf.iloc[np.argsort(positions, kind='stable')]
     return new_df_rf.reset_index(drop=True)
 
 
+def get_rating_steps(df_rf: pd.DataFrame, unit_names: list,
+                     etapas: np.ndarray) -> np.ndarray:
+    '''
+    Get rating factor of each unit at each etapa, shaped (etapas, units).
+    Each row of df_rf applies from its Initial_Eta on, until a later row
+    of the same unit applies. Etapas without rating factor are NaN
+    '''
+    ratings = np.full((len(etapas), len(unit_names)), np.nan)
+    df_sorted, slices = get_group_slices(df_rf, 'Name')
+    initial_eta = df_sorted['Initial_Eta'].to_numpy(dtype=float)
+    values = df_sorted['Value [MW]'].to_numpy(dtype=float)
+    for idx, unit in enumerate(unit_names):
+        rows = slices.get(unit)
+        if rows is None:
+            continue
+        # Rows without Initial_Eta never apply
+        unit_eta = np.nan_to_num(initial_eta[rows], nan=np.inf)
+        # Rows starting at or after a later row are always overwritten
+        next_eta = np.append(np.minimum.accumulate(unit_eta[::-1])[::-1][1:],
+                             np.inf)
+        steps = unit_eta < next_eta
+        step_eta = unit_eta[steps]
+        step_values = values[rows][steps]
+        pos = np.searchsorted(step_eta, etapas, side='right') - 1
+        ratings[pos >= 0, idx] = step_values[pos[pos >= 0]]
+    return ratings
+
+
 def get_scaled_profiles(ernc_data: dict, df_all_profiles: pd.DataFrame,
                         df_rf: pd.DataFrame, unit_names: list,
                         path_df: Path) -> pd.DataFrame:
@@ -178,26 +205,19 @@ def get_scaled_profiles(ernc_data: dict, df_all_profiles: pd.DataFrame,
     # Get units from max capacity dict, excluding those with type 'X'
     profile_dict = ernc_data['dict_max_capacity']
 
-    # Base of output dataframe
-    df_profiles = df_all_profiles[['Month', 'Etapa']].copy()
-    df_profiles = df_profiles.join(
-        pd.DataFrame(columns=profile_dict.keys()), how="outer")
-
-    df_profiles_aux = df_all_profiles[['Etapa']].copy()
-
-    # iterate units and add scaled profiles, overlapping previous rows
-    for unit in unit_names:
-        profile_name = profile_dict[unit]
-        df_profiles_aux['aux'] = df_all_profiles[profile_name]
-        # iterate rating factors
-        for _, row in df_rf[df_rf['Name'] == unit].iterrows():
-            etapas = (df_profiles['Etapa'] >= row['Initial_Eta'])
-            etapas_aux = (df_profiles_aux['Etapa'] >= row['Initial_Eta'])
-            df_profiles.loc[etapas, unit] =\
-                df_profiles_aux.loc[etapas_aux, 'aux'] * row['Value [MW]']
-
-    # Prevent future warning
-    pd.set_option('future.no_silent_downcasting', True)
+    # Rating factor of each unit at each etapa, times its profile
+    etapas = df_all_profiles['Etapa'].to_numpy(dtype=float)
+    ratings = get_rating_steps(df_rf, unit_names, etapas)
+    profile_names = [profile_dict[unit] for unit in unit_names]
+    profiles = df_all_profiles[profile_names].to_numpy(dtype=float)
+    scaled = ratings * profiles
+
+    # Output dataframe, with all units in profile_dict
+    df_scaled = pd.DataFrame(0.0, index=df_all_profiles.index,
+                             columns=list(profile_dict.keys()))
+    df_scaled[unit_names] = scaled
+    df_profiles = pd.concat(
+        [df_all_profiles[['Month', 'Etapa']], df_scaled], axis=1)
     # Make sure nan values are turned to 0
     df_profiles = df_profiles.fillna(0)
     # Print profiles to file
@@ -7,6 +7,7 @@ from utils.utils import (define_arg_parser,
                          check_is_path,
                          timeit)
 from utils.logger import add_file_handler, create_logger
+from utils.workbook import read_iplp_sheet
 
 logger = create_logger('filter_files')
 
@@ -14,8 +15,8 @@ logger = create_logger('filter_files')
 def create_block2day(iplp_path: Path, path_dat: Path,
                      sheet_name: str = 'Block2Day'):
     # Read data from Excel file starting from cell A1 to M25
-    df = pd.read_excel(iplp_path, header=None, sheet_name=sheet_name,
-                       usecols="A:M", nrows=25)
+    df = read_iplp_sheet(iplp_path, header=None, sheet_name=sheet_name,
+                         usecols="A:M", nrows=25)
     # Save data to CSV file
     csv_file = path_dat / "block2day.csv"
     df.to_csv(csv_file, index=False, header=False)
@@ -24,9 +25,9 @@ def create_block2day(iplp_path: Path, path_dat: Path,
 def create_plpparam_and_plpetapas(iplp_path: Path, path_dat: Path,
                                   path_dat_plexos: Path):
     # read data
-    df_etapas = pd.read_excel(iplp_path, sheet_name='Etapas', skiprows=3)
-    df_hidro = pd.read_excel(iplp_path, sheet_name='Hidrología',
-                             skiprows=1, header=None, usecols='B:D', nrows=6)
+    df_etapas = read_iplp_sheet(iplp_path, sheet_name='Etapas', skiprows=3)
+    df_hidro = read_iplp_sheet(iplp_path, sheet_name='Hidrología',
+                               skiprows=1, header=None, usecols='B:D', nrows=6)
     # format data
     df_etapas['Inicial'] = df_etapas['Inicial'].apply(from_excel)
     df_etapas['Final'] = df_etapas['Final'].apply(from_excel)
@@ -1,5 +1,8 @@
+import numpy as np
+
 # ANGOSTURA
 
+
 def Vol_ANGOSTURA(Cota):
     if Cota < 280:
         return 1.42084270641058E-02 * Cota**2 - 7.55794967587359 * Cota +\
@@ -52,3 +55,61 @@ def Cot_ANGOSTURA(Volumen):
     else:
         return -4.80482772640695E-04 * Volumen**2 +\
             0.253576434458394 * Volumen + 294.546288065969
+
+
+def Vol_ANGOSTURA_array(Cota: np.ndarray) -> np.ndarray:
+    Cota = np.asarray(Cota, dtype=float)
+    conditions = [Cota < 280,
+                  (280 <= Cota) & (Cota <= 289.99),
+                  (290 <= Cota) & (Cota <= 295.99),
+                  (296 <= Cota) & (Cota <= 301.99),
+                  (302 <= Cota) & (Cota <= 309.99),
+                  (310 <= Cota) & (Cota <= 315.99)]
+    choices = [
+        1.42084270641058E-02 * Cota**2 - 7.55794967587359 * Cota +
+        1005.0989369465,
+        0.023812857004521 * Cota**2 - 12.9330770375678 * Cota +
+        1757.21857766058,
+        5.76911113283868E-02 * Cota**2 - 32.3727074657782 * Cota +
+        4545.81085866535,
+        0.107207786948566 * Cota**2 - 61.5307295123461 * Cota +
+        8838.26697394881,
+        0.141958163277288 * Cota**2 - 82.4673316143121 * Cota +
+        11991.7130189995,
+        0.112940353957764 * Cota**2 - 64.5547375536446 * Cota +
+        9227.31750858668]
+    default = 0.172040377016484 * Cota**2 - 102.168372622437 * Cota +\
+        15211.766064903
+    return np.select(conditions, choices, default)
+
+
+def Cot_ANGOSTURA_array(Volumen: np.ndarray) -> np.ndarray:
+    Volumen = np.asarray(Volumen, dtype=float)
+    conditions = [Volumen < 0.27,
+                  (0.27 <= Volumen) & (Volumen <= 2.0699),
+                  (2.07 <= Volumen) & (Volumen <= 4.8799),
+                  (4.88 <= Volumen) & (Volumen <= 9.5499),
+                  (9.55 <= Volumen) & (Volumen <= 18.2899),
+                  (18.29 <= Volumen) & (Volumen <= 33.7299),
+                  (33.73 <= Volumen) & (Volumen <= 68.9199),
+                  (68.92 <= Volumen) & (Volumen <= 105.8199)]
+    choices = [
+        -48.4192665413133 * Volumen**2 +
+        29.5296605308872 * Volumen + 265.545840411463,
+        -1.55585853866169 * Volumen**2 +
+        7.54048794244096 * Volumen + 268.431509764293,
+        -0.184330182119195 * Volumen**2 +
+        3.37699284229226 * Volumen + 271.791610100975,
+        -0.112192998077952 * Volumen**2 +
+        2.8581581455128 * Volumen + 272.728365457533,
+        -2.53694952744581E-02 * Volumen**2 +
+        1.37651004368551 * Volumen + 279.169734659089,
+        -8.42735262859683E-03 * Volumen**2 +
+        0.810786824299806 * Volumen + 283.990615589921,
+        -2.05377126600161E-03 * Volumen**2 +
+        0.431707705240237 * Volumen + 289.774750779038,
+        -5.41145244634336E-04 * Volumen**2 +
+        0.256320173086788 * Volumen + 294.905402099063]
+    default = -4.80482772640695E-04 * Volumen**2 +\
+        0.253576434458394 * Volumen + 294.546288065969
+    return np.select(conditions, choices, default)
@@ -0,0 +1,48 @@
+'''Array utils
+
+Helpers shared by the array versions of the dam curves, which take
+NumPy arrays of elevations or volumes and repeat the steps of the scalar
+functions element-wise
+'''
+import numpy as np
+
+
+def newton_array(vol_func, dvol_func, volumen: np.ndarray,
+                 cot_ini: np.ndarray, error: float,
+                 max_iter: int) -> np.ndarray:
+    '''
+    Solve vol_func(Cota) = volumen with Newton steps from cot_ini.
+    As in the scalar Cot_* functions, each element stops after the first
+    step smaller than error, or after max_iter steps
+    '''
+    cota = np.array(cot_ini, dtype=float)
+    active = np.arange(len(cota))
+    for _ in range(max_iter):
+        if len(active) == 0:
+            break
+        cot_ini_active = cota[active]
+        cot_fin = cot_ini_active - \
+            (vol_func(cot_ini_active) - volumen[active]) / \
+            dvol_func(cot_ini_active)
+        cota[active] = cot_fin
+        active = active[~(np.abs(cot_fin - cot_ini_active) < error)]
+    return cota
+
+
+def bisect_array(table: list, m: int, x: np.ndarray) -> np.ndarray:
+    '''
+    Binary search of x in table between positions 1 and m, as in the
+    scalar puntero* functions: return the last midpoint visited
+    '''
+    table = np.asarray(table, dtype=float)
+    j = np.ones(len(x), dtype=int)
+    k = np.full(len(x), m, dtype=int)
+    i = np.zeros(len(x), dtype=int)
+    active = k - j > 1
+    while active.any():
+        i[active] = (k[active] + j[active]) // 2
+        below = x <= table[i]
+        k = np.where(active & below, i, k)
+        j = np.where(active & ~below, i, j)
+        active = k - j > 1
+    return i
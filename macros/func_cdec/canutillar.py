@@ -1,4 +1,5 @@
 from math import log, exp
+import numpy as np
 # CANUTILLAR
 
 
@@ -43,3 +44,24 @@ def Qmax_CANUTILLAR(Cota):
     return min(19.0967 + 0.2625014 * Cota,
                exp((log(Potmax) + 4.755425 - 1.015902 * log(Cota)) *
                    (1 / 0.9758028)))
+
+
+def Vol_CANUTILLAR_array(Cota: np.ndarray) -> np.ndarray:
+    Cota = np.asarray(Cota, dtype=float)
+    return np.select([Cota < 230, (230 <= Cota) & (Cota <= 240)],
+                     [44.9739 * Cota - 9894.258,
+                      46.3472 * Cota - 10210.117],
+                     50.7225 * Cota - 11260.189)
+
+
+def Cot_CANUTILLAR_array(Volumen: np.ndarray) -> np.ndarray:
+    Volumen = np.asarray(Volumen, dtype=float)
+    return np.select([Volumen < 449.739,
+                      (449.739 <= Volumen) & (Volumen <= 913.211)],
+                     [0.022235119 * Volumen + 220,
+                      0.021576276 * Volumen + 220.29631],
+                     0.019715117 * Volumen + 221.99594)
+
+
+def Rend_CANUTILLAR_array(Cota: np.ndarray) -> np.ndarray:
+    return Rend_CANUTILLAR(np.asarray(Cota, dtype=float))
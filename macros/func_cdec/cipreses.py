@@ -1,4 +1,5 @@
 from math import log, exp
+import numpy as np
 
 
 # CIPRESES
@@ -60,6 +61,28 @@ def Rend_CIPRESES(Cota):
     return cons1 + cons2 * Cota + cons3 * Cota**2
 
 
+def Vol_CIPRESES_array(Cota: np.ndarray) -> np.ndarray:
+    Cota = np.asarray(Cota, dtype=float)
+    a0 = 134744.88984
+    a1 = -211.91025423
+    a2 = 0.0833132678
+    return np.where(Cota <= 1280, 0.0, a0 + (a1 * Cota) + (a2 * Cota**2))
+
+
+def Cot_CIPRESES_array(Volumen: np.ndarray) -> np.ndarray:
+    Volumen = np.asarray(Volumen, dtype=float)
+    a0 = 134744.88984
+    a1 = -211.91025423
+    a2 = 0.0833132678
+    with np.errstate(invalid='ignore'):
+        DVol = np.sqrt(a1**2 - 4 * a2 * (a0 - Volumen))
+    return np.where(Volumen <= 0, 1280.0, (-a1 + DVol) / (2 * a2))
+
+
+def Rend_CIPRESES_array(Cota: np.ndarray) -> np.ndarray:
+    return Rend_CIPRESES(np.asarray(Cota, dtype=float))
+
+
 # ISLA
 def Pot_ISLA(Caudal):
     a0, a1, a2, b0, b1, b2 = -7.259098, 1.432045, -0.01009883, -15.89178,
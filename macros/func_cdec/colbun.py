@@ -1,5 +1,7 @@
 import datetime
 import math
+import numpy as np
+from macros.func_cdec.array_utils import newton_array, bisect_array
 
 # Declare global variables
 volumenes = [319.1, 333.76, 348.83, 364.32, 380.22]
@@ -69,6 +71,44 @@ def Cot_COLBUN(Volumen):
         return CotFin
 
 
+def Vol_COLBUN_array(Cota: np.ndarray) -> np.ndarray:
+    Cota = np.asarray(Cota, dtype=float)
+    a3 = 215.679132
+    a2 = -564.993651
+    a1 = 496.907289
+    a0 = -146.591083
+    CMÁX = 437
+    VMÁX = 1550.63
+    result = (a1 * (Cota / CMÁX) + a2 * (Cota / CMÁX) ** 2 +
+              a3 * (Cota / CMÁX) ** 3 + a0) * VMÁX
+    mid = (Cota >= 393) & (Cota < 397)
+    if mid.any():
+        vols = np.array(volumenes)
+        i = np.floor(Cota[mid] - 392).astype(int)
+        m = vols[i] - vols[i - 1]
+        b = vols[i - 1] - np.array(Cotas)[i - 1] * m
+        result[mid] = m * Cota[mid] + b
+    result[Cota < 393] = 319.1
+    return result
+
+
+def Cot_COLBUN_array(Volumen: np.ndarray) -> np.ndarray:
+    Volumen = np.asarray(Volumen, dtype=float)
+    Error_Cota = 0.005
+    result = np.full(len(Volumen), 393.0)
+    mid = (Volumen >= 319.1) & (Volumen < 380.22)
+    if mid.any():
+        i, dc = punteroC_array(5, Volumen[mid])
+        cotas = np.array(Cotas, dtype=float)
+        result[mid] = cotas[i - 1] + dc * (cotas[i] - cotas[i - 1])
+    high = ~(Volumen < 380.22)
+    if high.any():
+        result[high] = newton_array(
+            Vol_COLBUN_array, dVol_COLBUN, Volumen[high],
+            CotEST_COLBUN(Volumen[high]), Error_Cota, 11)
+    return result
+
+
 def Filt_COLBUN(Cota):
     if Cota >= 423:
         return 0.487507978 * Cota - 202.489444
@@ -85,6 +125,10 @@ def Rend_COLBUN(Cota):
     return Rend0 * (Cota - CotaD) / (Cota0 - CotaD)
 
 
+def Rend_COLBUN_array(Cota: np.ndarray) -> np.ndarray:
+    return Rend_COLBUN(np.asarray(Cota, dtype=float))
+
+
 def Cotmax_COLBUN(fecha):
     if 4 <= datetime.datetime.strptime(fecha, '%Y-%m-%d').month <= 9:
         return 436
@@ -147,3 +191,10 @@ def punteroC(m, x, i, dc):
     d2 = volumenes[i] - volumenes[i - 1]
     dc = d1 / d2
     return i, dc
+
+
+def punteroC_array(m: int, x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    i = bisect_array(volumenes, m, x)
+    vols = np.array(volumenes)
+    dc = (x - vols[i - 1]) / (vols[i] - vols[i - 1])
+    return i, dc
@@ -0,0 +1,92 @@
+'''Cot table
+
+Tabulated version of the elevation-from-volume functions (Cot_*) that
+solve the volume curve iteratively.
+
+The table is a grid of volumes and the elevations given by the iterative
+solver. Cells are split until linear interpolation is within max_error
+of the solver at the cell midpoint, where the interpolation error of a
+smooth curve is largest, and at its quarter points, which also catches
+most steps of solvers that stop at a coarse tolerance. The final cells
+are then validated against the solver on a denser grid. Cells that fail
+it, or do not reach max_error after max_levels splits (e.g. where the
+solver itself jumps), and volumes out of the table range, are evaluated
+with the solver.
+'''
+import numpy as np
+
+
+# Maximum difference between table and iterative solver, in m
+TABLE_MAX_ERROR = 1e-4
+TABLE_INITIAL_CELLS = 1024
+TABLE_MAX_LEVELS = 12
+# Points of each cell, as fraction of its width, checked against the solver
+# before splitting it
+CHECK_FRACTIONS = (0.25, 0.5, 0.75)
+# Points of each final cell checked against the solver
+VALIDATION_FRACTIONS = tuple(np.arange(1, 16) / 16)
+
+
+class CotTable:
+    '''
+    Lookup table of array function cot_func in range [vol_min, vol_max]
+    '''
+
+    def __init__(self, cot_func, vol_min: float, vol_max: float,
+                 max_error: float = TABLE_MAX_ERROR,
+                 initial_cells: int = TABLE_INITIAL_CELLS,
+                 max_levels: int = TABLE_MAX_LEVELS):
+        self.cot_func = cot_func
+        self.max_error = max_error
+        volumes = np.linspace(vol_min, vol_max, initial_cells + 1)
+        cotas = cot_func(volumes)
+        for _ in range(max_levels):
+            mid_volumes, mid_cotas, failed = self._check_cells(
+                volumes, cotas, CHECK_FRACTIONS)
+            if not failed.any():
+                break
+            # Split failed cells at their midpoints
+            volumes = np.insert(volumes, np.flatnonzero(failed) + 1,
+                                mid_volumes[failed])
+            cotas = np.insert(cotas, np.flatnonzero(failed) + 1,
+                              mid_cotas[failed])
+        _, _, failed = self._check_cells(volumes, cotas,
+                                         VALIDATION_FRACTIONS)
+        self.volumes = volumes
+        self.cotas = cotas
+        self.valid_cells = ~failed
+        self.slopes = np.diff(cotas) / np.diff(volumes)
+
+    def _check_cells(self, volumes: np.ndarray, cotas: np.ndarray,
+                     fractions: tuple) -> tuple:
+        '''
+        Return midpoint volumes and solver elevations of each cell, and
+        whether interpolation misses the solver by more than max_error at
+        any of the fractions of the cell, which must include 0.5
+        '''
+        widths = np.diff(volumes)
+        failed = np.zeros(len(widths), dtype=bool)
+        for fraction in fractions:
+            check_volumes = volumes[:-1] + fraction * widths
+            check_cotas = self.cot_func(check_volumes)
+            interpolated = cotas[:-1] + fraction * np.diff(cotas)
+            failed |= ~(np.abs(interpolated - check_cotas) <= self.max_error)
+            if fraction == 0.5:
+                mid_volumes, mid_cotas = check_volumes, check_cotas
+        return mid_volumes, mid_cotas, failed
+
+    def __call__(self, Volumen: np.ndarray) -> np.ndarray:
+        shape = np.shape(Volumen)
+        Volumen = np.atleast_1d(np.asarray(Volumen, dtype=float))
+        cell = np.searchsorted(self.volumes, Volumen, side='right') - 1
+        # Last volume of the table belongs to the last cell
+        cell[Volumen == self.volumes[-1]] = len(self.volumes) - 2
+        in_table = (cell >= 0) & (cell < len(self.volumes) - 1)
+        in_table[in_table] = self.valid_cells[cell[in_table]]
+        result = np.empty(Volumen.shape)
+        cell = cell[in_table]
+        result[in_table] = self.cotas[cell] + self.slopes[cell] * (
+            Volumen[in_table] - self.volumes[cell])
+        if not in_table.all():
+            result[~in_table] = self.cot_func(Volumen[~in_table])
+        return result.reshape(shape)
@@ -0,0 +1,182 @@
+'''Dams
+
+Registry of the dam curves in macros/func_cdec. For each dam, it stores
+the scalar functions of volume (Vol), elevation (Cot) and efficiency
+(Rend), and their array versions, which evaluate a whole NumPy array in
+one call.
+
+Scalar functions are memoized, since the same elevations are evaluated
+many times (e.g. in maintenance sheets). Cot functions solved iteratively
+also have a tabulated version (see cot_table), built on first use.
+'''
+from functools import lru_cache
+import numpy as np
+
+from macros.func_cdec.cot_table import CotTable
+from macros.func_cdec.angostura import (
+    Vol_ANGOSTURA, Cot_ANGOSTURA, Vol_ANGOSTURA_array, Cot_ANGOSTURA_array)
+from macros.func_cdec.canutillar import (
+    Vol_CANUTILLAR, Cot_CANUTILLAR, Rend_CANUTILLAR, Vol_CANUTILLAR_array,
+    Cot_CANUTILLAR_array, Rend_CANUTILLAR_array)
+from macros.func_cdec.cipreses import (
+    Vol_CIPRESES, Cot_CIPRESES, Rend_CIPRESES, Vol_CIPRESES_array,
+    Cot_CIPRESES_array, Rend_CIPRESES_array)
+from macros.func_cdec.colbun import (
+    Vol_COLBUN, Cot_COLBUN, Rend_COLBUN, Vol_COLBUN_array, Cot_COLBUN_array,
+    Rend_COLBUN_array)
+from macros.func_cdec.eltoro import (
+    Vol_ELTORO, Cot_ELTORO, Rend_ELTORO, Vol_ELTORO_array, Cot_ELTORO_array,
+    Rend_ELTORO_array)
+from macros.func_cdec.lmaule import (
+    Vol_LMAULE, Cot_LMAULE, Rend_LMAULE, Vol_LMAULE_array, Cot_LMAULE_array,
+    Rend_LMAULE_array)
+from macros.func_cdec.machicura import (
+    Vol_MACHICURA, Cot_MACHICURA, Vol_MACHICURA_array, Cot_MACHICURA_array)
+from macros.func_cdec.pangue import (
+    Vol_PANGUE, Cot_PANGUE, Rend_PANGUE, Vol_PANGUE_array, Cot_PANGUE_array,
+    Rend_PANGUE_array)
+from macros.func_cdec.pehuenche import (
+    Vol_PEHUENCHE, Cot_PEHUENCHE, Rend_PEHUENCHE, Vol_PEHUENCHE_array,
+    Cot_PEHUENCHE_array, Rend_PEHUENCHE_array)
+from macros.func_cdec.pilmaiquen import (
+    Vol_PILMAIQUEN, Cot_PILMAIQUEN, Vol_PILMAIQUEN_array,
+    Cot_PILMAIQUEN_array)
+from macros.func_cdec.polcura import (
+    Vol_POLCURA, Cot_POLCURA, Vol_POLCURA_array, Cot_POLCURA_array)
+from macros.func_cdec.ralco import (
+    Vol_RALCO, Cot_RALCO, Rend_RALCO, Vol_RALCO_array, Cot_RALCO_array,
+    Rend_RALCO_array)
+from macros.func_cdec.rapel import (
+    Vol_RAPEL, Cot_RAPEL, Rend_RAPEL, Vol_RAPEL_array, Cot_RAPEL_array,
+    Rend_RAPEL_array)
+from macros.func_cdec.rucatayo import (
+    Vol_RUCATAYO, Cot_RUCATAYO, Vol_RUCATAYO_array, Cot_RUCATAYO_array)
+
+
+# Scalar and array version of each curve, per dam
+DAM_FUNCTIONS = {
+    'ANGOSTURA': {
+        'Vol': (Vol_ANGOSTURA, Vol_ANGOSTURA_array),
+        'Cot': (Cot_ANGOSTURA, Cot_ANGOSTURA_array)},
+    'CANUTILLAR': {
+        'Vol': (Vol_CANUTILLAR, Vol_CANUTILLAR_array),
+        'Cot': (Cot_CANUTILLAR, Cot_CANUTILLAR_array),
+        'Rend': (Rend_CANUTILLAR, Rend_CANUTILLAR_array)},
+    'CIPRESES': {
+        'Vol': (Vol_CIPRESES, Vol_CIPRESES_array),
+        'Cot': (Cot_CIPRESES, Cot_CIPRESES_array),
+        'Rend': (Rend_CIPRESES, Rend_CIPRESES_array)},
+    'COLBUN': {
+        'Vol': (Vol_COLBUN, Vol_COLBUN_array),
+        'Cot': (Cot_COLBUN, Cot_COLBUN_array),
+        'Rend': (Rend_COLBUN, Rend_COLBUN_array)},
+    'ELTORO': {
+        'Vol': (Vol_ELTORO, Vol_ELTORO_array),
+        'Cot': (Cot_ELTORO, Cot_ELTORO_array),
+        'Rend': (Rend_ELTORO, Rend_ELTORO_array)},
+    'LMAULE': {
+        'Vol': (Vol_LMAULE, Vol_LMAULE_array),
+        'Cot': (Cot_LMAULE, Cot_LMAULE_array),
+        'Rend': (Rend_LMAULE, Rend_LMAULE_array)},
+    'MACHICURA': {
+        'Vol': (Vol_MACHICURA, Vol_MACHICURA_array),
+        'Cot': (Cot_MACHICURA, Cot_MACHICURA_array)},
+    'PANGUE': {
+        'Vol': (Vol_PANGUE, Vol_PANGUE_array),
+        'Cot': (Cot_PANGUE, Cot_PANGUE_array),
+        'Rend': (Rend_PANGUE, Rend_PANGUE_array)},
+    'PEHUENCHE': {
+        'Vol': (Vol_PEHUENCHE, Vol_PEHUENCHE_array),
+        'Cot': (Cot_PEHUENCHE, Cot_PEHUENCHE_array),
+        'Rend': (Rend_PEHUENCHE, Rend_PEHUENCHE_array)},
+    'PILMAIQUEN': {
+        'Vol': (Vol_PILMAIQUEN, Vol_PILMAIQUEN_array),
+        'Cot': (Cot_PILMAIQUEN, Cot_PILMAIQUEN_array)},
+    'POLCURA': {
+        'Vol': (Vol_POLCURA, Vol_POLCURA_array),
+        'Cot': (Cot_POLCURA, Cot_POLCURA_array)},
+    'RALCO': {
+        'Vol': (Vol_RALCO, Vol_RALCO_array),
+        'Cot': (Cot_RALCO, Cot_RALCO_array),
+        'Rend': (Rend_RALCO, Rend_RALCO_array)},
+    'RAPEL': {
+        'Vol': (Vol_RAPEL, Vol_RAPEL_array),
+        'Cot': (Cot_RAPEL, Cot_RAPEL_array),
+        'Rend': (Rend_RAPEL, Rend_RAPEL_array)},
+    'RUCATAYO': {
+        'Vol': (Vol_RUCATAYO, Vol_RUCATAYO_array),
+        'Cot': (Cot_RUCATAYO, Cot_RUCATAYO_array)}
+}
+
+# Dams whose curves are used to build PLP reservoir files
+PLP_DAMS = ['LMAULE', 'CIPRESES', 'PEHUENCHE', 'COLBUN', 'ELTORO', 'RAPEL',
+            'CANUTILLAR', 'RALCO', 'PANGUE']
+
+# Volume range (hm3) of the tables of Cot functions solved iteratively
+COT_TABLE_RANGES = {
+    'COLBUN': (319.1, 1560),
+    'LMAULE': (0, 1430),
+    'MACHICURA': (0, 28),
+    'POLCURA': (0, 1.08),
+    'RALCO': (0, 1180),
+    'RAPEL': (65.3, 650)
+}
+
+
+@lru_cache(maxsize=None)
+def get_cot_table(dam: str) -> CotTable:
+    '''
+    Return lookup table of the Cot function of dam, built once per dam
+    '''
+    _, array_func = DAM_FUNCTIONS[dam]['Cot']
+    return CotTable(array_func, *COT_TABLE_RANGES[dam])
+
+
+@lru_cache(maxsize=None)
+def get_dam_function(dam: str, curve: str, vectorized: bool = False,
+                     tabulated: bool = False):
+    '''
+    Return function of curve ('Vol', 'Cot' or 'Rend') of dam, memoized
+    if scalar, or None if not defined.
+    With tabulated=True, iterative Cot functions are replaced by a
+    lookup table of their array version
+    '''
+    functions = DAM_FUNCTIONS.get(dam, {}).get(curve)
+    if functions is None:
+        return None
+    scalar_func, array_func = functions
+    if tabulated and curve == 'Cot' and dam in COT_TABLE_RANGES:
+        return get_cot_table(dam)
+    if vectorized or tabulated:
+        return array_func
+    return lru_cache(maxsize=None, typed=True)(scalar_func)
+
+
+def get_dam_functions(curve: str, dams: list = PLP_DAMS,
+                      vectorized: bool = False,
+                      tabulated: bool = False) -> dict:
+    '''
+    Return dict of functions of curve, for dams that define it
+    '''
+    dict_functions = {}
+    for dam in dams:
+        func = get_dam_function(dam, curve, vectorized=vectorized,
+                                tabulated=tabulated)
+        if func is not None:
+            dict_functions[dam] = func
+    return dict_functions
+
+
+def evaluate_dam_function(dam: str, curve: str, values: np.ndarray,
+                          tabulated: bool = False) -> np.ndarray:
+    '''
+    Evaluate curve of dam on all values with one call of its array
+    version, or its table if tabulated. Repeated values are evaluated once
+    '''
+    func = get_dam_function(dam, curve, vectorized=True,
+                            tabulated=tabulated)
+    if func is None:
+        raise ValueError('%s function for %s not found' % (curve, dam))
+    values = np.asarray(values, dtype=float)
+    unique_values, inverse = np.unique(values, return_inverse=True)
+    return func(unique_values)[inverse].reshape(values.shape)
@@ -1,4 +1,6 @@
 import math
+import numpy as np
+from macros.func_cdec.array_utils import bisect_array
 
 # Declare global variables
 Datos = [0, 48.28954, 97.47766, 147.26746, 197.35679, 248.04517, 299.43508,
@@ -60,6 +62,32 @@ def Vol_ELTORO(Cota):
     return max(result, 0)
 
 
+def Cot_ELTORO_array(Volumen: np.ndarray) -> np.ndarray:
+    Volumen = np.asarray(Volumen, dtype=float)
+    i, dc = punteroA_array(71, Volumen)
+    return np.clip(1300 + i - 2 + dc, 1300, 1370)
+
+
+def punteroA_array(m: int, x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    i = bisect_array(Datos, m, x)
+    datos = np.array(Datos)
+    dc = (x - datos[i - 1]) / (datos[i] - datos[i - 1])
+    return i, dc
+
+
+def Vol_ELTORO_array(Cota: np.ndarray) -> np.ndarray:
+    Cota = np.asarray(Cota, dtype=float)
+    datos = np.array(Datos)
+    result = np.where(np.isnan(Cota), np.nan, 5826.53656)
+    low = Cota < 1370
+    DCota = Cota[low] - 1300
+    i = np.minimum(np.floor(DCota).astype(int) + 1, 70)
+    result[low] = np.maximum(
+        datos[i - 1] + (DCota - np.floor(DCota)) * (datos[i] - datos[i - 1]),
+        0)
+    return result
+
+
 def Filt_ELTORO(Cota):
     a0 = -133471.205667
     a1 = 251.668765787
@@ -76,6 +104,10 @@ def Rend_ELTORO(Cota):
     return cons1 * Cota - cons2
 
 
+def Rend_ELTORO_array(Cota: np.ndarray) -> np.ndarray:
+    return Rend_ELTORO(np.asarray(Cota, dtype=float))
+
+
 def Qmax_ELTORO(Cota):
     Caudal = [17, 20, 20, 30, 40, 50, 60, 70, 80, 90]
 
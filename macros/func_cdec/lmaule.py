@@ -1,5 +1,9 @@
+import numpy as np
+from macros.func_cdec.array_utils import newton_array
+
 # LAGUNA DEL MAULE
 
+
 def CotEST_LMAULE(Volumen):
     a0 = 3.25854232403699E-03
     a1 = 0.025405983908303
@@ -66,3 +70,44 @@ def Cot_LMAULE(Volumen):
 
 def Rend_LMAULE(Cota):
     return 1.0
+
+
+def CotEST_LMAULE_array(Volumen: np.ndarray) -> np.ndarray:
+    a0 = 3.25854232403699E-03
+    a1 = 0.025405983908303
+    a2 = -1.35727677749965E-05
+    a3 = 2.49264011608606E-08
+    a4 = -3.23135007234829E-11
+    a5 = 2.43385209187998E-14
+    a6 = -9.6847814254483E-18
+    a7 = 1.57390037611625E-21
+
+    CotEST = a0 + (a1 * Volumen) + (a2 * Volumen ** 2) +\
+        (a3 * Volumen ** 3) + (a4 * Volumen ** 4) + (a5 * Volumen ** 5)
+    CotEST += a6 * Volumen ** 6 + a7 * Volumen ** 7
+    CotEST += 2152.135
+    return np.minimum(CotEST, 2180.3)
+
+
+def Vol_LMAULE_array(Cota: np.ndarray) -> np.ndarray:
+    DCota = np.asarray(Cota, dtype=float) - 2152.135
+    a0 = -0.426511610904754
+    a1 = 39.85091749344
+    a2 = 0.713891558517388
+    a3 = -2.68621789452889E-02
+    a4 = 7.69400535914122E-04
+    a5 = -8.51368088853222E-06
+
+    Vol = a0 + (a1 * DCota) + (a2 * DCota ** 2) +\
+        (a3 * DCota ** 3) + (a4 * DCota ** 4) + (a5 * DCota ** 5)
+    return np.maximum(Vol, 0)
+
+
+def Cot_LMAULE_array(Volumen: np.ndarray) -> np.ndarray:
+    Volumen = np.asarray(Volumen, dtype=float)
+    return newton_array(Vol_LMAULE_array, dVol_LMAULE, Volumen,
+                        CotEST_LMAULE_array(Volumen), 0.005, 11)
+
+
+def Rend_LMAULE_array(Cota: np.ndarray) -> np.ndarray:
+    return np.ones(np.shape(Cota))
@@ -1,5 +1,9 @@
+import numpy as np
+from macros.func_cdec.array_utils import newton_array
+
 # MACHICURA
 
+
 def CotEST_MACHICURA(Volumen):
     a0 = 253.9619
     a1 = 0.243919
@@ -70,3 +74,25 @@ def Pot_MACHICURA(Caudal):
         return Potmax
     else:
         return Pot_MACHICURA
+
+
+def Vol_MACHICURA_array(Cota: np.ndarray) -> np.ndarray:
+    Cota = np.asarray(Cota, dtype=float)
+    a0 = 0.220082
+    a1 = 3.869693
+    a2 = 0.854351
+    a3 = -0.346473
+    a4 = 0.080443
+    a5 = -0.007131
+
+    DCota = Cota - 254
+    return np.where(Cota < 254.5, 0.0,
+                    a0 + (a1 * DCota) + (a2 * DCota ** 2) +
+                    (a3 * DCota ** 3) + (a4 * DCota ** 4) +
+                    (a5 * DCota ** 5))
+
+
+def Cot_MACHICURA_array(Volumen: np.ndarray) -> np.ndarray:
+    Volumen = np.asarray(Volumen, dtype=float)
+    return newton_array(Vol_MACHICURA_array, dVol_MACHICURA, Volumen,
+                        CotEST_MACHICURA(Volumen), 0.005, 11)
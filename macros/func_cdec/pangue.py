@@ -1,4 +1,5 @@
 from math import log
+import numpy as np
 
 
 def Vol_PANGUE(Cota):
@@ -28,3 +29,18 @@ def Rend_PANGUE2(Cotaa2, PotPang):
         cone * log(Cotaa2) ** 2 + conf * PotPang * log(Cotaa2) +\
         cong * PotPang ** 3 + conh * log(Cotaa2) ** 3 +\
         coni * PotPang * log(Cotaa2) ** 2 + conj * PotPang ** 2 * log(Cotaa2)
+
+
+def Vol_PANGUE_array(Cota: np.ndarray) -> np.ndarray:
+    Cota = np.asarray(Cota, dtype=float)
+    a0, a1, a2 = 7091.6, -32.43, 0.0366
+    return np.where(Cota < 493, 0.0,
+                    np.maximum(a0 + a1 * Cota + a2 * Cota ** 2, 0))
+
+
+def Cot_PANGUE_array(Volumen: np.ndarray) -> np.ndarray:
+    return Cot_PANGUE(np.asarray(Volumen, dtype=float))
+
+
+def Rend_PANGUE_array(Cotaa: np.ndarray) -> np.ndarray:
+    return Rend_PANGUE(np.asarray(Cotaa, dtype=float))
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def Vol_PEHUENCHE(Cota):
     a0, a1, a2 = 12532.0161, -42.383595, 0.0358801
     return a0 + a1 * Cota + a2 * Cota ** 2
@@ -17,3 +20,19 @@ def Rend_PEHUENCHE(Cota):
 def Pmax_PEHUENCHE(Cota):
     a1, a2, a3 = -591.332, -0.5003277, 0.0035378153
     return a1 + a2 * Cota + a3 * Cota ** 2
+
+
+def Vol_PEHUENCHE_array(Cota: np.ndarray) -> np.ndarray:
+    return Vol_PEHUENCHE(np.asarray(Cota, dtype=float))
+
+
+def Cot_PEHUENCHE_array(Volumen: np.ndarray) -> np.ndarray:
+    Volumen = np.asarray(Volumen, dtype=float)
+    a0, a1, a2 = 12532.0161, -42.383595, 0.0358801
+    with np.errstate(invalid='ignore'):
+        DVol = np.sqrt(a1 ** 2 - 4 * a2 * (a0 - Volumen))
+    return (-a1 + DVol) / (2 * a2)
+
+
+def Rend_PEHUENCHE_array(Cota: np.ndarray) -> np.ndarray:
+    return Rend_PEHUENCHE(np.asarray(Cota, dtype=float))
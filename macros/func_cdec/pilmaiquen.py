@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def Vol_PILMAIQUEN(Cota):
     a0, a1 = 102, 103.7
     if Cota <= a1:
@@ -10,3 +13,17 @@ def Cot_PILMAIQUEN(Volumen):
     a0, a1 = 102, 103.7
     result = Volumen / (11700 * 14148) * 1000000 + a0
     return min(max(result, a0), a1)
+
+
+def Vol_PILMAIQUEN_array(Cota: np.ndarray) -> np.ndarray:
+    Cota = np.asarray(Cota, dtype=float)
+    a0, a1 = 102, 103.7
+    return np.where(Cota <= a1, (Cota - a0) * 117 * 100 * 14148 / 1000000,
+                    (a1 - a0) * 117 * 100 * 14148 / 1000000)
+
+
+def Cot_PILMAIQUEN_array(Volumen: np.ndarray) -> np.ndarray:
+    Volumen = np.asarray(Volumen, dtype=float)
+    a0, a1 = 102, 103.7
+    result = Volumen / (11700 * 14148) * 1000000 + a0
+    return np.minimum(np.maximum(result, a0), a1)
@@ -1,3 +1,7 @@
+import numpy as np
+from macros.func_cdec.array_utils import newton_array
+
+
 def CotEST_POLCURA(Volumen):
     a0 = 730.02173
     a1 = 8.94574
@@ -48,3 +52,13 @@ def Cot_POLCURA(Volumen):
         if CondERR or CondITE:
             break
     return CotFin
+
+
+def Vol_POLCURA_array(Cota: np.ndarray) -> np.ndarray:
+    return Vol_POLCURA(np.asarray(Cota, dtype=float))
+
+
+def Cot_POLCURA_array(Volumen: np.ndarray) -> np.ndarray:
+    Volumen = np.asarray(Volumen, dtype=float)
+    return newton_array(Vol_POLCURA_array, dVol_POLCURA, Volumen,
+                        CotEST_POLCURA(Volumen), 0.005, 11)
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 Cotas = [598, 600, 610, 620, 630, 635, 636, 637, 638]
 Vol_Inf = [0, 0.02132, 0.43767, 4.90172, 15.43637, 22.730575, 24.318677,
@@ -62,3 +63,49 @@ def Rend_RALCO(Cota):
 def Pot_Max_Ralco(Cota):
     Pendln, Pendln2, Cte0 = 485900, -36736, -1605998
     return Pendln * math.log(Cota) + Pendln2 * (math.log(Cota))**2 + Cte0
+
+
+def Vol_RALCO_array(Cota: np.ndarray) -> np.ndarray:
+    Cota = np.asarray(Cota, dtype=float)
+    a0, a1, a2, a3 = -30351, 2789.6, -72.676, 0.9869
+    Cota_R = Cota - Cotas[0]
+    result = (a0 + a1 * Cota_R + a2 * Cota_R**2 + a3 * Cota_R**3) / 1000
+    low = Cota <= Cotas[-1]
+    if low.any():
+        cotas, vols = np.array(Cotas, dtype=float), np.array(Vol_Inf)
+        i = punteroA_array(cotas, Cota[low])
+        result[low] = ((vols[i] - vols[i - 1]) /
+                       (cotas[i] - cotas[i - 1])) * \
+            (Cota[low] - cotas[i]) + vols[i]
+    return result
+
+
+def Cot_RALCO_array(Volumen: np.ndarray) -> np.ndarray:
+    Volumen = np.asarray(Volumen, dtype=float)
+    Error, LimIter = 0.0001, 100
+    result = np.full(len(Volumen), 708.0)
+    high = ~(Volumen <= Vol_Inf[-1])
+    active = np.flatnonzero(high)
+    for _ in range(LimIter):
+        if len(active) == 0:
+            break
+        Cota_R = result[active]
+        Cota_A = Cota_R + (Volumen[active] - Vol_RALCO_array(Cota_R)) /\
+            dVol_dCot(Cota_R)
+        result[active] = Cota_A
+        active = active[np.abs(Cota_R - Cota_A) > Error]
+    low = ~high
+    if low.any():
+        cotas, vols = np.array(Cotas, dtype=float), np.array(Vol_Inf)
+        i = punteroA_array(vols, Volumen[low])
+        result[low] = ((cotas[i] - cotas[i - 1]) / (vols[i] - vols[i - 1])) *\
+            (Volumen[low] - vols[i]) + cotas[i]
+    return result
+
+
+def punteroA_array(Arreglo: np.ndarray, x: np.ndarray) -> np.ndarray:
+    return np.maximum(np.searchsorted(Arreglo, x, side='left'), 1)
+
+
+def Rend_RALCO_array(Cota: np.ndarray) -> np.ndarray:
+    return Rend_RALCO(np.asarray(Cota, dtype=float))
@@ -1,3 +1,5 @@
+import numpy as np
+from macros.func_cdec.array_utils import newton_array
 
 
 def CotEST_RAPEL(Volumen):
@@ -40,3 +42,20 @@ def Rend_RAPEL(Cota):
 def Pot_RAPEL(Cota, Caudal):
     eta = 0.873
     return (Cota - 26.5 - 0.00571 * Caudal) * Caudal * eta * (1 / 102)
+
+
+def Vol_RAPEL_array(Cota: np.ndarray) -> np.ndarray:
+    Cota = np.asarray(Cota, dtype=float)
+    a0, a1, a2, a3 = -36039.35, 1279.686867, -15.1802416, 0.060121028
+    result = a0 + (a1 * Cota) + (a2 * Cota ** 2) + (a3 * Cota ** 3)
+    return np.maximum(result, 65.3)
+
+
+def Cot_RAPEL_array(Volumen: np.ndarray) -> np.ndarray:
+    Volumen = np.asarray(Volumen, dtype=float)
+    return newton_array(Vol_RAPEL_array, dVol_RAPEL, Volumen,
+                        CotEST_RAPEL(Volumen), 0.005, 10)
+
+
+def Rend_RAPEL_array(Cota: np.ndarray) -> np.ndarray:
+    return Rend_RAPEL(np.asarray(Cota, dtype=float))
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def Vol_RUCATAYO(Cota):
     a0, a1 = 144, 148
     if Cota > a1:
@@ -11,3 +14,17 @@ def Cot_RUCATAYO(Volumen):
     if Cot_RUCATAYO > a1:
         Cot_RUCATAYO = a1
     return Cot_RUCATAYO
+
+
+def Vol_RUCATAYO_array(Cota: np.ndarray) -> np.ndarray:
+    Cota = np.asarray(Cota, dtype=float)
+    a0, a1 = 144, 148
+    Cota = np.where(Cota > a1, a1, Cota)
+    return ((Cota - a0) * 397552.5 + 4816560) / 1000000
+
+
+def Cot_RUCATAYO_array(Volumen: np.ndarray) -> np.ndarray:
+    Volumen = np.asarray(Volumen, dtype=float)
+    a0, a1 = 144, 148
+    result = (Volumen * 1000000 - 4816560) / 397552.5 + a0
+    return np.where(result > a1, a1, result)
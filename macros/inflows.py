@@ -13,11 +13,13 @@ from utils.utils import (timeit,
                          get_plp_plx_booleans,
                          check_is_path,
                          process_etapas_blocks,
-                         write_lines_appending,
-                         write_lines_from_scratch,
+                         DatWriter,
                          read_plexos_end_date)
 from utils.logger import add_file_handler, create_logger
-from utils.utils import translate_to_hydromonth
+from utils.workbook import read_iplp_sheet
+from utils.utils import MONTH_TO_HIDROMONTH
+from utils.dat_table import format_dat_tables
+import numpy as np
 import pandas as pd
 from dateutil.relativedelta import relativedelta
 
@@ -51,19 +53,19 @@ formatters_plpaflce = {
 
 
 def read_reduced_uncertainty_months(iplp_path: Path) -> int:
-    value = pd.read_excel(iplp_path,
-                          sheet_name="Path",
-                          usecols='A',
-                          skiprows=39
-                          ).iloc[0].values[0]
+    value = read_iplp_sheet(iplp_path,
+                            sheet_name="Path",
+                            usecols='A',
+                            skiprows=39
+                            ).iloc[0].values[0]
     return int(value)
 
 
 def read_inflow_data(iplp_path: Path) -> pd.Series:
-    df = pd.read_excel(iplp_path,
-                       sheet_name="Caudales_full",
-                       skiprows=4,
-                       usecols="A:AX")
+    df = read_iplp_sheet(iplp_path,
+                         sheet_name="Caudales_full",
+                         skiprows=4,
+                         usecols="A:AX")
     validate_inflow_data(df)
     # Get dict from hidroyear to hidrology and filter
     dict_hidroyears = read_dict_hidroyears(iplp_path)
@@ -94,9 +96,9 @@ def validate_inflow_data(df: pd.DataFrame):
 
 
 def read_configsim(iplp_path: Path) -> pd.DataFrame:
-    df = pd.read_excel(iplp_path,
-                       sheet_name="ConfigSim",
-                       usecols="A:U").set_index('Etapa')
+    df = read_iplp_sheet(iplp_path,
+                         sheet_name="ConfigSim",
+                         usecols="A:U").set_index('Etapa')
     validate_configsim(df)
     return df
 
@@ -114,9 +116,9 @@ def validate_configsim(df: pd.DataFrame):
 
 
 def read_days_per_week(iplp_path: Path) -> pd.DataFrame:
-    df = pd.read_excel(iplp_path,
-                       sheet_name="TimeData",
-                       usecols="A:D")
+    df = read_iplp_sheet(iplp_path,
+                         sheet_name="TimeData",
+                         usecols="A:D")
     validate_timedata_1(df)
     df.dropna(inplace=True)
     return df
@@ -130,9 +132,9 @@ def validate_timedata_1(df: pd.DataFrame):
 
 
 def read_dict_hidroyears(iplp_path: Path) -> dict:
-    df = pd.read_excel(iplp_path,
-                       sheet_name="TimeData",
-                       usecols="F:G")
+    df = read_iplp_sheet(iplp_path,
+                         sheet_name="TimeData",
+                         usecols="F:G")
     validate_timedata_2(df)
     df = df.dropna().astype(int).set_index('AÑO')
     return df.to_dict()['INDHID']
@@ -147,11 +149,24 @@ def validate_timedata_2(df: pd.DataFrame):
                          'columns')
 
 
-def get_week_name(row: pd.DataFrame,
-                  df_days_per_week: pd.DataFrame) -> pd.DataFrame:
-    mask1 = df_days_per_week['month'] == row['MONTH']
-    mask2 = df_days_per_week['day'] <= row['DAY']
-    return df_days_per_week[mask1 & mask2]['name'].values[-1]
+def get_week_names(df_daily: pd.DataFrame,
+                   df_days_per_week: pd.DataFrame) -> np.ndarray:
+    '''
+    Get name of the week of each day, which is the last week of its month
+    starting on or before that day
+    '''
+    df_weeks = df_days_per_week.sort_values(['month', 'day'], kind='stable')
+    week_keys = (df_weeks['month'].to_numpy(dtype=int) * 100 +
+                 df_weeks['day'].to_numpy(dtype=int))
+    day_keys = (df_daily['MONTH'].to_numpy() * 100 +
+                df_daily['DAY'].to_numpy())
+    idx = np.searchsorted(week_keys, day_keys, side='right') - 1
+    week_months = week_keys[np.clip(idx, 0, None)] // 100
+    missing = (idx < 0) | (week_months != df_daily['MONTH'].to_numpy())
+    if missing.any():
+        raise ValueError('TimeData sheet does not define a week for %s' %
+                         df_daily['DATE'][missing].iloc[0].date())
+    return df_weeks['name'].to_numpy()[idx]
 
 
 def get_df_daily(blo_eta: pd.DataFrame,
@@ -159,11 +174,10 @@ def get_df_daily(blo_eta: pd.DataFrame,
                  plexos_short: bool) -> pd.DataFrame:
     df_days_per_week = read_days_per_week(iplp_path)
     df_daily = get_daily_indexed_df(blo_eta, all_caps=True)
-    df_daily['WEEK_NAME'] = df_daily.apply(
-        lambda row: get_week_name(row, df_days_per_week), axis=1)
+    df_daily['WEEK_NAME'] = get_week_names(df_daily, df_days_per_week)
     year_ini = df_daily['YEAR'][0]
-    df_daily['ETAPA'] = df_daily.apply(
-        lambda row: (row['YEAR'] - year_ini) * 12 + row['MONTH'], axis=1)
+    df_daily['ETAPA'] = (df_daily['YEAR'] - year_ini) * 12 + \
+        df_daily['MONTH']
     # Filter by plexos_end_date
     if plexos_short:
         plexos_end_date = read_plexos_end_date(iplp_path)
@@ -171,136 +185,180 @@ def get_df_daily(blo_eta: pd.DataFrame,
     return df_daily
 
 
-def get_list_of_units(df_all_inflows: pd.DataFrame) -> list:
-    return df_all_inflows.index.get_level_values('CENTRAL').unique().tolist()
-
-
-def get_list_of_hyd(df_all_inflows: pd.DataFrame) -> list:
-    return df_all_inflows.index.get_level_values('INDHID').unique().tolist()
+class InflowCube:
+    '''
+    Daily inflows of all units and hydrologies
 
+    values is an array shaped (units, days, hydrologies), float64 by
+    default, indexed by the unit names in units, the dates in dates and
+    the hydrology indexes (INDHID) in hydrologies. Missing inflows are NaN
+    '''
 
-def get_df_all_inflows(iplp_path: Path,
-                       blo_eta: pd.DataFrame,
-                       plp_enable: bool,
-                       plx_enable: bool) -> pd.DataFrame:
+    def __init__(self, values: np.ndarray, units: list,
+                 dates: pd.DatetimeIndex, hydrologies: list):
+        self.values = values
+        self.units = list(units)
+        self.dates = pd.DatetimeIndex(dates)
+        self.hydrologies = list(hydrologies)
+
+    @classmethod
+    def from_weekly_inflows(cls, series_inflows: pd.Series,
+                            df_daily: pd.DataFrame,
+                            dtype=np.float64) -> 'InflowCube':
+        '''
+        Build cube from weekly inflows indexed by CENTRAL, INDHID and
+        WEEK_NAME, giving each day of df_daily the inflow of its week
+        '''
+        df_weekly = series_inflows.unstack('WEEK_NAME')
+        units = sorted(
+            df_weekly.index.get_level_values('CENTRAL').unique())
+        hydrologies = sorted(
+            df_weekly.index.get_level_values('INDHID').unique())
+        df_weekly = df_weekly.reindex(pd.MultiIndex.from_product(
+            [units, hydrologies], names=['CENTRAL', 'INDHID']))
+        # Last column is NaN, for days whose week has no inflows
+        weekly = np.hstack([df_weekly.to_numpy(dtype=np.float64),
+                            np.full((len(df_weekly), 1), np.nan)])
+        weeks = df_weekly.columns.get_indexer(df_daily['WEEK_NAME'])
+        daily = weekly[:, weeks].reshape(
+            len(units), len(hydrologies), len(weeks))
+        values = np.ascontiguousarray(daily.transpose(0, 2, 1), dtype=dtype)
+        return cls(values, units, df_daily['DATE'], hydrologies)
+
+    def select_days(self, mask: np.ndarray) -> 'InflowCube':
+        '''
+        Return cube with the days where mask is True
+        '''
+        return InflowCube(self.values[:, mask], self.units,
+                          self.dates[mask], self.hydrologies)
+
+    def shuffle(self, df_daily: pd.DataFrame,
+                df_configsim: pd.DataFrame) -> 'InflowCube':
+        '''
+        Return cube with the days of df_daily and the hydrologies of
+        ConfigSim, which define for each ETAPA the original hydrology
+        (INDHID) used by each shuffled hydrology
+        '''
+        day_pos = self.dates.get_indexer(df_daily['DATE'])
+        indhid = df_configsim.reindex(df_daily['ETAPA']).to_numpy()
+        hyd_pos = pd.Index(self.hydrologies).get_indexer(indhid.ravel())
+        hyd_pos = hyd_pos.reshape(indhid.shape)
+        values = self.values[:, day_pos[:, None], hyd_pos]
+        values[:, (day_pos[:, None] < 0) | (hyd_pos < 0)] = np.nan
+        return InflowCube(values, self.units, df_daily['DATE'],
+                          df_configsim.columns)
+
+    def monthly_means(self) -> tuple[pd.DataFrame, np.ndarray]:
+        '''
+        Return YEAR and MONTH of each month, and the mean inflows of each
+        month as an array shaped (units, months, hydrologies).
+        Missing inflows are skipped
+        '''
+        # One groupby over the days of all units and hydrologies, so sums
+        # match the per-unit groupby mean and ties round the same way
+        n_units, n_days, n_hyd = self.values.shape
+        keys = np.asarray(self.dates.year * 12 + self.dates.month - 1)
+        df = pd.DataFrame(
+            self.values.transpose(1, 0, 2).reshape(n_days, -1),
+            dtype=np.float64)
+        df_means = df.groupby(keys).mean()
+        means = df_means.to_numpy().reshape(len(df_means), n_units, n_hyd)
+        df_months = pd.DataFrame({'YEAR': df_means.index // 12,
+                                  'MONTH': df_means.index % 12 + 1})
+        return df_months, np.ascontiguousarray(means.transpose(1, 0, 2))
+
+    def get_calendar(self) -> pd.DataFrame:
+        return pd.DataFrame({'YEAR': self.dates.year,
+                             'MONTH': self.dates.month,
+                             'DAY': self.dates.day})
+
+    def to_frame(self) -> pd.DataFrame:
+        '''
+        Return inflows as a single-column dataframe indexed by CENTRAL,
+        YEAR, MONTH, DAY, DATE and INDHID
+        '''
+        index = pd.MultiIndex.from_product(
+            [self.units, self.dates, self.hydrologies],
+            names=['CENTRAL', 'DATE', 'INDHID'])
+        df = pd.DataFrame({'Inflows': self.values.ravel()}, index=index)
+        dates = df.index.get_level_values('DATE')
+        df['YEAR'] = dates.year
+        df['MONTH'] = dates.month
+        df['DAY'] = dates.day
+        df = df.set_index(['YEAR', 'MONTH', 'DAY'], append=True)
+        return df.reorder_levels(
+            ['CENTRAL', 'YEAR', 'MONTH', 'DAY', 'DATE', 'INDHID'])
+
+    def get_plexos_all(self) -> pd.DataFrame:
+        '''
+        Return inflows of all hydrologies as columns, one row per unit
+        and day, rounded to 2 decimals
+        '''
+        df = pd.concat([self.get_calendar()] * len(self.units),
+                       ignore_index=True)
+        df.insert(0, 'NAME', np.repeat(self.units, len(self.dates)))
+        df['PERIOD'] = 1
+        values = self.values.reshape(-1, len(self.hydrologies))
+        df_values = pd.DataFrame(values.astype(np.float64).round(2),
+                                 columns=self.hydrologies)
+        return pd.concat([df, df_values], axis=1)
+
+    def get_plexos_hydrology(self, indhid: int) -> pd.DataFrame:
+        '''
+        Return inflows of hydrology indhid, one row per unit and day,
+        rounded to 2 decimals
+        '''
+        df = pd.concat([self.get_calendar()] * len(self.units),
+                       ignore_index=True)
+        df.insert(0, 'NAME', np.repeat(self.units, len(self.dates)))
+        df.insert(1, 'BAND', 1)
+        df['PERIOD'] = 1
+        hyd = self.hydrologies.index(indhid)
+        df['VALUE'] = self.values[:, :, hyd].ravel().astype(
+            np.float64).round(2)
+        return df
+
+
+def get_inflow_cube(iplp_path: Path,
+                    blo_eta: pd.DataFrame,
+                    plp_enable: bool,
+                    plx_enable: bool) -> InflowCube:
     series_inflows = read_inflow_data(iplp_path)
     # Use short df_daily if running only plexos process
     plexos_short = (not plp_enable) & plx_enable
     df_daily = get_df_daily(blo_eta, iplp_path, plexos_short)
-    # Join dataframes using outer to keep all data
-    new_index = ['YEAR', 'MONTH', 'DAY', 'WEEK_NAME', 'DATE']
-    df_all_inflows = df_daily.set_index(new_index)
-    df_all_inflows = df_all_inflows.join(series_inflows, how='outer')
-    # Remove WEEK_NAME from index
-    df_all_inflows = df_all_inflows.reset_index().drop(
-        ['WEEK_NAME', 'ETAPA'], axis=1)
-    new_index = ['CENTRAL', 'YEAR', 'MONTH', 'DAY', 'DATE', 'INDHID']
-    df_all_inflows = df_all_inflows.set_index(new_index)
-    df_all_inflows = df_all_inflows.sort_index(
-        level=['CENTRAL', 'YEAR', 'MONTH', 'DAY'])
-    return df_all_inflows
-
-
-def print_plexos_inflows_all(df_all_inflows: pd.DataFrame,
-                             path_pib:  Path):
+    return InflowCube.from_weekly_inflows(series_inflows, df_daily)
+
 
-    # format plexos, aux dataframe to unstack and print
-    list_of_hyd = get_list_of_hyd(df_all_inflows)
-    df_all_inflows.loc[:, 'Inflows'] = df_all_inflows['Inflows'].apply(
-        lambda x: round(x, 2))
-    df_aux = df_all_inflows.squeeze().unstack('INDHID')
-    df_aux = df_aux.reset_index().drop('DATE', axis=1)
-    df_aux = df_aux.rename(columns={'CENTRAL': 'NAME'})
-    df_aux['PERIOD'] = 1
-    df_aux = df_aux[
-        ['NAME', 'YEAR', 'MONTH', 'DAY', 'PERIOD'] + list_of_hyd]
-    # print all data file
+def print_plexos_inflows_all(inflow_cube: InflowCube,
+                             path_pib:  Path):
+    # format plexos and print all data file
+    df_aux = inflow_cube.get_plexos_all()
     df_aux.to_csv(path_pib / 'Storage_NaturalInflow.csv', index=False)
 
 
-def print_plexos_inflows_separate(df_all_inflows: pd.DataFrame,
+def print_plexos_inflows_separate(inflow_cube: InflowCube,
                                   path_pib: Path):
     # Remove next comment to print all hydrologies
-    # list_of_hyd = get_list_of_hyd(df_all_inflows)
+    # list_of_hyd = inflow_cube.hydrologies
     list_of_hyd = [20]
     # Adjust to plexos data format
     for indhid in list_of_hyd:
-        hyd_mask = (df_all_inflows.index.get_level_values('INDHID') == indhid)
-        inflows_aux = df_all_inflows[hyd_mask]
-        # format
-        inflows_aux = inflows_aux.reset_index().drop('DATE', axis=1)
-        inflows_aux = inflows_aux.rename(
-            columns={'CENTRAL': 'NAME', 'Inflows': 'VALUE'})
-        inflows_aux['BAND'] = 1
-        inflows_aux['PERIOD'] = 1
-        inflows_aux = inflows_aux[
-            ['NAME', 'BAND', 'YEAR', 'MONTH', 'DAY', 'PERIOD', 'VALUE']]
-        inflows_aux.loc[:, 'VALUE'] = inflows_aux['VALUE'].apply(
-            lambda x: round(x, 2))
+        inflows_aux = inflow_cube.get_plexos_hydrology(indhid)
         # print
         inflows_aux.to_csv(
             path_pib / f'Storage_NaturalInflow_{indhid:02d}.csv', index=False)
 
 
-def get_shuffled_hydrologies(df_daily: pd.DataFrame,
-                             iplp_path: Path,
-                             df_configsim: pd.DataFrame) -> pd.DataFrame:
-    '''
-    Get shuffled hydrologies per day
-
-    Data from configsim refers to Etapas, so we need to turn it into
-    YEAR-MONTH-DAY data and get rid of Etapas
-    '''
-    df_configsim.index.names = ['ETAPA']
-    df_daily = df_daily.drop('WEEK_NAME', axis=1)
-    df_shuffled_hyd = df_daily.join(df_configsim, on='ETAPA')
-    df_shuffled_hyd = df_shuffled_hyd.drop('ETAPA', axis=1)
-    df_shuffled_hyd = df_shuffled_hyd.set_index(
-        ['YEAR', 'MONTH', 'DAY', 'DATE'])
-
-    # Stack and set new index and column names
-    df_shuffled_hyd = df_shuffled_hyd.stack()
-    df_shuffled_hyd.index.names = [
-        'YEAR', 'MONTH', 'DAY', 'DATE', 'SHUFFLED_HYD']
-    df_shuffled_hyd.name = 'INDHID'
-    df_shuffled_hyd = df_shuffled_hyd.reset_index()
-    return df_shuffled_hyd
-
-
 def shuffle_hidrologies(df_daily: pd.DataFrame,
                         iplp_path: Path,
                         df_configsim: pd.DataFrame,
-                        df_all_inflows: pd.DataFrame) -> pd.DataFrame:
+                        inflow_cube: InflowCube) -> InflowCube:
     '''
     Shuffle hydrologies according to ConfigSim
     '''
-    # Get stacked dataframe with mapping from original hydrology (INDHID) to
-    # new shuffled hydrology (SHUFFLED_HYD) for each day
-    df_shuffled_hyd = get_shuffled_hydrologies(
-        df_daily, iplp_path, df_configsim)
-
-    # Shuffling hydrologies
-    # For each unit, merge df_shuffled_hyd with inflows data coming from
-    # df_df_all_inflows
-    list_of_df = []
-    list_of_units = get_list_of_units(df_all_inflows)
-    for unit in list_of_units:
-        #  merge for each unit and build new dataframe
-        merge_cols = ['YEAR', 'MONTH', 'DAY', 'INDHID']
-        df_shuffled_aux = df_shuffled_hyd.merge(
-            df_all_inflows.loc[unit], how='left', on=merge_cols)
-        df_shuffled_aux['CENTRAL'] = unit
-        df_shuffled_aux = df_shuffled_aux.drop('INDHID', axis=1)
-        df_shuffled_aux = df_shuffled_aux.rename(
-            columns={'SHUFFLED_HYD': 'INDHID'})
-        list_of_df.append(df_shuffled_aux)
-
-    # Concatenate aux dataframes and reformat
-    df_final = pd.concat(list_of_df)
-    df_final = df_final.set_index(
-        ['CENTRAL', 'YEAR', 'MONTH', 'DAY', 'DATE', 'INDHID'])
-
-    return df_final
+    df_configsim.index.names = ['ETAPA']
+    return inflow_cube.shuffle(df_daily, df_configsim)
 
 
 def reduce_uncertainty(iplp_path: Path,
@@ -331,56 +389,55 @@ def reduce_uncertainty(iplp_path: Path,
     return df_ru
 
 
-def build_df_aux(df_all_inflows, unit, nblocks=12):
+def build_df_plpaflce(inflow_cube: InflowCube,
+                      nblocks: int = 12) -> pd.DataFrame:
     '''
-    Adjust df_all_inflows dataframe to print data in plp format
+    Get monthly mean inflows of all units in plp format: Month, BLOCK and
+    one column per hydrology, with the table of each unit stacked in the
+    order of inflow_cube.units
+
+    Tables start in January of the first year and have one month per
+    month of data, each block repeating the mean of the last month with
+    data up to that month
     '''
-    # Get monthly mean
-    cols_groupby = ['YEAR', 'MONTH', 'INDHID']
-    df_mean = df_all_inflows.loc[unit].groupby(cols_groupby).mean()
-
-    # format to square matrix
-    df_mean = df_mean.squeeze().unstack('INDHID')
-
-    # Add BLOCK index repeating Inflow values
-    # First calculate new index (mux)
-    nmonths = 12
-    mux = pd.MultiIndex.from_product(
-        [df_mean.index.get_level_values('YEAR').unique().tolist(),
-         range(1, nmonths + 1),
-         range(1, nblocks + 1),
-         ], names=['YEAR', 'MONTH', 'BLOCK'])
-    # Remove Year-Month entries after last date
-    matrix_length = len(df_mean) * nblocks
-    mux = mux[:matrix_length]
-
-    # Then add BLOCK index using reindex with forward fill
-    df_mean['BLOCK'] = 1
-    df_mean = df_mean.reset_index().set_index(
-        ['YEAR', 'MONTH', 'BLOCK'])
-    df_mean = df_mean.reindex(mux, method='ffill')
-    # Replace Block values by row number
-    df_mean = df_mean.reset_index()
-    df_mean['BLOCK'] = df_mean.index + 1
-    # Format, remove year and rename MONTH to use translate_to_hydromonth
-    df_mean = df_mean.rename(columns={'MONTH': 'Month'})
-    df_mean = df_mean.drop('YEAR', axis=1)
-    # update to hydromonths
-    df_mean = translate_to_hydromonth(df_mean)
-
-    # Column names as strings
-    df_mean.columns = df_mean.columns.map(str)
-
-    return df_mean
+    df_months, means = inflow_cube.monthly_means()
+    n_months = len(df_months)
+    # Months of the table and month of data used by each one
+    years = df_months['YEAR'].unique()
+    table_month_idx = np.arange(n_months)
+    table_years = years[table_month_idx // 12]
+    table_months = table_month_idx % 12 + 1
+    data_keys = df_months['YEAR'].to_numpy() * 12 + df_months['MONTH']
+    data_pos = np.searchsorted(data_keys, table_years * 12 + table_months,
+                               side='right') - 1
+    monthly = means[:, np.clip(data_pos, 0, None)]
+    monthly[:, data_pos < 0] = np.nan
+    # Expand to blocks and stack units
+    values = np.repeat(monthly, nblocks, axis=1)
+    n_units, n_rows, n_hyd = values.shape
+    df = pd.DataFrame(values.reshape(n_units * n_rows, n_hyd),
+                      columns=[str(hyd) for hyd in inflow_cube.hydrologies])
+    hydromonths = np.array([MONTH_TO_HIDROMONTH[month]
+                            for month in table_months], dtype=int)
+    df.insert(0, 'Month', np.tile(np.repeat(hydromonths, nblocks), n_units))
+    df.insert(1, 'BLOCK', np.tile(np.arange(1, n_rows + 1), n_units))
+    return df
 
 
 def write_plpaflce(path_inputs: Path,
-                   df_all_inflows: pd.DataFrame):
+                   inflow_cube: InflowCube):
     '''
     Write plpaflce.dat file
     '''
-    list_of_units = get_list_of_units(df_all_inflows)
-    list_of_hyd = get_list_of_hyd(df_all_inflows)
+    list_of_units = inflow_cube.units
+    list_of_hyd = inflow_cube.hydrologies
+
+    # Format tables of all units at once
+    df_plpaflce = build_df_plpaflce(inflow_cube)
+    n_rows = len(df_plpaflce) // len(list_of_units) if list_of_units else 0
+    if n_rows > 0:
+        tables = format_dat_tables(df_plpaflce, formatters_plpaflce,
+                                   len(list_of_units))
 
     lines = ['# Archivo de caudales por etapa']
     lines += ['# Nro. Cent. c/Caudales Estoc. (EstocNVar2) y Nro. Hidrologias'
@@ -388,37 +445,30 @@ def write_plpaflce(path_inputs: Path,
     lines += ['  %s                                         %s' % (
         len(list_of_units), len(list_of_hyd))]
 
-    # Write dat file from scratch
-    write_lines_from_scratch(lines, path_inputs / 'plpaflce.dat')
-
-    for unit in list_of_units:
-        # Build df_aux from both dataframes, for each line
-        df_aux = build_df_aux(df_all_inflows, unit)
-        # Print data
-        lines = ['\n# Nombre de la central']
-        lines += ["'%s'" % unit]
-        lines += ['#   Numero de bloques con caudales']
-        lines += ['  %03d' % len(df_aux)]
-        lines += ['# Mes   Bloque    Caudal']
-        if len(df_aux) > 0:
-            # Add data as string using predefined format
-            lines += [df_aux.to_string(
-                index=False, header=False, formatters=formatters_plpaflce)]
-        # Write data for current line
-        write_lines_appending(lines, path_inputs / 'plpaflce.dat')
-
-
-def filter_df_all_inflows(iplp_path: Path,
-                          df_all_inflows: pd.DataFrame):
+    with DatWriter(path_inputs / 'plpaflce.dat') as writer:
+        # Write dat file from scratch
+        writer.write_lines(lines)
+
+        for idx, unit in enumerate(list_of_units):
+            lines = ['\n# Nombre de la central']
+            lines += ["'%s'" % unit]
+            lines += ['#   Numero de bloques con caudales']
+            lines += ['  %03d' % n_rows]
+            lines += ['# Mes   Bloque    Caudal']
+            # Add data of current unit, already formatted
+            if n_rows > 0:
+                lines += [tables[idx]]
+            writer.write_lines(lines)
+
+
+def filter_inflow_cube(iplp_path: Path,
+                       inflow_cube: InflowCube) -> InflowCube:
     '''
-    Filter df for plx process
+    Filter inflows for plx process
     '''
     plexos_end_date = read_plexos_end_date(iplp_path)
-    year_mask = df_all_inflows.index.get_level_values('YEAR') <= \
-        plexos_end_date.year
-    df_all_inflows = df_all_inflows[year_mask]
-
-    return df_all_inflows
+    year_mask = inflow_cube.dates.year <= plexos_end_date.year
+    return inflow_cube.select_days(year_mask)
 
 
 @timeit
@@ -465,34 +515,33 @@ def main(plp_enable=None, plx_enable=None):
         logger.info('Processing block to etapas files')
         blo_eta, _, _ = process_etapas_blocks(path_dat)
 
-        logger.info('Getting dataframe with all data')
-        df_all_inflows = get_df_all_inflows(iplp_path, blo_eta,
-                                            plp_enable, plx_enable)
-        # df_all_inflows.to_csv(path_df / 'df_all_inflows.csv')
+        logger.info('Getting inflow cube with all data')
+        inflow_cube = get_inflow_cube(iplp_path, blo_eta,
+                                      plp_enable, plx_enable)
+        # inflow_cube.to_frame().to_csv(path_df / 'df_all_inflows.csv')
 
         if plp_enable:
             logger.info('Printing inflows in plp format')
-            write_plpaflce(path_inputs, df_all_inflows)
+            write_plpaflce(path_inputs, inflow_cube)
 
         if plx_enable:
             if plp_enable:
-                logger.info('Filtering inflows dataframe (PLP was enabled)')
-                # Otherwise, it was already filtered in get_df_all_inflows
-                df_all_inflows = filter_df_all_inflows(
-                    iplp_path, df_all_inflows)
+                logger.info('Filtering inflow cube (PLP was enabled)')
+                # Otherwise, it was already filtered in get_inflow_cube
+                inflow_cube = filter_inflow_cube(iplp_path, inflow_cube)
 
             logger.info('Shuffling inflows according to ConfigSim')
             df_configsim = read_configsim(iplp_path)
             # Make sure df_daily is the plexos short version
             df_daily = get_df_daily(blo_eta, iplp_path, plexos_short=True)
-            df_all_inflows = shuffle_hidrologies(
-                df_daily, iplp_path, df_configsim, df_all_inflows)
-            # df_all_inflows.to_csv(path_df / 'df_all_inflows_shuffled.csv',
-            #   index=False)
+            inflow_cube = shuffle_hidrologies(
+                df_daily, iplp_path, df_configsim, inflow_cube)
+            # inflow_cube.to_frame().to_csv(
+            #   path_df / 'df_all_inflows_shuffled.csv')
 
             logger.info('Printing inflows in plexos format')
-            print_plexos_inflows_all(df_all_inflows, path_pib)
-            print_plexos_inflows_separate(df_all_inflows, path_pib)
+            print_plexos_inflows_all(inflow_cube, path_pib)
+            print_plexos_inflows_separate(inflow_cube, path_pib)
 
     except Exception as e:
         logger.error(e, exc_info=True)
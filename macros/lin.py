@@ -9,6 +9,8 @@ from utils.utils import (timeit,
                          check_is_path,
                          write_lines_from_scratch)
 from utils.logger import add_file_handler, create_logger
+from utils.dat_table import format_dat_table
+from utils.workbook import read_iplp_sheet
 from pathlib import Path
 import pandas as pd
 import numpy as np
@@ -32,8 +34,8 @@ formatter_plpcnfli_full = {
 
 
 def read_losses(iplp_path: Path) -> tuple[str, str]:
-    df = pd.read_excel(iplp_path, sheet_name='Líneas', usecols='M',
-                       nrows=2, header=None, names=["Value"])
+    df = read_iplp_sheet(iplp_path, sheet_name='Líneas', usecols='M',
+                         nrows=2, header=None, names=["Value"])
     bool_losses_value = df.iloc[0]["Value"]
     bool_losses = 'T' if bool_losses_value else 'F'
     point_losses = df.iloc[1]["Value"]
@@ -50,8 +52,8 @@ def print_uni_plpcnfli(path_inputs: Path, iplp_path: Path):
 
 
 def read_df_lines(iplp_path: Path) -> pd.DataFrame:
-    df_lines = pd.read_excel(iplp_path, sheet_name='Líneas',
-                             usecols='B:O', skiprows=4)
+    df_lines = read_iplp_sheet(iplp_path, sheet_name='Líneas',
+                               usecols='B:O', skiprows=4)
     validate_lines(df_lines)
     # Filter out non-operative lines
     df_lines = df_lines[df_lines['Operativa']]
@@ -116,8 +118,7 @@ def print_plpcnfli(path_inputs: Path, iplp_path: Path, df_lines: pd.DataFrame):
     lines += ["# Nombre                                           "
               "FMaxA-B    FMaxB-A   BarraA   BarraB   Tension  R(Ohm)  X(ohm)"
               "   Mod.Perd.  Num.Tramos   Operativa    FlujoDC"]
-    lines += [df_lines.to_string(
-        index=False, header=False, formatters=formatter_plpcnfli_full)]
+    lines += [format_dat_table(df_lines, formatter_plpcnfli_full)]
     lines += ['']
     write_lines_from_scratch(lines, path_inputs / 'plpcnfli.dat')
 
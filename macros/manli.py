@@ -3,17 +3,22 @@
 Generate PLPMANLI.dat file with line availability data
 
 '''
-import sys
 from utils.utils import (timeit,
                          define_arg_parser,
                          get_iplp_input_path,
                          check_is_path,
                          process_etapas_blocks,
                          add_time_info,
-                         get_daily_indexed_df,
+                         get_daily_dates,
+                         get_integer_columns,
+                         aggregate_per_etapa,
+                         get_interval_dates,
+                         apply_intervals_daily,
                          write_lines_from_scratch,
-                         write_lines_appending)
+                         DatWriter)
 from utils.logger import add_file_handler, create_logger
+from utils.workbook import read_iplp_sheet
+import numpy as np
 import pandas as pd
 from openpyxl.utils.datetime import from_excel
 from pathlib import Path
@@ -35,8 +40,8 @@ def get_manli_input(iplp_path: Path) -> pd.DataFrame:
     '''
     Read inputs from MantLIN sheet
     '''
-    df_manli = pd.read_excel(iplp_path, sheet_name='MantLIN',
-                             usecols='B:G', skiprows=4)
+    df_manli = read_iplp_sheet(iplp_path, sheet_name='MantLIN',
+                               usecols='B:G', skiprows=4)
     validate_df_manli(df_manli)
     df_manli['INICIAL'] = df_manli['INICIAL'].apply(from_excel)
     df_manli['FINAL'] = df_manli['FINAL'].apply(from_excel)
@@ -88,24 +93,25 @@ def write_plpmanli(path_inputs: Path,
     lines += ['# Numero de lineas con matenimientos']
     lines += [' %s' % len(list_manli)]
 
-    # Write dat file from scratch
-    write_lines_from_scratch(lines, path_inputs / 'plpmanli.dat')
-
-    for line in list_manli:
-        # Build df_aux from both dataframes, for each line
-        df_aux = build_df_aux(df_capmax_ab, df_capmax_ba, line)
-        # Print data
-        lines = ['\n# Nombre de la lineas']
-        lines += ["'%s'" % line]
-        lines += ['# Numero de Bloques con mantenimiento']
-        lines += ['  %03d' % len(df_aux)]
-        lines += ['# Bloque         PotMaxAB   PotMaxBA     Operativa']
-        if len(df_aux) > 0:
-            # Add data as string using predefined format
-            lines += [df_aux.to_string(
-                index=False, header=False, formatters=formatters_plpmanli)]
-        # Write data for current line
-        write_lines_appending(lines, path_inputs / 'plpmanli.dat')
+    with DatWriter(path_inputs / 'plpmanli.dat') as writer:
+        # Write dat file from scratch
+        writer.write_lines(lines)
+
+        for line in list_manli:
+            # Build df_aux from both dataframes, for each line
+            df_aux = build_df_aux(df_capmax_ab, df_capmax_ba, line)
+            # Print data
+            lines = ['\n# Nombre de la lineas']
+            lines += ["'%s'" % line]
+            lines += ['# Numero de Bloques con mantenimiento']
+            lines += ['  %03d' % len(df_aux)]
+            lines += ['# Bloque         PotMaxAB   PotMaxBA     Operativa']
+            # Write data for current line
+            if len(df_aux) > 0:
+                # Add data as string using predefined format
+                writer.write_df(lines, df_aux, formatters_plpmanli)
+            else:
+                writer.write_lines(lines)
 
 
 def write_uni_plpmanli(path_inputs: Path):
@@ -152,23 +158,31 @@ def get_nominal_values_dict(df_lineas: pd.DataFrame,
     return centrales_dict[lines_value_col]
 
 
-def build_df_nominal(blo_eta: pd.DataFrame, line_names: list,
-                     df_lineas: pd.DataFrame,
-                     lines_value_col: str) -> pd.DataFrame:
+def build_nominal_array(dates: pd.DatetimeIndex, line_names: list,
+                        df_lineas: pd.DataFrame,
+                        lines_value_col: str) -> tuple[list, np.ndarray]:
     '''
-    Build matrix with all nominal values for each line in line_names
+    Build day x line matrix with nominal values for each line in line_names
     '''
     # Get nominal value dictionaries
     nominal_values_dict = get_nominal_values_dict(df_lineas, lines_value_col)
-    # Get base dataframes
-    df_nominal = get_daily_indexed_df(blo_eta)
-    # Add empty columns
-    df_nominal = df_nominal.reindex(
-        columns=df_nominal.columns.tolist() + line_names)
-    # Add default values
-    df_nominal[line_names] = [
-        nominal_values_dict[line] for line in line_names]
-    return df_nominal
+    nominal_values = [nominal_values_dict[line] for line in line_names]
+    nominal = np.array(nominal_values, dtype=float)
+    return nominal_values, np.tile(nominal, (len(dates), 1))
+
+
+def add_manli_data_to_array(matrix: np.ndarray, dates: pd.DatetimeIndex,
+                            line_names: list, df_manli: pd.DataFrame,
+                            id_col: str, manli_col: str) -> np.ndarray:
+    '''
+    Add df_manli data in row-by-row order to day x line matrix
+    Note that filters have a daily resolution
+    '''
+    dates_ini, dates_end = get_interval_dates(df_manli)
+    return apply_intervals_daily(
+        dates.to_numpy(), line_names, df_manli[id_col].to_numpy(),
+        dates_ini.to_numpy(), dates_end.to_numpy(),
+        df_manli[manli_col].to_numpy(), base=matrix)
 
 
 def add_manli_data_row_by_row(df_nominal: pd.DataFrame,
@@ -180,58 +194,45 @@ def add_manli_data_row_by_row(df_nominal: pd.DataFrame,
     Note that filters have a daily resolution
     '''
     df = df_nominal.copy()
-    manli_dates_ini = pd.to_datetime(
-        df_manli[['YearIni', 'MonthIni', 'DayIni']].rename(columns={
-            'YearIni': 'year', 'MonthIni': 'month', 'DayIni': 'day'}))
-    manli_dates_end = pd.to_datetime(
-        df_manli[['YearEnd', 'MonthEnd', 'DayEnd']].rename(columns={
-            'YearEnd': 'year', 'MonthEnd': 'month', 'DayEnd': 'day'}))
-    for i in range(len(manli_dates_ini)):
-        name = df_manli.iloc[i][id_col]
-        if name in df.columns:
-            manli_mask_ini = manli_dates_ini.iloc[i] <= df['Date']
-            manli_mask_end = manli_dates_end.iloc[i] >= df['Date']
-            df.loc[manli_mask_ini & manli_mask_end, name] = \
-                df_manli.iloc[i][manli_col]
+    names = [name for name in df_manli[id_col].unique()
+             if name in df.columns]
+    if len(names) == 0:
+        return df
+    dates_ini, dates_end = get_interval_dates(df_manli)
+    matrix = apply_intervals_daily(
+        df['Date'].to_numpy(), names, df_manli[id_col].to_numpy(),
+        dates_ini.to_numpy(), dates_end.to_numpy(),
+        df_manli[manli_col].to_numpy(), base=df[names].to_numpy())
+    for idx, name in enumerate(names):
+        values = matrix[:, idx]
+        # Keep integer columns if no decimals were added
+        if pd.api.types.is_integer_dtype(df[name]) and \
+                np.isfinite(values).all() and \
+                (values == np.round(values)).all():
+            values = values.astype(df[name].dtype)
+        df[name] = values
     return df
 
 
-def apply_func_per_etapa(blo_eta: pd.DataFrame, df: pd.DataFrame,
-                         func: str = 'mean') -> pd.DataFrame:
-    '''
-    Apply func per Etapa and drop day column
-    '''
-    on_cols = ['Month', 'Year']
-    groupby_cols = ['Etapa', 'Year', 'Month', 'Block', 'Block_Len']
-    if func == 'mean':
-        df_final = pd.merge(
-            blo_eta, df, how='left', on=on_cols).groupby(
-            groupby_cols).mean(numeric_only=True)
-    elif func == 'last':
-        df_final = pd.merge(
-            blo_eta, df, how='left', on=on_cols).groupby(
-            groupby_cols).last(numeric_only=True)
-    else:
-        sys.exit('Invalid function: %s' % func)
-    return df_final.drop(['Day'], axis=1)
-
-
 def get_manli_output(blo_eta: pd.DataFrame, df_manli: pd.DataFrame,
                      df_lines: pd.DataFrame,
                      id_col: str = 'LÍNEA',
                      manli_col: str = 'A-B',
                      lines_value_col: str = 'A->B',
                      func: str = 'mean') -> pd.DataFrame:
-    # 1. Build default dataframes
+    # 1. Build default matrix, one row per day and one column per line
+    dates = get_daily_dates(blo_eta)
     line_names = df_manli[id_col].unique().tolist()
-    df_nominal = build_df_nominal(blo_eta, line_names, df_lines,
-                                  lines_value_col)
+    nominal_values, matrix = build_nominal_array(
+        dates, line_names, df_lines, lines_value_col)
     # 2. Add df_manli data in row-by-row order
     # Note that filters have a daily resolution
-    df_nominal_modified = add_manli_data_row_by_row(
-        df_nominal, df_manli, id_col, manli_col)
-    # 3. Apply func per Etapa abd drop day column
-    return apply_func_per_etapa(blo_eta, df_nominal_modified, func)
+    matrix = add_manli_data_to_array(
+        matrix, dates, line_names, df_manli, id_col, manli_col)
+    # 3. Apply func per Etapa
+    int_columns = get_integer_columns(nominal_values, matrix)
+    return aggregate_per_etapa(blo_eta, dates, matrix, line_names, func,
+                               int_columns=int_columns)
 
 
 def get_df_manli(iplp_path: Path, df_lines: pd.DataFrame) -> pd.DataFrame:
@@ -8,16 +8,19 @@ from utils.utils import (timeit,
                          check_is_path,
                          process_etapas_blocks,
                          add_time_info,
+                         get_daily_dates,
+                         get_integer_columns,
+                         aggregate_per_etapa,
                          write_lines_from_scratch)
 from utils.logger import add_file_handler, create_logger
+from utils.workbook import read_iplp_sheet
 import pandas as pd
 from pathlib import Path
 from openpyxl.utils.datetime import from_excel
 from macros.lin import read_df_lines
 from macros.manli import (get_df_manli,
-                          build_df_nominal,
-                          add_manli_data_row_by_row,
-                          apply_func_per_etapa,
+                          build_nominal_array,
+                          add_manli_data_to_array,
                           get_nominal_values_dict)
 
 
@@ -41,8 +44,8 @@ def get_manlix_input(iplp_path: Path) -> pd.DataFrame:
     '''
     Read inputs from MantLINX sheet
     '''
-    df_manlix = pd.read_excel(iplp_path, sheet_name='MantLINX',
-                              usecols='B:J', skiprows=4)
+    df_manlix = read_iplp_sheet(iplp_path, sheet_name='MantLINX',
+                                usecols='B:J', skiprows=4)
     validate_manlix(df_manlix)
     df_manlix['INICIAL'] = df_manlix['INICIAL'].apply(from_excel)
     df_manlix['FINAL'] = df_manlix['FINAL'].apply(from_excel)
@@ -231,25 +234,26 @@ def get_manlix_output(blo_eta: pd.DataFrame,
                       lines_value_col: str = 'A->B',
                       func: str = 'mean') -> pd.DataFrame:
     # 1. Get nominal data for all lines in manlix
+    dates = get_daily_dates(blo_eta)
     line_names = df_manlix[id_col].unique().tolist()
-    df_nominal = build_df_nominal(
-            blo_eta, line_names, df_lines, lines_value_col)
+    nominal_values, matrix = build_nominal_array(
+        dates, line_names, df_lines, lines_value_col)
+    int_columns = get_integer_columns(nominal_values, matrix)
     if manli_col == 'A-B' or manli_col == 'B-A':
         # 2. If dealing with Max Capacity,
-        # Add df_manli and manlix data in row-by-row order
-        df_nominal_mod1 = add_manli_data_row_by_row(
-            df_nominal, df_manli, id_col, manli_col)
-        df_nominal_mod2 = add_manli_data_row_by_row(
-            df_nominal_mod1, df_manlix, id_col, manli_col)
-        # 3. Apply func per Etapa and drop day column
-        return apply_func_per_etapa(blo_eta, df_nominal_mod2, func)
-    else:
-        # 2. If dealing with Voltage or other
-        # Add only manlix data in row-by-row order
-        df_nominal_mod = add_manli_data_row_by_row(
-            df_nominal, df_manlix, id_col, manli_col)
-        # 3. Apply func per Etapa and drop day column
-        return apply_func_per_etapa(blo_eta, df_nominal_mod, func)
+        # Add df_manli data in row-by-row order before manlix data
+        matrix = add_manli_data_to_array(
+            matrix, dates, line_names, df_manli, id_col, manli_col)
+        int_columns = [idx for idx in int_columns if idx in
+                       get_integer_columns(nominal_values, matrix)]
+    # 3. Add manlix data in row-by-row order
+    matrix = add_manli_data_to_array(
+        matrix, dates, line_names, df_manlix, id_col, manli_col)
+    int_columns = [idx for idx in int_columns if idx in
+                   get_integer_columns(nominal_values, matrix)]
+    # 4. Apply func per Etapa
+    return aggregate_per_etapa(blo_eta, dates, matrix, line_names, func,
+                               int_columns=int_columns)
 
 
 def get_dict_centrales_trf(iplp_path: Path) -> pd.DataFrame:
@@ -260,8 +264,8 @@ def get_dict_centrales_trf(iplp_path: Path) -> pd.DataFrame:
     Identify transformers with 'Trf_' prefix in field Barras,
     and identify gas units with prefix 'Gas-' in field Fuel
     '''
-    df = pd.read_excel(iplp_path, sheet_name="Centrales",
-                       skiprows=4, usecols="B,C,AP,BG")
+    df = read_iplp_sheet(iplp_path, sheet_name="Centrales",
+                         skiprows=4, usecols="B,C,AP,BG")
     validate_trf_centrales(df)
     # Filter out if X
     df = df[df['Tipo de Central'] != 'X']
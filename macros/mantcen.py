@@ -4,6 +4,7 @@ Module to generate 'plpmance_ini.dat', which will be used later
 to add the renewable energy profiles and generate the definitive
 plpmance.dat file
 '''
+import numpy as np
 import pandas as pd
 import sys
 from openpyxl.utils.datetime import from_excel
@@ -13,14 +14,18 @@ from utils.utils import (define_arg_parser,
                          get_iplp_input_path,
                          check_is_path,
                          process_etapas_blocks,
-                         write_lines_from_scratch,
-                         write_lines_appending,
+                         DatWriter,
                          translate_to_hydromonth,
-                         get_daily_indexed_df,
+                         get_daily_dates,
+                         aggregate_per_etapa,
+                         get_interval_dates,
+                         apply_intervals_daily,
                          timeit,
                          add_time_info
                          )
 from utils.logger import add_file_handler, create_logger
+from utils.workbook import read_iplp_sheet
+from utils.dat_table import format_dat_table
 
 POWER_CHANGE_TOLERANCE = 0.01
 
@@ -43,8 +48,8 @@ formatters_plpmance = {
 
 
 def get_centrales(iplp_path: Path, plx: bool = False) -> pd.DataFrame:
-    df = pd.read_excel(iplp_path, sheet_name="Centrales",
-                       skiprows=4, usecols="B,C,AA,AB,DK").dropna(how='all')
+    df = read_iplp_sheet(iplp_path, sheet_name="Centrales",
+                         skiprows=4, usecols="B,C,AA,AB,DK").dropna(how='all')
     validate_centrales(df)
     # Filter out if X
     df = df[df['Tipo de Central'] != 'X']
@@ -73,8 +78,8 @@ def validate_centrales(df: pd.DataFrame):
 
 
 def get_mantcen_input(iplp_path: Path) -> pd.DataFrame:
-    df = pd.read_excel(iplp_path, sheet_name="MantCEN",
-                       skiprows=4, usecols="A:F").dropna(how='any')
+    df = read_iplp_sheet(iplp_path, sheet_name="MantCEN",
+                         skiprows=4, usecols="A:F").dropna(how='any')
     validate_mantcen_ini(df)
     df = df.rename(
         columns={
@@ -141,7 +146,7 @@ def shape_extra_mant_no_gas(df: pd.DataFrame,
 
 def read_extra_mant_no_ciclicos(iplp_path: Path) -> pd.DataFrame:
     # No ciclicos
-    df_no_ciclicos = pd.read_excel(
+    df_no_ciclicos = read_iplp_sheet(
         iplp_path, sheet_name="MantenimientosIM",
         skiprows=1, usecols="B:D,F").dropna(how='any')
     validate__mant_no_ciclicos(df_no_ciclicos)
@@ -181,7 +186,7 @@ def validate__mant_no_ciclicos(df: pd.DataFrame):
 def read_extra_mant_ciclicos(iplp_path: Path,
                              blo_eta: pd.DataFrame) -> pd.DataFrame:
     # Ciclicos
-    df_ciclicos = pd.read_excel(
+    df_ciclicos = read_iplp_sheet(
         iplp_path, sheet_name="MantenimientosIM",
         skiprows=1, usecols="I:K,M").dropna(how='any')
     validate_mant_ciclicos(df_ciclicos)
@@ -292,72 +297,51 @@ def get_pmin_pmax_dict(df_centrales: pd.DataFrame) -> tuple[dict, dict]:
     return centrales_dict['Pmin'], centrales_dict['Pmax']
 
 
-def build_df_pmin_pmax(blo_eta: pd.DataFrame, df_mantcen: pd.DataFrame,
-                       df_centrales: pd.DataFrame) -> \
-                       tuple[pd.DataFrame, pd.DataFrame]:
+def build_pmin_pmax_arrays(dates: pd.DatetimeIndex, unit_names: list,
+                           df_centrales: pd.DataFrame) -> \
+                           tuple[np.ndarray, np.ndarray]:
     '''
-    Build matrix with all pmin/pmax info in mantcen sheet
+    Build day x unit matrices with default pmin/pmax values
     '''
-    # Get  unit names
-    mantcen_unit_names = df_mantcen['Nombre'].unique().tolist()
     # Get pmin/pmax dictionaries
     pmin_dict, pmax_dict = get_pmin_pmax_dict(df_centrales)
-    # Get base dataframes
-    df_pmin = get_daily_indexed_df(blo_eta)
-    # Add empty columns
-    df_pmin = df_pmin.reindex(
-        columns=df_pmin.columns.tolist() + mantcen_unit_names)
-    # Create df_pmax as copy of empty df_pmin
-    df_pmax = df_pmin.copy()
-    # Add default values
-    df_pmin[mantcen_unit_names] = [
-        pmin_dict[unit] for unit in mantcen_unit_names]
-    df_pmax[mantcen_unit_names] = [
-        pmax_dict[unit] for unit in mantcen_unit_names]
-    return df_pmin, df_pmax
+    pmin = np.array([pmin_dict[unit] for unit in unit_names], dtype=float)
+    pmax = np.array([pmax_dict[unit] for unit in unit_names], dtype=float)
+    return np.tile(pmin, (len(dates), 1)), np.tile(pmax, (len(dates), 1))
 
 
 def get_mantcen_output(blo_eta: pd.DataFrame, df_mantcen: pd.DataFrame,
                        df_centrales: pd.DataFrame,
                        plp_or_plexos: str = 'PLP') -> \
                        tuple[pd.DataFrame, pd.DataFrame]:
-    # 1. Build default dataframes
-    df_pmin, df_pmax = build_df_pmin_pmax(blo_eta, df_mantcen, df_centrales)
+    # 1. Build default matrices, one row per day and one column per unit
+    dates = get_daily_dates(blo_eta)
+    unit_names = df_mantcen['Nombre'].unique().tolist()
+    pmin, pmax = build_pmin_pmax_arrays(dates, unit_names, df_centrales)
     # 2. Add df_mantcen data in row-by-row order
-    # Note that filters have a daily resolution
-    mantcen_dates_ini = pd.to_datetime(
-        df_mantcen[['YearIni', 'MonthIni', 'DayIni']].rename(columns={
-            'YearIni': 'year', 'MonthIni': 'month', 'DayIni': 'day'}))
-    mantcen_dates_end = pd.to_datetime(
-        df_mantcen[['YearEnd', 'MonthEnd', 'DayEnd']].rename(columns={
-            'YearEnd': 'year', 'MonthEnd': 'month', 'DayEnd': 'day'}))
-    for i in range(len(mantcen_dates_ini)):
-        pmax_mask_ini = mantcen_dates_ini.iloc[i] <= df_pmax['Date']
-        pmax_mask_end = mantcen_dates_end.iloc[i] >= df_pmax['Date']
-        pmin_mask_ini = mantcen_dates_ini.iloc[i] <= df_pmin['Date']
-        pmin_mask_end = mantcen_dates_end.iloc[i] >= df_pmin['Date']
-        df_pmax.loc[pmax_mask_ini & pmax_mask_end,
-                    df_mantcen.iloc[i]['Nombre']] = df_mantcen.iloc[i]['Pmax']
-        df_pmin.loc[pmin_mask_ini & pmin_mask_end,
-                    df_mantcen.iloc[i]['Nombre']] = df_mantcen.iloc[i]['Pmin']
+    # Note that filters have a daily resolution, and later rows overwrite
+    # earlier rows on overlapping days
+    dates_ini, dates_end = get_interval_dates(df_mantcen)
+    pmax = apply_intervals_daily(
+        dates.to_numpy(), unit_names, df_mantcen['Nombre'].to_numpy(),
+        dates_ini.to_numpy(), dates_end.to_numpy(),
+        df_mantcen['Pmax'].to_numpy(), base=pmax)
+    pmin = apply_intervals_daily(
+        dates.to_numpy(), unit_names, df_mantcen['Nombre'].to_numpy(),
+        dates_ini.to_numpy(), dates_end.to_numpy(),
+        df_mantcen['Pmin'].to_numpy(), base=pmin)
     if plp_or_plexos == 'PLP':
-        # 3. Average per Etapa and drop Day column
-        on_cols = ['Month', 'Year']
-        groupby_cols = ['Etapa', 'Year', 'Month', 'Block', 'Block_Len']
-        df_pmax_plp = pd.merge(blo_eta, df_pmax, how='left', on=on_cols)\
-            .groupby(groupby_cols)\
-            .mean(numeric_only=True)\
-            .drop(['Day'], axis=1)
-        df_pmin_plp = pd.merge(blo_eta, df_pmin, how='left', on=on_cols)\
-            .groupby(groupby_cols)\
-            .mean(numeric_only=True)\
-            .drop(['Day'], axis=1)
+        # 3. Average per Etapa
+        df_pmin_plp = aggregate_per_etapa(blo_eta, dates, pmin, unit_names)
+        df_pmax_plp = aggregate_per_etapa(blo_eta, dates, pmax, unit_names)
         return df_pmin_plp, df_pmax_plp
     elif plp_or_plexos == 'PLEXOS':
         # 3. Get daily output for plexos
-        groupby_cols = ['Year', 'Month', 'Day']
-        df_pmax_plexos = df_pmax.groupby(groupby_cols).mean(numeric_only=True)
-        df_pmin_plexos = df_pmin.groupby(groupby_cols).mean(numeric_only=True)
+        index = pd.MultiIndex.from_arrays(
+            [dates.year, dates.month, dates.day],
+            names=['Year', 'Month', 'Day'])
+        df_pmax_plexos = pd.DataFrame(pmax, index=index, columns=unit_names)
+        df_pmin_plexos = pd.DataFrame(pmin, index=index, columns=unit_names)
         return df_pmin_plexos, df_pmax_plexos
     else:
         sys.exit('plp_or_plexos must be either PLP or PLEXOS')
@@ -402,8 +386,7 @@ def get_mantcen_data(list_mantcen: list,
             lines += ['  %04d                 01' % len(df_aux)]
             lines += ['#   Mes    Bloque  NIntPot   PotMin   PotMax']
             # Add data as string using predefined format
-            lines += [df_aux.to_string(
-                index=False, header=False, formatters=formatters_plpmance)]
+            lines += [format_dat_table(df_aux, formatters_plpmance)]
     return lines, number_of_units
 
 
@@ -451,10 +434,11 @@ def write_plpmance_ini_dat(df_centrales: pd.DataFrame,
         list_mantcen, df_pmin, df_pmax, pmin_dict, pmax_dict)
     lines_header = get_header_data(number_of_units)
 
-    # Write dat file from scratch
-    write_lines_from_scratch(lines_header, plpmance_path)
-    # Write data for all units
-    write_lines_appending(lines_units, plpmance_path)
+    with DatWriter(plpmance_path) as writer:
+        # Write dat file from scratch
+        writer.write_lines(lines_header)
+        # Write data for all units
+        writer.write_lines(lines_units)
 
 
 def write_plexos(df_pmin_plexos: pd.DataFrame,
@@ -8,6 +8,7 @@ from utils.utils import (timeit,
                          get_iplp_input_path,
                          check_is_path, write_lines_from_scratch)
 from utils.logger import add_file_handler, create_logger
+from utils.workbook import read_iplp_sheet
 import pandas as pd
 from pathlib import Path
 
@@ -19,8 +20,8 @@ def read_num_iter(iplp_path: pd.DataFrame) -> int:
     '''
     Read number of iterations from sheet Path, D10
     '''
-    df = pd.read_excel(iplp_path, sheet_name="Path",
-                       usecols="D", index_col=None, header=8, nrows=1)
+    df = read_iplp_sheet(iplp_path, sheet_name="Path",
+                         usecols="D", index_col=None, header=8, nrows=1)
     return df.iloc[0, 0]
 
 
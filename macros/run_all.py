@@ -1,8 +1,11 @@
 from pathlib import Path
-from interface.commands import plp_commands, plexos_commands
-from interface.macros_runner import execute_commands
+from interface.commands import plp_commands, plexos_commands, macro_io
+from interface.macros_runner import (execute_commands,
+                                     execute_in_process,
+                                     execute_dag)
 from utils.check_errors import check_errors
 from utils.logger import create_logger, add_file_handler
+from utils.manifest import BuildManifest
 from utils.utils import (check_is_path, timeit,
                          define_arg_parser,
                          get_iplp_input_path)
@@ -12,7 +15,16 @@ logger = create_logger('run_all')
 
 # Functions to interact with remote server
 @timeit
-def generate_inputs(file_path: Path, commands: list):
+def generate_inputs(file_path: Path, commands: list, mode: str = 'dag',
+                    incremental: bool = False):
+    '''
+    Run commands, with mode:
+    - dag: as a dependency graph on a process pool
+    - serial: one after another in the current process
+    - subprocess: one Python process per command
+
+    If incremental, dag mode skips commands whose inputs did not change
+    '''
     # Check if file_path is valid file
     if (not file_path.exists()) or (
             not file_path.is_file()):
@@ -36,9 +48,22 @@ def generate_inputs(file_path: Path, commands: list):
             f'{commands[i]["command"]} -f  "{file_path}"')
         for i, _ in enumerate(commands)
         }
+    calls_dict = {
+        commands[i]['description']: commands[i]['calls']
+        for i, _ in enumerate(commands)
+        }
     if any(bool_dict.values()):
         logger.info("Inputs running.")
-        execute_commands(bool_dict, parallel_dict, command_dict, logger)
+        if mode == 'dag':
+            calls = [call for calls in calls_dict.values() for call in calls]
+            manifest = BuildManifest(file_path) if incremental else None
+            execute_dag(calls, macro_io, file_path, logger,
+                        manifest=manifest)
+        elif mode == 'serial':
+            execute_in_process(bool_dict, parallel_dict, calls_dict,
+                               file_path, logger)
+        else:
+            execute_commands(bool_dict, parallel_dict, command_dict, logger)
     else:
         logger.warning(("No inputs selected."))
     logger.info("Inputs generated. Please validate files.")
@@ -53,18 +78,42 @@ def main():
         # Get input file path
         logger.info('Getting input file path')
         parser = define_arg_parser()
+        parser.add_argument('--serial', dest='serial',
+                            help='Run steps one after another in process',
+                            action="store_true")
+        parser.add_argument('--subprocess', dest='subprocess',
+                            help='Run each step in a new Python process',
+                            action="store_true")
+        parser.add_argument('--incremental', dest='incremental',
+                            help='Only run steps whose inputs changed',
+                            action="store_true")
         iplp_path = get_iplp_input_path(parser)
+        args = parser.parse_args()
+        if args.subprocess:
+            mode = 'subprocess'
+        elif args.serial:
+            mode = 'serial'
+        else:
+            mode = 'dag'
+        if args.incremental and mode != 'dag':
+            logger.warning('--incremental is only used when running steps'
+                           ' as a dependency graph, running all steps')
 
         # Add destination folder to logger
         path_log = iplp_path.parent / "Temp" / "log"
         check_is_path(path_log)
         add_file_handler(logger, 'run_all', path_log)
 
-        # Generate plp inputs
-        generate_inputs(iplp_path, plp_commands)
+        if mode == 'dag':
+            # Plexos steps wait only for the plp steps they depend on
+            generate_inputs(iplp_path, plp_commands + plexos_commands, mode,
+                            args.incremental)
+        else:
+            # Generate plp inputs
+            generate_inputs(iplp_path, plp_commands, mode)
 
-        # Wait until plp inputs are done and run plexos
-        generate_inputs(iplp_path, plexos_commands)
+            # Wait until plp inputs are done and run plexos
+            generate_inputs(iplp_path, plexos_commands, mode)
 
         # Check errors - compile log files into csv file
         check_errors(path_log)
@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+from macros.func_cdec.dams import (DAM_FUNCTIONS,
+                                   COT_TABLE_RANGES,
+                                   get_dam_function,
+                                   get_dam_functions,
+                                   evaluate_dam_function)
+from macros.func_cdec.cot_table import TABLE_MAX_ERROR
+
+
+# Elevation and volume ranges used to compare array and scalar versions
+RANGES = {
+    'ANGOSTURA': ((260, 330), (0, 150)),
+    'CANUTILLAR': ((220, 250), (0, 1500)),
+    'CIPRESES': ((1270, 1320), (-5, 200)),
+    'COLBUN': ((380, 440), (300, 1600)),
+    'ELTORO': ((1300, 1375), (-10, 5900)),
+    'LMAULE': ((2152, 2181), (0, 1500)),
+    'MACHICURA': ((254, 260), (0, 20)),
+    'PANGUE': ((480, 510), (0, 100)),
+    'PEHUENCHE': ((2200, 2300), (200, 500)),
+    'PILMAIQUEN': ((100, 106), (0, 40)),
+    'POLCURA': ((730, 735), (0, 1)),
+    'RALCO': ((590, 730), (0, 1300)),
+    'RAPEL': ((95, 106), (100, 800)),
+    'RUCATAYO': ((140, 150), (0, 8))
+}
+
+
+class Test_Dam_Functions(unittest.TestCase):
+
+    def test_array_versions_match_scalar(self):
+        for dam, functions in DAM_FUNCTIONS.items():
+            cotas, volumes = RANGES[dam]
+            for curve, (scalar_func, array_func) in functions.items():
+                values = np.linspace(*(volumes if curve == 'Cot' else cotas),
+                                     2001)
+                expected = [scalar_func(value) for value in values.tolist()]
+                with self.subTest(dam=dam, curve=curve):
+                    np.testing.assert_allclose(array_func(values), expected,
+                                               rtol=1e-12, atol=1e-12)
+
+    def test_evaluate_repeated_values(self):
+        cotas = np.array([430.0, 395.5, 430.0, 390.0, 395.5])
+        expected = [get_dam_function('COLBUN', 'Vol')(cota) for cota in cotas]
+        np.testing.assert_allclose(
+            evaluate_dam_function('COLBUN', 'Vol', cotas), expected,
+            rtol=1e-12)
+        with self.assertRaises(ValueError):
+            evaluate_dam_function('COLBUN', 'Filt', cotas)
+
+    def test_cot_tables_match_solver(self):
+        for dam, (vol_min, vol_max) in COT_TABLE_RANGES.items():
+            table = get_dam_function(dam, 'Cot', tabulated=True)
+            solver = get_dam_function(dam, 'Cot', vectorized=True)
+            # Table volumes and random volumes, plus volumes out of range
+            rng = np.random.default_rng(0)
+            volumes = np.concatenate([
+                table.volumes, rng.uniform(vol_min, vol_max, 200000),
+                [vol_min - 1, vol_max + 1]])
+            with self.subTest(dam=dam):
+                np.testing.assert_allclose(table(volumes), solver(volumes),
+                                           rtol=0, atol=TABLE_MAX_ERROR)
+                self.assertEqual(table(np.float64(vol_max)).shape, ())
+                # Same table for any call
+                self.assertIs(get_dam_function(dam, 'Cot', False, True),
+                              table)
+                self.assertIs(get_dam_functions('Cot', dams=[dam],
+                                                tabulated=True)[dam], table)
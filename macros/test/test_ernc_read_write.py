@@ -0,0 +1,47 @@
+import tempfile
+import unittest
+import pandas as pd
+from pathlib import Path
+from macros.ernc_read_write import write_plpmance_ernc_dat
+
+
+class Test_Write_Plpmance_Ernc(unittest.TestCase):
+
+    def test_one_pass_output(self):
+        lines_ini = ['# Archivo de mantenimientos de centrales (plpmance.dat)',
+                     '# numero de centrales con matenimientos',
+                     '  1\n',
+                     '# Nombre de la central',
+                     "'X'",
+                     '#   Numero de Bloques e Intervalos',
+                     '  0001                 01',
+                     '#   Mes    Bloque  NIntPot   PotMin   PotMax',
+                     '     10      0001        1     0.00    10.00']
+        df_scaled_profiles = pd.DataFrame({'Month': [1, 2],
+                                           'Etapa': [1, 2],
+                                           'A': [5.0, 1.234],
+                                           'B': [0.0, 100.0]})
+        ernc_data = {'dict_min_capacity': {'A': 2.0, 'B': 0.0}}
+        with tempfile.TemporaryDirectory() as tmp:
+            path_temp = Path(tmp) / 'Temp'
+            path_temp.mkdir()
+            (path_temp / 'plpmance_ini.dat').write_text('\n'.join(lines_ini))
+            write_plpmance_ernc_dat(ernc_data, df_scaled_profiles,
+                                    ['A', 'B'], Path(tmp) / 'IPLP.xlsx')
+            text = (path_temp / 'plpmance.dat').read_text()
+        expected = lines_ini[:2] + ['     3'] + lines_ini[3:] + [
+            '# Nombre de la central',
+            "'A'",
+            '#   Numero de Bloques e Intervalos',
+            '  0002                 01',
+            '#   Mes    Bloque  NIntPot   PotMin   PotMax',
+            '     10      0001        1     2.00     5.00',
+            '     11      0002        1     1.23     1.23',
+            '# Nombre de la central',
+            "'B'",
+            '#   Numero de Bloques e Intervalos',
+            '  0002                 01',
+            '#   Mes    Bloque  NIntPot   PotMin   PotMax',
+            '     10      0001        1     0.00     0.00',
+            '     11      0002        1     0.00   100.00']
+        self.assertEqual(text, '\n'.join(expected))
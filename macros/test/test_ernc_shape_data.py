@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+import pandas as pd
+from macros.ernc_shape_data import process_semi_months, get_rating_steps
+
+
+class Test_Ernc_Shape_Data(unittest.TestCase):
+
+    def test_process_semi_months(self):
+        df_rf = pd.DataFrame({
+            'Name': ['A', 'A', 'B'],
+            'DateFrom': pd.to_datetime(['2024-01-01', '2024-02-10',
+                                        '2024-04-15']),
+            'Value [MW]': [10.0, 39.0, 30.0]}, index=[2, 0, 1])
+        df_rf['Year'] = df_rf['DateFrom'].dt.year
+        df_rf['Month'] = df_rf['DateFrom'].dt.month
+        df_rf['Day'] = df_rf['DateFrom'].dt.day
+        df_rf['DaysInMonth'] = df_rf['DateFrom'].dt.days_in_month
+        df_rf['Initial_Eta'] = [1, 13, 37]
+
+        df = process_semi_months(df_rf)
+
+        self.assertEqual(df['Name'].tolist(), ['A', 'A', 'A', 'B', 'B'])
+        self.assertEqual(df['Initial_Eta'].tolist(), [1, 13, 25, 37, 49])
+        # Split rows mix the previous value of the unit (0 for the first
+        # one) with the new value, in proportion to the days of the month.
+        # The row labelled 0 never uses the previous value
+        for value, expected in zip(df['Value [MW]'],
+                                   [10, 39 * 19 / 29, 39, 30 * 15 / 30, 30]):
+            self.assertAlmostEqual(value, expected)
+        self.assertEqual(df['DateFrom'].iloc[2], pd.Timestamp('2024-03-01'))
+        self.assertEqual(df['Year-Month'].iloc[4], (2024, 5))
+
+        df = process_semi_months(df_rf.reset_index(drop=True))
+        self.assertAlmostEqual(df['Value [MW]'].iloc[1],
+                               39 * 19 / 29 + 10 * 10 / 29)
+
+    def test_rating_steps(self):
+        df_rf = pd.DataFrame({
+            'Name': ['A', 'B', 'A', 'A', 'B', 'A'],
+            'Initial_Eta': [1, 3, 4, 6, np.nan, 2],
+            'Value [MW]': [10.0, 20.0, 40.0, 60.0, 99.0, 30.0]})
+        ratings = get_rating_steps(df_rf, ['A', 'B', 'C'],
+                                   np.arange(1, 8))
+        # Later rows of a unit overwrite earlier ones from their etapa on,
+        # rows without Initial_Eta never apply
+        np.testing.assert_array_equal(ratings, [
+            [10, np.nan, np.nan],
+            [30, np.nan, np.nan],
+            [30, 20, np.nan],
+            [30, 20, np.nan],
+            [30, 20, np.nan],
+            [30, 20, np.nan],
+            [30, 20, np.nan]])
@@ -0,0 +1,118 @@
+import unittest
+import numpy as np
+import pandas as pd
+from macros.inflows import (get_week_names, InflowCube, build_df_plpaflce,
+                            formatters_plpaflce)
+from utils.utils import translate_to_hydromonth
+
+
+def build_df_aux(df_all_inflows, unit, nblocks=12):
+    '''
+    Former per-unit plpaflce table, kept as reference
+    '''
+    cols_groupby = ['YEAR', 'MONTH', 'INDHID']
+    df_mean = df_all_inflows.loc[unit].groupby(cols_groupby).mean()
+    df_mean = df_mean.squeeze().unstack('INDHID')
+    mux = pd.MultiIndex.from_product(
+        [df_mean.index.get_level_values('YEAR').unique().tolist(),
+         range(1, 13), range(1, nblocks + 1)],
+        names=['YEAR', 'MONTH', 'BLOCK'])
+    mux = mux[:len(df_mean) * nblocks]
+    df_mean['BLOCK'] = 1
+    df_mean = df_mean.reset_index().set_index(['YEAR', 'MONTH', 'BLOCK'])
+    df_mean = df_mean.reindex(mux, method='ffill').reset_index()
+    df_mean['BLOCK'] = df_mean.index + 1
+    df_mean = df_mean.rename(columns={'MONTH': 'Month'}).drop('YEAR', axis=1)
+    df_mean = translate_to_hydromonth(df_mean)
+    df_mean.columns = df_mean.columns.map(str)
+    return df_mean
+
+
+class Test_Inflows(unittest.TestCase):
+
+    def setUp(self):
+        dates = pd.date_range('2024-01-01', '2025-12-31', freq='D')
+        self.df_daily = pd.DataFrame({'YEAR': dates.year,
+                                      'MONTH': dates.month,
+                                      'DAY': dates.day,
+                                      'DATE': dates})
+        # Four weeks per month, starting on days 1, 8, 15 and 22
+        self.df_days_per_week = pd.DataFrame(
+            [(4 * (month - 1) + week + 1, 'W%02d_%d' % (month, week + 1),
+              month, 7 * week + 1)
+             for month in range(1, 13) for week in range(4)],
+            columns=['id_week', 'name', 'month', 'day'])
+
+    def test_week_names_match_rowwise_lookup(self):
+        df = self.df_days_per_week
+        expected = [
+            df[(df['month'] == month) & (df['day'] <= day)]['name'].values[-1]
+            for month, day in zip(self.df_daily['MONTH'],
+                                  self.df_daily['DAY'])]
+        week_names = get_week_names(self.df_daily,
+                                    df.sample(frac=1, random_state=0))
+        self.assertEqual(week_names.tolist(), expected)
+
+    def test_week_names_missing_week(self):
+        df = self.df_days_per_week
+        df = df[~((df['month'] == 3) & (df['day'] == 1))]
+        with self.assertRaises(ValueError):
+            get_week_names(self.df_daily, df)
+
+    def test_inflow_cube(self):
+        self.df_daily['WEEK_NAME'] = get_week_names(self.df_daily,
+                                                    self.df_days_per_week)
+        self.df_daily['ETAPA'] = (self.df_daily['YEAR'] - 2024) * 12 + \
+            self.df_daily['MONTH']
+        index = pd.MultiIndex.from_product(
+            [['B', 'A'], [1, 2], self.df_days_per_week['name']],
+            names=['CENTRAL', 'INDHID', 'WEEK_NAME'])
+        series_inflows = pd.Series(np.arange(len(index), dtype=float),
+                                   index=index, name='Inflows')
+        cube = InflowCube.from_weekly_inflows(series_inflows, self.df_daily)
+        self.assertEqual(cube.values.shape, (2, len(self.df_daily), 2))
+        self.assertEqual(cube.units, ['A', 'B'])
+        df = cube.to_frame()
+        self.assertEqual(df.loc[('A', 2024, 1, 9, '2024-01-09', 2),
+                                'Inflows'],
+                         series_inflows[('A', 2, 'W01_2')])
+
+        # Monthly means of January 2025, weeks 1-3 have 7 days, week 4 has 10
+        df_months, means = cube.monthly_means()
+        self.assertEqual(len(df_months), 24)
+        weeks = series_inflows.to_numpy()[:4]
+        self.assertAlmostEqual(means[1, 12, 0],
+                               (7 * weeks[:3].sum() + 10 * weeks[3]) / 31)
+
+        # Shuffled hydrology 1 takes hydrology 2 and vice versa
+        df_configsim = pd.DataFrame({1: 2, 2: 1}, index=range(1, 25))
+        shuffled = cube.shuffle(self.df_daily, df_configsim)
+        np.testing.assert_array_equal(shuffled.values,
+                                      cube.values[:, :, ::-1])
+
+    def test_plpaflce_matches_former_tables(self):
+        # Monthly means of 2-decimal inflows often fall on .xx5 ties, which
+        # must round as with the former per-unit groupby mean
+        self.df_daily['WEEK_NAME'] = get_week_names(self.df_daily,
+                                                    self.df_days_per_week)
+        index = pd.MultiIndex.from_product(
+            [['A', 'B', 'C'], [1, 2, 3, 4], self.df_days_per_week['name']],
+            names=['CENTRAL', 'INDHID', 'WEEK_NAME'])
+        rng = np.random.default_rng(0)
+        for _ in range(5):
+            series_inflows = pd.Series(
+                rng.integers(0, 100000, len(index)) / 100, index=index,
+                name='Inflows')
+            cube = InflowCube.from_weekly_inflows(series_inflows,
+                                                  self.df_daily)
+            df_plpaflce = build_df_plpaflce(cube)
+            n_rows = len(df_plpaflce) // len(cube.units)
+            df_all_inflows = cube.to_frame()
+            for idx, unit in enumerate(cube.units):
+                df_unit = df_plpaflce.iloc[idx * n_rows:(idx + 1) * n_rows]
+                self.assertEqual(
+                    df_unit.to_string(index=False, header=False,
+                                      formatters=formatters_plpaflce),
+                    build_df_aux(df_all_inflows, unit).to_string(
+                        index=False, header=False,
+                        formatters=formatters_plpaflce))
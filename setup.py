@@ -20,6 +20,7 @@ setup(
     tests_require=['pytest'],
     extras_require={
         "notebooks": ['jupyter', 'ipyfilechooser'],
+        "cache": ['pyarrow'],
     },
     entry_points={
         "console_scripts": [
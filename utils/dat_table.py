@@ -0,0 +1,329 @@
+'''Dat table
+
+Module to render DataFrames as the fixed-width numeric tables of PLP .dat
+files, with the same output as
+
+    df.to_string(index=False, header=False, formatters=formatters)
+
+Formatters are the usual "...{:spec}...".format bound methods. Fixed-width
+integer and fixed-point columns are rendered with NumPy digit arithmetic,
+other columns with printf-style specs, one column at a time.
+'''
+import re
+import string
+from decimal import Decimal, ROUND_HALF_EVEN
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+
+# Format spec of str.format: [[fill]align][sign][0][width][.precision][type]
+FORMAT_SPEC_REGEX = re.compile(
+    r'^(?:(?P<fill>.)?(?P<align>[<>^=]))?(?P<sign>[+\- ])?(?P<zero>0)?'
+    r'(?P<width>[1-9]\d*)?(?:\.(?P<precision>\d+))?(?P<type>[a-zA-Z%])?$')
+
+# Largest value rendered with NumPy, so that it is exact in float64
+MAX_VECTORIZED_VALUE = 1e15
+POWERS_OF_TEN = 10 ** np.arange(17, dtype=np.int64)
+
+ORD_ZERO = ord('0')
+ORD_SPACE = ord(' ')
+ORD_MINUS = ord('-')
+ORD_DOT = ord('.')
+ORD_NEWLINE = ord('\n')
+
+
+def get_column_kind(values: np.ndarray) -> str:
+    '''
+    Return 'i', 'f' or 'O' if values can be formatted exactly as
+    DataFrame.to_string does, otherwise None
+    '''
+    if values.dtype.kind in 'iu':
+        return 'i'
+    if values.dtype.kind == 'f' and not np.isnan(values).any():
+        return 'f'
+    if values.dtype.kind in 'OT' and \
+            all(isinstance(value, str) and '\n' not in value
+                for value in values):
+        return 'O'
+    return None
+
+
+@lru_cache(maxsize=None)
+def parse_formatter(formatter) -> dict:
+    '''
+    Split formatter built as "...{:spec}...".format into prefix, suffix
+    and format spec fields, or return None if it has another form
+    '''
+    template = getattr(formatter, '__self__', None)
+    if not isinstance(template, str) or \
+            getattr(formatter, '__name__', None) != 'format':
+        return None
+    try:
+        parsed = list(string.Formatter().parse(template))
+    except ValueError:
+        return None
+    fields = [idx for idx, field in enumerate(parsed) if field[1] is not None]
+    if len(fields) != 1:
+        return None
+    _, field_name, format_spec, conversion = parsed[fields[0]]
+    if field_name not in ('', '0') or conversion is not None:
+        return None
+    match = FORMAT_SPEC_REGEX.match(format_spec)
+    if match is None or \
+            match['fill'] not in (None, ' ') or match['align'] in ('^', '='):
+        return None
+    spec = match.groupdict()
+    spec['prefix'] = ''.join(field[0] for field in parsed[:fields[0] + 1])
+    spec['suffix'] = ''.join(field[0] for field in parsed[fields[0] + 1:])
+    spec['width'] = int(spec['width'] or 0)
+    if spec['precision'] is not None:
+        spec['precision'] = int(spec['precision'])
+    return spec
+
+
+def get_printf_spec(spec: dict, kind: str) -> str:
+    '''
+    Return printf-style spec equivalent to the parsed format spec for
+    values of the given kind, or None if there is no exact equivalent
+    '''
+    width = str(spec['width'] or '')
+    spec_type = spec['type']
+    if spec_type in ('d', 'f', 'e', 'E', 'g', 'G'):
+        if kind == 'O' or (spec_type == 'd' and kind != 'i'):
+            return None
+        if spec['zero'] and spec['align']:
+            return None
+        flags = (spec['sign'] or '').replace('-', '')
+        flags += '-' if spec['align'] == '<' else ''
+        flags += spec['zero'] or ''
+        precision = '.%s' % spec['precision'] \
+            if spec['precision'] is not None else ''
+        printf_spec = '%' + flags + width + precision + spec_type
+    elif spec_type in (None, 's'):
+        if spec['sign'] or spec['zero'] or spec['precision'] is not None:
+            return None
+        if spec_type == 's' and kind != 'O':
+            return None
+        # Strings are left-aligned by default, numbers right-aligned
+        left = spec['align'] == '<' or \
+            (spec['align'] is None and kind == 'O')
+        printf_spec = '%' + ('-' if left else '') + width + 's'
+    else:
+        return None
+    return spec['prefix'].replace('%', '%%') + printf_spec + \
+        spec['suffix'].replace('%', '%%')
+
+
+def get_scaled_integers(values: np.ndarray, kind: str,
+                        precision: int) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Return absolute values times 10**precision, rounded half to even as
+    str.format does, and the sign of each value
+    '''
+    if kind == 'i' and precision == 0:
+        return np.abs(values).astype(np.int64), values < 0
+    values = values.astype(float)
+    negative = np.signbit(values)
+    scaled = np.abs(values) * 10.0 ** precision
+    integers = np.rint(scaled)
+    # Near ties, the float product may round to the wrong side, so use
+    # the exact decimal value of those values
+    distance_to_tie = np.abs(scaled - np.floor(scaled) - 0.5)
+    for idx in np.flatnonzero(distance_to_tie <= scaled * 1e-15):
+        integers[idx] = Decimal(float(abs(values[idx]))).scaleb(
+            precision).to_integral_value(rounding=ROUND_HALF_EVEN)
+    return integers.astype(np.int64), negative
+
+
+def render_numbers(values: np.ndarray, kind: str, spec: dict) -> np.ndarray:
+    '''
+    Render integer ('d') or fixed-point ('f') values as a matrix of
+    character codes, one row per value, or return None if the spec or
+    the values are not supported
+    '''
+    if kind not in ('i', 'f') or spec['sign'] or spec['align'] or \
+            spec['width'] == 0:
+        return None
+    if spec['type'] == 'd' and kind == 'i':
+        precision = 0
+    elif spec['type'] == 'f' and spec['precision'] is not None:
+        precision = spec['precision']
+    else:
+        return None
+    width = spec['width']
+    if not np.isfinite(values).all() or \
+            np.abs(values).max() * 10.0 ** precision >= MAX_VECTORIZED_VALUE:
+        return None
+    integers, negative = get_scaled_integers(values, kind, precision)
+    # Number of digits, with at least one digit before the decimal point
+    n_digits = 1 + np.searchsorted(POWERS_OF_TEN[1:], integers, side='right')
+    n_digits = np.maximum(n_digits, precision + 1)
+    dot = 1 if precision > 0 else 0
+    if (n_digits + dot + negative > width).any():
+        return None
+    # Only the rightmost positions can show digits, the rest is padding
+    n_positions = min(width, n_digits.max() + dot)
+    chars = np.full((len(integers), width),
+                    ORD_ZERO if spec['zero'] else ORD_SPACE, dtype=np.uint32)
+    # Position of each character counted from the right, and index of
+    # the digit it shows
+    position = np.arange(n_positions - 1, -1, -1)
+    digit_index = np.where(position > precision - dot, position - dot,
+                           position)
+    digits = integers[:, None] // POWERS_OF_TEN[digit_index][None, :] % 10
+    chars[:, width - n_positions:] = digits + ORD_ZERO
+    if dot:
+        chars[:, width - 1 - precision] = ORD_DOT
+    if spec['zero']:
+        chars[negative, 0] = ORD_MINUS
+    else:
+        leading = digit_index[None, :] >= n_digits[:, None]
+        if dot:
+            leading[:, position == precision] = False
+        chars[:, width - n_positions:][leading] = ORD_SPACE
+        sign_position = n_digits[negative] + dot
+        chars[np.flatnonzero(negative), width - 1 - sign_position] = \
+            ORD_MINUS
+    return chars
+
+
+def to_char_matrix(text: str, n_rows: int) -> np.ndarray:
+    '''
+    Return lines of text as a matrix of character codes, or None if
+    lines have different lengths
+    '''
+    if (len(text) + 1) % n_rows != 0:
+        return None
+    chars = np.frombuffer((text + '\n').encode('utf-32-le'), dtype=np.uint32)
+    chars = chars.reshape(n_rows, -1)
+    if (chars[:, -1] != ORD_NEWLINE).any():
+        return None
+    return chars[:, :-1]
+
+
+def render_column(values: np.ndarray, kind: str, spec: dict,
+                  printf_spec: str) -> np.ndarray:
+    '''
+    Render column as a matrix of character codes, or return None if
+    values do not have the same width
+    '''
+    chars = render_numbers(values, kind, spec)
+    if chars is not None:
+        prefix = np.array([ord(c) for c in spec['prefix']], dtype=np.uint32)
+        suffix = np.array([ord(c) for c in spec['suffix']], dtype=np.uint32)
+        return np.hstack([np.broadcast_to(prefix, (len(chars), len(prefix))),
+                          chars,
+                          np.broadcast_to(suffix, (len(chars), len(suffix)))])
+    text = '\n'.join([printf_spec] * len(values)) % tuple(values.tolist())
+    return to_char_matrix(text, len(values))
+
+
+def format_dat_table(df: pd.DataFrame, formatters: dict) -> str:
+    '''
+    Return df as fixed-width table without index and header, using
+    formatters per column
+
+    Output is identical to
+    df.to_string(index=False, header=False, formatters=formatters).
+    Columns without a "...{:spec}...".format formatter, or with missing
+    values, fall back to to_string
+    '''
+    if len(df) == 0 or len(df.columns) == 0 or \
+            not isinstance(formatters, dict):
+        return df.to_string(index=False, header=False, formatters=formatters)
+    columns = []
+    for idx, col in enumerate(df.columns):
+        values = df.iloc[:, idx].to_numpy()
+        kind = get_column_kind(values)
+        spec = parse_formatter(formatters.get(col))
+        printf_spec = get_printf_spec(spec, kind) \
+            if kind is not None and spec is not None else None
+        if printf_spec is None:
+            return df.to_string(
+                index=False, header=False, formatters=formatters)
+        columns.append((values, kind, spec, printf_spec))
+    n_rows = len(df)
+    separator = np.full((n_rows, 1), ORD_SPACE, dtype=np.uint32)
+    blocks = []
+    for values, kind, spec, printf_spec in columns:
+        chars = render_column(values, kind, spec, printf_spec)
+        if chars is None:
+            return justify_columns(columns)
+        blocks += [chars, separator]
+    blocks[-1] = np.full((n_rows, 1), ORD_NEWLINE, dtype=np.uint32)
+    table = np.hstack(blocks).tobytes().decode('utf-32-le')
+    return table[:-1]
+
+
+def justify_columns(columns: list) -> str:
+    '''
+    Format each value and right-justify each column to its widest value
+    '''
+    str_columns = []
+    for values, _, _, printf_spec in columns:
+        texts = [printf_spec % value for value in values.tolist()]
+        width = max(map(len, texts))
+        str_columns.append([text.rjust(width) for text in texts])
+    return '\n'.join(map(' '.join, zip(*str_columns)))
+
+
+def format_dat_tables(df: pd.DataFrame, formatters: dict,
+                      n_tables: int) -> list:
+    '''
+    Split df in n_tables consecutive tables with the same number of rows
+    and return each one as format_dat_table would format it
+
+    Each column is rendered once for all tables. Columns whose values do
+    not have the same width are right-justified to the widest value of
+    each table, as justify_columns does
+    '''
+    n_rows = len(df) // n_tables if n_tables > 0 else 0
+    slices = [slice(table * n_rows, (table + 1) * n_rows)
+              for table in range(n_tables)]
+    if n_rows == 0 or n_rows * n_tables != len(df) or \
+            len(df.columns) == 0 or not isinstance(formatters, dict):
+        return [format_dat_table(df.iloc[rows], formatters)
+                for rows in slices]
+    columns = []
+    for idx, col in enumerate(df.columns):
+        values = df.iloc[:, idx].to_numpy()
+        kind = get_column_kind(values)
+        spec = parse_formatter(formatters.get(col))
+        printf_spec = get_printf_spec(spec, kind) \
+            if kind is not None and spec is not None else None
+        if printf_spec is None:
+            return [format_dat_table(df.iloc[rows], formatters)
+                    for rows in slices]
+        chars = render_column(values, kind, spec, printf_spec)
+        if chars is not None:
+            widths = np.full(n_tables, chars.shape[1])
+        else:
+            texts = np.array([printf_spec % value
+                              for value in values.tolist()])
+            widths = np.char.str_len(texts).reshape(
+                n_tables, n_rows).max(axis=1)
+            chars = np.char.rjust(texts, widths.max()).view(
+                np.uint32).reshape(len(values), -1)
+        columns.append((chars, widths))
+    # Tables with the same column widths are rendered together
+    table_widths = np.column_stack([widths for _, widths in columns])
+    signatures, groups = np.unique(table_widths, axis=0, return_inverse=True)
+    groups = groups.ravel()
+    rows = np.arange(len(df)).reshape(n_tables, n_rows)
+    tables = [None] * n_tables
+    for group, signature in enumerate(signatures):
+        table_idx = np.flatnonzero(groups == group)
+        group_rows = rows[table_idx].ravel()
+        separator = np.full((len(group_rows), 1), ORD_SPACE, dtype=np.uint32)
+        blocks = []
+        for (chars, _), width in zip(columns, signature):
+            blocks += [chars[group_rows, chars.shape[1] - width:], separator]
+        blocks[-1] = np.full((len(group_rows), 1), ORD_NEWLINE,
+                             dtype=np.uint32)
+        text = np.hstack(blocks).tobytes().decode('utf-32-le')
+        table_length = (signature.sum() + len(signature)) * n_rows
+        for pos, idx in enumerate(table_idx):
+            tables[idx] = text[pos * table_length:
+                               (pos + 1) * table_length - 1]
+    return tables
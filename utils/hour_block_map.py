@@ -0,0 +1,89 @@
+'''Hour block map
+
+Module to turn hourly data into block data, using the blocks of each
+hour and month defined in block2day.csv.
+
+The (Month, Hour) -> Block definition is kept as an integer lookup array,
+so hourly arrays are aggregated to blocks with one sort and
+np.add.reduceat, with no pandas merges or groupbys. As in groupby, hours
+without a block are dropped and missing values are skipped.
+'''
+import numpy as np
+import pandas as pd
+
+
+class HourBlockMap:
+    '''
+    Block of each (Month, Hour), from block2day with Hour, Month and Block
+    columns as returned by process_etapas_blocks
+    '''
+
+    def __init__(self, block2day: pd.DataFrame):
+        months = block2day['Month'].to_numpy(dtype=int)
+        hours = block2day['Hour'].to_numpy(dtype=int)
+        blocks = block2day['Block'].to_numpy(dtype=int)
+        # Block 0 marks (Month, Hour) without block
+        self.lookup = np.zeros((13, hours.max() + 1), dtype=int)
+        self.lookup[months, hours] = blocks
+        self.n_blocks = blocks.max()
+
+    def get_blocks(self, months: np.ndarray, hours: np.ndarray) -> np.ndarray:
+        '''
+        Return block of each month and hour, or 0 if not defined
+        '''
+        months = np.asarray(months, dtype=float)
+        hours = np.asarray(hours, dtype=float)
+        valid = (months >= 1) & (months <= 12) & \
+            (hours >= 0) & (hours < self.lookup.shape[1])
+        valid &= (months == np.round(months)) & (hours == np.round(hours))
+        blocks = np.zeros(len(months), dtype=int)
+        blocks[valid] = self.lookup[months[valid].astype(int),
+                                    hours[valid].astype(int)]
+        return blocks
+
+    def aggregate(self, values: np.ndarray, months: np.ndarray,
+                  hours: np.ndarray, how: str = 'mean',
+                  groups: np.ndarray = None) -> tuple[dict, np.ndarray]:
+        '''
+        Aggregate hourly values, shaped (hours, columns), to blocks with
+        their 'mean' or 'sum'
+
+        Return dict with Month and Block of each output row (and the group
+        code, if groups are given), and the aggregated values. Rows are
+        sorted by group, Month and Block. groups are non-negative
+        integer codes, e.g. from pd.factorize(sort=True)
+        '''
+        if how not in ('mean', 'sum'):
+            raise ValueError('Invalid aggregation: %s' % how)
+        values = np.asarray(values, dtype=float).reshape(len(months), -1)
+        months = np.asarray(months)
+        blocks = self.get_blocks(months, hours)
+        valid = blocks > 0
+        keys = (months[valid].astype(np.int64) - 1) * self.n_blocks + \
+            blocks[valid] - 1
+        if groups is not None:
+            keys += np.asarray(groups)[valid].astype(np.int64) * \
+                12 * self.n_blocks
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        values = values[valid][order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) \
+            if len(keys) > 0 else np.array([], dtype=int)
+        # Missing values are skipped, as in groupby
+        missing = np.isnan(values)
+        if len(starts) > 0:
+            result = np.add.reduceat(np.where(missing, 0, values), starts,
+                                     axis=0)
+        else:
+            result = np.zeros((0, values.shape[1]))
+        if how == 'mean':
+            counts = np.add.reduceat(~missing, starts, axis=0) \
+                if len(starts) > 0 else np.zeros(result.shape, dtype=int)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result = result / counts
+        out_keys = keys[starts]
+        index = {'Month': out_keys // self.n_blocks % 12 + 1,
+                 'Block': out_keys % self.n_blocks + 1}
+        if groups is not None:
+            index['Group'] = out_keys // (12 * self.n_blocks)
+        return index, result
@@ -0,0 +1,148 @@
+'''Manifest
+
+Module to keep track of the inputs used to generate each output file,
+so that run_all --incremental only runs the macros whose inputs changed.
+
+The manifest is stored in Temp/build_manifest.json. For each macro call,
+it records the IPLP sheets read and the input files used, with their
+content hashes, together with the output files generated.
+'''
+import hashlib
+import importlib.util
+import json
+from pathlib import Path
+from utils.logger import create_logger
+from utils.workbook import get_iplp_workbook
+
+
+logger = create_logger('manifest')
+
+MANIFEST_NAME = 'build_manifest.json'
+
+
+def hash_file(file_path: Path) -> str:
+    '''
+    Return sha256 hash of the file contents
+    '''
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def expand_patterns(base_path: Path, patterns: list) -> list:
+    '''
+    Return existing files matching patterns, relative to base_path
+    '''
+    files = set()
+    for pattern in patterns:
+        for file in base_path.glob(pattern):
+            if file.is_file():
+                files.add(file.relative_to(base_path).as_posix())
+    return sorted(files)
+
+
+def hash_module(module_name: str) -> str:
+    '''
+    Return hash of the source file of the macro, so that changes in
+    the macro also trigger a new run
+    '''
+    spec = importlib.util.find_spec(module_name)
+    if spec is None or spec.origin is None:
+        return ''
+    return hash_file(Path(spec.origin))
+
+
+def get_call_label(module_name: str, kwargs: dict) -> str:
+    '''
+    Return unique name of a macro call, e.g. macros.inflows(plp_enable=True)
+    '''
+    args = ', '.join('%s=%s' % (key, value) for key, value in kwargs.items())
+    return '%s(%s)' % (module_name, args)
+
+
+class BuildManifest:
+    '''
+    Record of the inputs and outputs of the last successful run of each
+    macro call
+    '''
+
+    def __init__(self, iplp_path: Path):
+        self.iplp_path = Path(iplp_path)
+        self.base_path = self.iplp_path.parent
+        self.manifest_path = self.base_path / 'Temp' / MANIFEST_NAME
+        self.entries = {}
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                logger.warning('Could not read %s, running all macros' %
+                               self.manifest_path)
+
+    def _hash_sheets(self, sheets: list) -> dict:
+        hashes = {}
+        for path, sheet_name in sheets:
+            if not Path(path).exists():
+                hashes['%s|%s' % (path, sheet_name)] = ''
+                continue
+            workbook = get_iplp_workbook(path)
+            if sheet_name in workbook.sheet_names:
+                fingerprint = workbook.get_sheet_fingerprint(sheet_name)
+            else:
+                fingerprint = ''
+            hashes['%s|%s' % (path, sheet_name)] = fingerprint
+        return hashes
+
+    def _hash_files(self, files: list) -> dict:
+        return {file: hash_file(self.base_path / file) for file in files}
+
+    def is_up_to_date(self, module_name: str, kwargs: dict,
+                      io: dict) -> bool:
+        '''
+        True if the macro call ran before with the same sheets, input
+        files and source code, and its outputs still exist
+        '''
+        entry = self.entries.get(get_call_label(module_name, kwargs))
+        if entry is None:
+            return False
+        if entry['module'] != hash_module(module_name):
+            return False
+        sheets = [tuple(key.split('|', 1)) for key in entry['sheets']]
+        if self._hash_sheets(sheets) != entry['sheets']:
+            return False
+        inputs = expand_patterns(self.base_path, io['inputs'])
+        if self._hash_files(inputs) != entry['inputs']:
+            return False
+        return all((self.base_path / file).exists()
+                   for file in entry['outputs'])
+
+    def record(self, module_name: str, kwargs: dict, io: dict,
+               sheets: list):
+        '''
+        Store inputs and outputs of a successful macro call
+        '''
+        inputs = expand_patterns(self.base_path, io['inputs'])
+        outputs = expand_patterns(self.base_path, io['outputs'])
+        self.entries[get_call_label(module_name, kwargs)] = {
+            'module': hash_module(module_name),
+            'sheets': self._hash_sheets(sheets),
+            'inputs': self._hash_files(inputs),
+            'outputs': self._hash_files(outputs)
+        }
+        self.save()
+
+    def remove(self, module_name: str, kwargs: dict):
+        '''
+        Forget macro call, so it runs again next time
+        '''
+        if self.entries.pop(get_call_label(module_name, kwargs), None):
+            self.save()
+
+    def save(self):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.manifest_path.with_suffix('.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        temp_path.replace(self.manifest_path)
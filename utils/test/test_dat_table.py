@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+import pandas as pd
+from utils.dat_table import format_dat_table, format_dat_tables
+
+
+class Test_Format_Dat_Table(unittest.TestCase):
+
+    def assert_same_as_to_string(self, df, formatters):
+        self.assertEqual(
+            format_dat_table(df, formatters),
+            df.to_string(index=False, header=False, formatters=formatters))
+
+    def test_fixed_width_numbers(self):
+        formatters = {
+            'Month': "     {:02d}".format,
+            'Etapa': "     {:04d}".format,
+            'Pmin': "{:8.1f}".format,
+            'Pmax': "{:08.2f}".format
+        }
+        df = pd.DataFrame({
+            'Month': [1, 12, 3, 4, 5, 6],
+            'Etapa': [1, 20, 300, 4000, 5, 6],
+            # Ties and signed zeros, rounded as str.format does
+            'Pmin': [0.05, 0.25, -0.04, 2.675, 99.95, -0.0],
+            'Pmax': [1.005, -1.5, 0.125, 0.0, 12.345, 3.0]
+        })
+        self.assert_same_as_to_string(df, formatters)
+
+    def test_values_wider_than_spec(self):
+        formatters = {'Etapa': "  {:03d}".format, 'Caudal': "{:5.1f}".format}
+        df = pd.DataFrame({'Etapa': [1, 1000], 'Caudal': [1.0, -12345.6]})
+        self.assert_same_as_to_string(df, formatters)
+
+    def test_strings_and_missing_values(self):
+        formatters = {
+            'Nombre': "{:<10}".format,
+            'Operativa': "        {:>}".format,
+            'Valor': "{:9.2f}".format
+        }
+        df = pd.DataFrame({
+            'Nombre': ['Ñuble', 'A'],
+            'Operativa': ['T', 'F'],
+            'Valor': [np.nan, 1.0]
+        })
+        self.assert_same_as_to_string(df, formatters)
+
+    def test_split_tables(self):
+        formatters = {'BLOCK': "   {:03d}".format, '1': "{:7.2f}".format}
+        # BLOCK values wider than spec, and one table with a wide Caudal
+        df = pd.DataFrame({'BLOCK': [1, 999, 1000] * 3,
+                           '1': [1.5, 2.0, 3.0, 10000.5, 2.0, 3.0,
+                                 -1.0, 0.0, 7.25]})
+        expected = [
+            df.iloc[idx:idx + 3].to_string(index=False, header=False,
+                                           formatters=formatters)
+            for idx in range(0, 9, 3)]
+        self.assertEqual(format_dat_tables(df, formatters, 3), expected)
@@ -0,0 +1,39 @@
+import unittest
+import numpy as np
+import pandas as pd
+from utils.hour_block_map import HourBlockMap
+
+
+class Test_Hour_Block_Map(unittest.TestCase):
+
+    def setUp(self):
+        # Hours 1-2 in block 1 and hours 3-4 in block 2, except in March,
+        # where hour 4 has no block
+        rows = [(hour, month, (hour + 1) // 2)
+                for month in range(1, 13) for hour in range(1, 5)
+                if (month, hour) != (3, 4)]
+        self.block_map = HourBlockMap(
+            pd.DataFrame(rows, columns=['Hour', 'Month', 'Block']))
+
+    def test_get_blocks(self):
+        blocks = self.block_map.get_blocks([1, 3, 3, 13, 1], [4, 3, 4, 1, 9])
+        np.testing.assert_array_equal(blocks, [2, 2, 0, 0, 0])
+
+    def test_aggregate_like_groupby(self):
+        df = pd.DataFrame({'Group': [1, 0, 0, 1, 0, 0, 0],
+                           'Month': [3, 3, 3, 3, 3, 1, 1],
+                           'Hour': [1, 4, 3, 2, 1, 2, 1],
+                           'Value': [1.0, 99.0, 5.0, 3.0, np.nan, 2.0, 4.0]})
+        index, values = self.block_map.aggregate(
+            df['Value'].to_numpy(), df['Month'].to_numpy(),
+            df['Hour'].to_numpy(), how='mean', groups=df['Group'].to_numpy())
+        # Hours without block are dropped and missing values skipped
+        self.assertEqual(index['Group'].tolist(), [0, 0, 0, 1])
+        self.assertEqual(index['Month'].tolist(), [1, 3, 3, 3])
+        self.assertEqual(index['Block'].tolist(), [1, 1, 2, 1])
+        np.testing.assert_array_equal(values[:, 0], [3.0, np.nan, 5.0, 2.0])
+
+        _, values = self.block_map.aggregate(
+            df['Value'].to_numpy(), df['Month'].to_numpy(),
+            df['Hour'].to_numpy(), how='sum', groups=df['Group'].to_numpy())
+        np.testing.assert_array_equal(values[:, 0], [6.0, 0.0, 5.0, 4.0])
@@ -0,0 +1,88 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from utils.utils import (apply_intervals_daily,
+                         write_lines_from_scratch,
+                         write_lines_appending,
+                         DatWriter)
+
+
+class Test_Apply_Intervals_Daily(unittest.TestCase):
+
+    def setUp(self):
+        self.dates = pd.date_range('2024-01-01', '2024-01-10').to_numpy()
+        self.base = np.array([[1.0, 2.0]] * 10)
+
+    def apply(self, entities, dates_ini, dates_end, values):
+        return apply_intervals_daily(
+            self.dates, ['A', 'B'], np.array(entities),
+            pd.to_datetime(dates_ini).to_numpy(),
+            pd.to_datetime(dates_end).to_numpy(),
+            np.array(values), base=self.base)
+
+    def test_last_record_wins(self):
+        matrix = self.apply(
+            ['A', 'A', 'B'],
+            ['2024-01-02', '2024-01-04', '2024-01-01'],
+            ['2024-01-05', '2024-01-04', '2024-01-01'],
+            [10.0, 20.0, 30.0])
+        self.assertEqual(matrix[:, 0].tolist(),
+                         [1, 10, 10, 20, 10, 1, 1, 1, 1, 1])
+        self.assertEqual(matrix[:, 1].tolist(), [30] + [2] * 9)
+        # Base values are not modified
+        self.assertEqual(self.base[1, 0], 1.0)
+
+    def test_intervals_outside_calendar(self):
+        matrix = self.apply(
+            ['A', 'B', 'C'],
+            ['2023-12-01', '2024-01-09', '2024-01-01'],
+            ['2024-01-02', '2024-02-01', '2024-01-10'],
+            [0.0, 0.0, 5.0])
+        self.assertEqual(matrix[:, 0].tolist(), [0, 0] + [1] * 8)
+        self.assertEqual(matrix[:, 1].tolist(), [2] * 8 + [0, 0])
+
+    def test_empty_interval(self):
+        matrix = self.apply(['A'], ['2024-01-05'], ['2024-01-04'], [0.0])
+        np.testing.assert_array_equal(matrix, self.base)
+
+
+class Test_DatWriter(unittest.TestCase):
+
+    def test_same_output_as_appending(self):
+        df = pd.DataFrame({'Month': [1, 12], 'Consumo': [1.234, 100.0]})
+        formatters = {'Month': "   {:02d}".format,
+                      'Consumo': "{:9.2f}".format}
+        header = ['# Header', '2']
+        block = ['\n# Block', 'A']
+        with tempfile.TemporaryDirectory() as tmp:
+            path_old = Path(tmp) / 'old.dat'
+            write_lines_from_scratch(header, path_old)
+            write_lines_appending(block + [df.to_string(
+                index=False, header=False, formatters=formatters)], path_old)
+            path_new = Path(tmp) / 'new.dat'
+            with DatWriter(path_new) as writer:
+                writer.write_lines(header)
+                writer.write_df(block, df, formatters)
+            self.assertEqual(path_old.read_bytes(), path_new.read_bytes())
+
+    def test_skip_blank_lines(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'file.dat'
+            with DatWriter(path, skip_blank_lines=True) as writer:
+                writer.write_lines(['# Header', '  2\n', '  '])
+                writer.write_lines(['\n# Block', 'A', ''])
+                writer.write_lines(['B'])
+            self.assertEqual(path.read_text(), '# Header\n  2\n# Block\nA\nB')
+
+    def test_file_replaced_only_on_success(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'file.dat'
+            path.write_text('old')
+            with self.assertRaises(ValueError):
+                with DatWriter(path) as writer:
+                    writer.write_lines(['new'])
+                    raise ValueError
+            self.assertEqual(path.read_text(), 'old')
+            self.assertEqual(list(Path(tmp).iterdir()), [path])
@@ -0,0 +1,31 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import pandas as pd
+from utils.workbook import SheetCache, PARQUET_AVAILABLE
+
+
+@unittest.skipUnless(PARQUET_AVAILABLE, 'pyarrow is not installed')
+class Test_Sheet_Cache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = SheetCache(Path(self.tmp.name) / 'cache')
+        self.df = pd.DataFrame({'Name': ['A', 'B'], 'Value': [1.5, 2.0]})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_load_round_trip(self):
+        self.assertIsNone(self.cache.load('key'))
+        self.cache.save('key', self.df, 'Sheet')
+        pd.testing.assert_frame_equal(self.cache.load('key'), self.df)
+        self.assertEqual([f.name for f in self.cache.cache_path.iterdir()],
+                         ['key.parquet'])
+
+    def test_failed_replace_is_not_cached(self):
+        with mock.patch.object(Path, 'replace', side_effect=OSError):
+            self.cache.save('key', self.df, 'Sheet')
+        self.assertIsNone(self.cache.load('key'))
+        self.assertEqual(list(self.cache.cache_path.iterdir()), [])
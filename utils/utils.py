@@ -5,15 +5,17 @@ Module to store all transversal utility functions
 import os
 from calendar import monthrange
 from typing import TypedDict
+import numpy as np
 import pandas as pd
 from functools import wraps
 from pathlib import Path
 from numpy import ceil
 from argparse import ArgumentParser
-from shutil import copyfile
 import time
 from datetime import datetime
 from utils.logger import create_logger
+from utils.workbook import read_iplp_sheet
+from utils.dat_table import format_dat_table
 from openpyxl.utils.datetime import from_excel
 
 
@@ -24,6 +26,9 @@ logger = create_logger('utils')
 PLPETA_NAME = "plpetapas.csv"
 PLPB2D_NAME = "block2day.csv"
 
+# Buffer size used by DatWriter
+DAT_BUFFER_SIZE = 1 << 20
+
 
 BLO2DAY_COLS = {
     "jan": "1",
@@ -46,6 +51,9 @@ BLO2DAY_HOURS = [
     "7", "8", "9", "10", "11", "12"
 ]
 
+# Block definitions already read, indexed by (path_dat, droptasa)
+_ETAPAS_BLOCKS_CACHE = {}
+
 MONTH_TO_HIDROMONTH = {
     1: 10, 2: 11, 3: 12,
     4: 1, 5: 2, 6: 3,
@@ -73,7 +81,23 @@ def process_etapas_blocks(path_dat: Path, droptasa: bool = True) -> tuple[
         pd.DataFrame, pd.Series, pd.DataFrame]:
     '''
     Get blocks to etapas definition and tasa
+
+    Results are kept in memory while the input csv files do not change,
+    so steps running in the same process share them. Copies are
+    returned, as callers modify them.
     '''
+    key = (Path(path_dat).resolve(), droptasa)
+    stats = tuple((f.stat().st_mtime_ns, f.stat().st_size)
+                  for f in (path_dat / PLPETA_NAME, path_dat / PLPB2D_NAME))
+    cached = _ETAPAS_BLOCKS_CACHE.get(key)
+    if cached is None or cached[0] != stats:
+        cached = (stats, _read_etapas_blocks(path_dat, droptasa))
+        _ETAPAS_BLOCKS_CACHE[key] = cached
+    return tuple(item.copy() for item in cached[1])
+
+
+def _read_etapas_blocks(path_dat: Path, droptasa: bool) -> tuple[
+        pd.DataFrame, pd.Series, pd.DataFrame]:
     plpetapas = pd.read_csv(path_dat / PLPETA_NAME)
     n_blo = plpetapas['Block'].max()
     plpetapas["Tasa"] = 1.1 ** (
@@ -193,21 +217,9 @@ def get_plx_dem_skip_bool(parser: ArgumentParser) -> bool:
     return args.plx_dem_skip
 
 
-def remove_blank_lines(text_file: Path):
-    temp_file = 'temp.txt'
-    # opening and creating new .txt file
-    with open(text_file, 'r') as r, open(temp_file, 'w') as o:
-        for line in r:
-            # if line is not blank after stripping all spaces, keep line
-            if line.strip():
-                o.write(line)
-    copyfile(temp_file, text_file)
-    os.remove(temp_file)
-
-
 def get_list_of_all_barras(iplp_path: Path) -> list:
-    df = pd.read_excel(iplp_path, sheet_name="Barras",
-                       skiprows=4, usecols="B")
+    df = read_iplp_sheet(iplp_path, sheet_name="Barras",
+                         skiprows=4, usecols="B")
     return df['BARRA'].tolist()
 
 
@@ -225,9 +237,9 @@ def get_scenarios(iplp_path: Path) -> ScenarioData:
     - Eolico: Base, WindLow, WindHigh
     '''
 
-    df = pd.read_excel(iplp_path, sheet_name="Path",
-                       skiprows=6, usecols="C:D",
-                       header=None)
+    df = read_iplp_sheet(iplp_path, sheet_name="Path",
+                         skiprows=6, usecols="C:D",
+                         header=None)
     df = df.dropna()
     scenario_data = df.set_index(2).to_dict()[3]
     scenario_data.pop('N° Iteraciones')
@@ -235,9 +247,8 @@ def get_scenarios(iplp_path: Path) -> ScenarioData:
 
 
 def write_lines_from_scratch(lines: str, filepath: Path):
-    f = open(filepath, 'w')
-    f.write('\n'.join(lines))
-    f.close()
+    with DatWriter(filepath) as writer:
+        writer.write_lines(lines)
 
 
 def write_lines_appending(lines: str, filepath: Path):
@@ -246,6 +257,99 @@ def write_lines_appending(lines: str, filepath: Path):
     f.close()
 
 
+class DatWriter:
+    '''
+    Write .dat files through a single buffered file handle
+
+    Each call to write_lines works as write_lines_appending, but the
+    file is opened only once:
+
+        with DatWriter(path) as writer:
+            writer.write_lines(header_lines)
+            for unit in units:
+                writer.write_lines(unit_lines)
+
+    In 'w' mode, data goes to a temporary file next to filepath, which
+    replaces filepath only when the block ends without errors, so
+    readers never see a partial file. With skip_blank_lines, lines that
+    are empty after stripping spaces are not written.
+    '''
+
+    def __init__(self, filepath: Path, mode: str = 'w',
+                 buffer_size: int = DAT_BUFFER_SIZE,
+                 skip_blank_lines: bool = False):
+        self.filepath = Path(filepath)
+        self.mode = mode
+        self.buffer_size = buffer_size
+        self.skip_blank_lines = skip_blank_lines
+        self.f = None
+        self.temp_path = None
+        # Last line written, still without line break
+        self.open_line = ''
+
+    def __enter__(self):
+        if self.mode == 'w':
+            # One temporary file per process, so concurrent runs do not
+            # write on each other's file
+            self.temp_path = self.filepath.with_name(
+                '%s.%d.tmp' % (self.filepath.name, os.getpid()))
+            self.f = open(self.temp_path, 'w', buffering=self.buffer_size)
+        else:
+            self.f = open(self.filepath, self.mode,
+                          buffering=self.buffer_size)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if self.skip_blank_lines and self.open_line.strip():
+                self.f.write(self.open_line)
+            self.f.close()
+            if self.temp_path is not None and exc_type is None:
+                os.replace(self.temp_path, self.filepath)
+        finally:
+            if self.temp_path is not None and self.temp_path.exists():
+                os.remove(self.temp_path)
+            self.f = None
+            self.temp_path = None
+            self.open_line = ''
+
+    def write_lines(self, lines: list):
+        text = '\n'.join(lines)
+        if not self.skip_blank_lines:
+            self.f.write(text)
+            return
+        # Write complete non-blank lines, keeping the last one open
+        new_lines = (self.open_line + text).split('\n')
+        self.open_line = new_lines.pop()
+        self.f.write(''.join(line + '\n' for line in new_lines
+                             if line.strip()))
+
+    def write_df(self, lines: list, df: pd.DataFrame, formatters: dict):
+        '''
+        Write lines followed by df formatted as a fixed-width table
+        '''
+        self.write_lines(lines + [format_dat_table(df, formatters)])
+
+
+def get_group_slices(df: pd.DataFrame, col: str) -> tuple[pd.DataFrame,
+                                                          dict]:
+    '''
+    Sort df by col, keeping the order of rows within each value of col,
+    and return it with the slice of rows of each value
+
+    Rows with missing values in col are dropped
+    '''
+    codes, uniques = pd.factorize(df[col])
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    bounds = np.searchsorted(sorted_codes, np.arange(len(uniques) + 1))
+    df_sorted = df.iloc[order[bounds[0]:]]
+    bounds -= bounds[0]
+    slices = {value: slice(bounds[idx], bounds[idx + 1])
+              for idx, value in enumerate(uniques)}
+    return df_sorted, slices
+
+
 def translate_to_hydromonth(df: pd.DataFrame) -> pd.DataFrame:
     '''
     Translate to hydromonth
@@ -285,10 +389,9 @@ def add_time_info(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def get_daily_indexed_df(blo_eta: pd.DataFrame,
-                         all_caps: bool = False) -> pd.DataFrame:
+def get_daily_dates(blo_eta: pd.DataFrame) -> pd.DatetimeIndex:
     '''
-    Get dataframe indexed by day within the timeframe
+    Get all days within the timeframe
     '''
     # Get days in last month
     num_days = monthrange(
@@ -297,7 +400,15 @@ def get_daily_indexed_df(blo_eta: pd.DataFrame,
         blo_eta.iloc[0]['Year'], blo_eta.iloc[0]['Month'], 1)
     end_date = datetime(
         blo_eta.iloc[-1]['Year'], blo_eta.iloc[-1]['Month'], num_days)
-    index = pd.date_range(start=ini_date, end=end_date, freq='D')
+    return pd.date_range(start=ini_date, end=end_date, freq='D')
+
+
+def get_daily_indexed_df(blo_eta: pd.DataFrame,
+                         all_caps: bool = False) -> pd.DataFrame:
+    '''
+    Get dataframe indexed by day within the timeframe
+    '''
+    index = get_daily_dates(blo_eta)
     if all_caps:
         df = pd.DataFrame(index=index, columns=['YEAR', 'MONTH', 'DAY'])
         df['YEAR'] = df.index.year
@@ -314,6 +425,107 @@ def get_daily_indexed_df(blo_eta: pd.DataFrame,
     return df
 
 
+def get_interval_dates(df: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
+    '''
+    Get initial and final dates (daily resolution) of df intervals,
+    using columns added by add_time_info
+    '''
+    dates_ini = pd.to_datetime(
+        df[['YearIni', 'MonthIni', 'DayIni']].rename(columns={
+            'YearIni': 'year', 'MonthIni': 'month', 'DayIni': 'day'}))
+    dates_end = pd.to_datetime(
+        df[['YearEnd', 'MonthEnd', 'DayEnd']].rename(columns={
+            'YearEnd': 'year', 'MonthEnd': 'month', 'DayEnd': 'day'}))
+    return dates_ini, dates_end
+
+
+def apply_intervals_daily(dates: np.ndarray, entity_names: list,
+                          entities: np.ndarray, dates_ini: np.ndarray,
+                          dates_end: np.ndarray, values: np.ndarray,
+                          base: np.ndarray = None) -> np.ndarray:
+    '''
+    Get day x entity matrix with values of (entity, date_ini, date_end,
+    value) records applied over a daily calendar
+
+    dates is the sorted daily calendar, and base the default values
+    (nan if not given). Records are applied in order, so later records
+    overwrite earlier ones on overlapping days. Records of entities not
+    in entity_names are ignored.
+    '''
+    n_days, n_entities = len(dates), len(entity_names)
+    if base is None:
+        matrix = np.full((n_days, n_entities), np.nan)
+    else:
+        matrix = np.array(base, dtype=float, copy=True)
+    entity_idx = pd.Index(entity_names).get_indexer(entities)
+    valid = entity_idx >= 0
+    entity_idx = entity_idx[valid]
+    values = np.asarray(values, dtype=float)[valid]
+    # Locate intervals in calendar, end day included
+    start = np.searchsorted(dates, np.asarray(dates_ini)[valid], side='left')
+    end = np.searchsorted(dates, np.asarray(dates_end)[valid], side='right')
+    length = np.maximum(end - start, 0)
+    # Expand intervals to one cell per covered day, in record order
+    record_idx = np.repeat(np.arange(len(start)), length)
+    offset = np.arange(length.sum()) - np.repeat(
+        np.cumsum(length) - length, length)
+    day_idx = np.repeat(start, length) + offset
+    # Keep last record of each cell. Stable sort keeps record order
+    cell = day_idx * n_entities + entity_idx[record_idx]
+    order = np.argsort(cell, kind='stable')
+    cell = cell[order]
+    is_last = np.ones(len(cell), dtype=bool)
+    is_last[:-1] = cell[1:] != cell[:-1]
+    record_idx = record_idx[order][is_last]
+    matrix.flat[cell[is_last]] = values[record_idx]
+    return matrix
+
+
+def get_integer_columns(nominal_values: list, matrix: np.ndarray) -> list:
+    '''
+    Get positions of columns that pandas would keep as integers:
+    integer nominal value, and only integer values in the matrix
+    '''
+    int_columns = []
+    for idx, value in enumerate(nominal_values):
+        if isinstance(value, (int, np.integer)) and \
+                not isinstance(value, bool):
+            values = matrix[:, idx]
+            if np.isfinite(values).all() and \
+                    (values == np.round(values)).all():
+                int_columns.append(idx)
+    return int_columns
+
+
+def aggregate_per_etapa(blo_eta: pd.DataFrame, dates: pd.DatetimeIndex,
+                        matrix: np.ndarray, columns: list,
+                        func: str = 'mean',
+                        int_columns: list = None) -> pd.DataFrame:
+    '''
+    Apply func ('mean' or 'last') over the days of the month of each
+    Etapa, for each column of the day x column matrix
+
+    Returns dataframe indexed by Etapa, Year, Month, Block and Block_Len.
+    Columns in int_columns (positions) are returned as integers when
+    func is 'last'
+    '''
+    groupby_cols = ['Etapa', 'Year', 'Month', 'Block', 'Block_Len']
+    month_code = np.asarray(dates.year * 12 + dates.month)
+    grouped = pd.DataFrame(matrix, columns=columns).groupby(month_code)
+    if func == 'mean':
+        df_month = grouped.mean()
+    elif func == 'last':
+        df_month = grouped.last()
+    else:
+        raise ValueError('Invalid function: %s' % func)
+    etapa_month_code = (blo_eta['Year'] * 12 + blo_eta['Month']).to_numpy()
+    df = df_month.reindex(etapa_month_code)
+    df.index = pd.MultiIndex.from_frame(blo_eta[groupby_cols])
+    if func == 'last' and int_columns:
+        df = df.astype({columns[idx]: 'int64' for idx in int_columns})
+    return df.sort_index()
+
+
 def get_hourly_indexed_df(blo_eta: pd.DataFrame,
                           all_caps: bool = False) -> pd.DataFrame:
     '''
@@ -348,11 +560,11 @@ def get_hourly_indexed_df(blo_eta: pd.DataFrame,
 
 
 def read_plexos_end_date(iplp_path: Path) -> datetime:
-    value = pd.read_excel(iplp_path,
-                          sheet_name="Path",
-                          usecols='D',
-                          skiprows=21
-                          ).iloc[0].apply(from_excel).values[0]
+    value = read_iplp_sheet(iplp_path,
+                            sheet_name="Path",
+                            usecols='D',
+                            skiprows=21
+                            ).iloc[0].apply(from_excel).values[0]
     return pd.to_datetime(value)
 
 
@@ -0,0 +1,351 @@
+'''Workbook
+
+Module to share one parsed IPLP workbook across all macros.
+
+Every macro reads its own sheets from the IPLP file. Opening and parsing
+the same workbook once per read is the slowest part of a full run, so
+the workbook is opened only once per process and each sheet is parsed
+from disk at most once, on first access. All further reads of a sheet
+(with any skiprows, usecols, header, etc.) are served from memory, and
+every call returns a new DataFrame.
+
+Parsed sheets are also stored as Parquet files in Temp/cache (requires
+pyarrow). Cache entries are keyed by the content of the sheet inside the
+workbook, the sheet name and the read options, so after editing the
+IPLP file only the edited sheets are parsed again.
+'''
+import hashlib
+import os
+import zipfile
+from pathlib import Path
+import pandas as pd
+from utils.logger import create_logger
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+logger = create_logger('workbook')
+
+# Open workbooks, indexed by resolved path
+_WORKBOOKS = {}
+
+# Sheets read since last reset, as (resolved path, sheet name)
+_SHEETS_READ = set()
+
+
+class IplpWorkbook:
+    '''
+    IPLP workbook opened once, with lazily cached raw sheet data
+
+    Raw cell values of each sheet are kept in memory and fed to pandas'
+    own sheet parser, so the output of read_sheet is the same as the
+    output of pd.read_excel with the same arguments.
+    '''
+
+    def __init__(self, iplp_path: Path, engine: str = None,
+                 cache_path: Path = None):
+        self.iplp_path = Path(iplp_path)
+        self._stat = self._get_stat()
+        self._excel = pd.ExcelFile(self.iplp_path, engine=engine)
+        self._sheet_data = {}
+        self._sheet_fingerprints = {}
+        self._file_hash = None
+        self._hook_reader()
+        self.cache = SheetCache(cache_path) if cache_path else None
+
+    def _get_stat(self) -> tuple:
+        stat = self.iplp_path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def is_outdated(self) -> bool:
+        '''
+        True if the file on disk changed after it was opened
+        '''
+        return self._get_stat() != self._stat
+
+    @property
+    def sheet_names(self) -> list:
+        return self._excel.sheet_names
+
+    def _hook_reader(self):
+        '''
+        Make the pandas reader return cached raw data instead of
+        reading the sheet from disk every time
+        '''
+        reader = self._excel._reader
+        get_sheet_by_name = reader.get_sheet_by_name
+        get_sheet_data = reader.get_sheet_data
+
+        def cached_sheet_by_name(name):
+            reader.raise_if_bad_sheet_by_name(name)
+            return _SheetKey(name)
+
+        def cached_sheet_by_index(index):
+            reader.raise_if_bad_sheet_by_index(index)
+            return _SheetKey(reader.sheet_names[index])
+
+        def cached_sheet_data(sheet_key, file_rows_needed=None):
+            name = sheet_key.name
+            if name not in self._sheet_data:
+                logger.info('Parsing sheet %s' % name)
+                sheet = get_sheet_by_name(name)
+                self._sheet_data[name] = get_sheet_data(sheet, None)
+                if hasattr(sheet, 'close'):
+                    sheet.close()
+            data = self._sheet_data[name]
+            if file_rows_needed is not None:
+                data = _limit_rows(data, file_rows_needed,
+                                   self._excel.engine)
+            # pandas modifies header rows in place, so hand out copies
+            return [list(row) for row in data]
+
+        reader.get_sheet_by_name = cached_sheet_by_name
+        reader.get_sheet_by_index = cached_sheet_by_index
+        reader.get_sheet_data = cached_sheet_data
+
+    def _get_file_hash(self) -> str:
+        if self._file_hash is None:
+            sha = hashlib.sha256()
+            with open(self.iplp_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    sha.update(chunk)
+            self._file_hash = sha.hexdigest()
+        return self._file_hash
+
+    def _get_sheet_member(self, sheet_name: str) -> str:
+        '''
+        Return path of sheet inside the zip container, if known
+        '''
+        book = self._excel.book
+        if hasattr(book, 'sheetnames'):
+            # openpyxl
+            member = getattr(book[sheet_name], '_worksheet_path', None)
+        elif hasattr(book, '_sheets'):
+            # pyxlsb
+            member = dict(book._sheets).get(sheet_name)
+        else:
+            member = None
+        if member is None:
+            return None
+        member = member.lstrip('/')
+        if not member.startswith('xl/'):
+            member = 'xl/' + member
+        return member
+
+    def get_sheet_fingerprint(self, sheet_name: str) -> str:
+        '''
+        Return hash of the contents of one sheet
+
+        For xlsx/xlsb files only the sheet itself, the shared strings and
+        the styles are considered, using the checksums stored in the zip
+        directory. Otherwise, the whole workbook is hashed.
+        '''
+        if sheet_name in self._sheet_fingerprints:
+            return self._sheet_fingerprints[sheet_name]
+        fingerprint = None
+        member = self._get_sheet_member(sheet_name)
+        if member is not None and zipfile.is_zipfile(self.iplp_path):
+            with zipfile.ZipFile(self.iplp_path) as zf:
+                names = set(zf.namelist())
+                if member in names:
+                    parts = [member] + [
+                        name for name in names
+                        if name.startswith(('xl/sharedStrings',
+                                            'xl/styles'))]
+                    fingerprint = ';'.join(
+                        '%s:%08x:%d' % (name, zf.getinfo(name).CRC,
+                                        zf.getinfo(name).file_size)
+                        for name in sorted(parts))
+        if fingerprint is None:
+            fingerprint = self._get_file_hash()
+        self._sheet_fingerprints[sheet_name] = fingerprint
+        return fingerprint
+
+    def read_sheet(self, sheet_name, **kwargs) -> pd.DataFrame:
+        '''
+        Read sheet using the same arguments as pd.read_excel
+        '''
+        # The engine was already chosen when opening the file
+        kwargs.pop('engine', None)
+        if isinstance(sheet_name, int):
+            sheet_name = self.sheet_names[sheet_name]
+        if isinstance(sheet_name, str):
+            _SHEETS_READ.add((str(self.iplp_path), sheet_name))
+        key = None
+        if self.cache is not None and isinstance(sheet_name, str):
+            key = self._get_cache_key(sheet_name, kwargs)
+        if key is not None:
+            df = self.cache.load(key)
+            if df is not None:
+                return df
+        df = pd.read_excel(self._excel, sheet_name=sheet_name, **kwargs)
+        if key is not None:
+            self.cache.save(key, df, sheet_name)
+        return df
+
+    def _get_cache_key(self, sheet_name: str, kwargs: dict) -> str:
+        '''
+        Build cache key from sheet contents, sheet name and read options
+
+        Returns None if the read options can not be used as a key
+        '''
+        if any(callable(value) or isinstance(value, dict)
+               for value in kwargs.values()):
+            return None
+        options = repr(sorted(kwargs.items()))
+        key = '|'.join([self.get_sheet_fingerprint(sheet_name), sheet_name,
+                        options, str(self._excel.engine), pd.__version__])
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def close(self):
+        self._sheet_data = {}
+        self._excel.close()
+
+
+class SheetCache:
+    '''
+    Directory with parsed sheets stored as Parquet files
+    '''
+
+    def __init__(self, cache_path: Path):
+        self.cache_path = Path(cache_path)
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+
+    def _get_file(self, key: str) -> Path:
+        return self.cache_path / ('%s.parquet' % key)
+
+    def load(self, key: str) -> pd.DataFrame:
+        '''
+        Return cached DataFrame, or None if there is no valid entry
+        '''
+        file = self._get_file(key)
+        if not file.exists():
+            return None
+        try:
+            return pd.read_parquet(file)
+        except Exception:
+            logger.warning('Could not read cache file %s' % file)
+            return None
+
+    def save(self, key: str, df: pd.DataFrame, sheet_name: str):
+        '''
+        Store DataFrame, only if it can be read back without changes
+        '''
+        file = self._get_file(key)
+        # Each process writes its own temp file, as workers may miss the
+        # cache for the same sheet at the same time
+        temp_file = file.with_name('%s.%d.tmp' % (key, os.getpid()))
+        try:
+            df.to_parquet(temp_file)
+            df_read = pd.read_parquet(temp_file)
+            is_valid = (df_read.equals(df) and
+                        df_read.columns.equals(df.columns) and
+                        df_read.index.equals(df.index) and
+                        df_read.dtypes.equals(df.dtypes))
+            if is_valid:
+                temp_file.replace(file)
+        except Exception:
+            is_valid = False
+        if not is_valid:
+            logger.debug('Sheet %s can not be cached' % sheet_name)
+            temp_file.unlink(missing_ok=True)
+
+
+class _SheetKey:
+    '''
+    Stand-in for a worksheet object, used to look up cached sheet data
+    '''
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+def _limit_rows(data: list, file_rows_needed: int, engine: str) -> list:
+    '''
+    Return the rows the reader would have read with file_rows_needed
+
+    Readers trim empty cells and rows of the partial read, so the width
+    of the returned data can be smaller than the width of the full sheet.
+    '''
+    if engine == 'pyxlsb':
+        # Reading stops at the first non-empty row after the limit
+        end = len(data)
+        for idx in range(file_rows_needed - 1, len(data)):
+            if any(cell != '' for cell in data[idx]):
+                end = idx + 1
+                break
+    else:
+        end = file_rows_needed
+    rows = []
+    for row in data[:end]:
+        row = list(row)
+        while row and row[-1] == '':
+            row.pop()
+        rows.append(row)
+    while rows and not rows[-1]:
+        rows.pop()
+    if rows:
+        max_width = max(len(row) for row in rows)
+        rows = [row + [''] * (max_width - len(row)) for row in rows]
+    return rows
+
+
+def get_cache_path(iplp_path: Path) -> Path:
+    '''
+    Return folder to store parsed sheets, or None if it is not available
+    '''
+    if not PARQUET_AVAILABLE:
+        return None
+    return Path(iplp_path).parent / 'Temp' / 'cache'
+
+
+def get_iplp_workbook(iplp_path: Path, engine: str = None) -> IplpWorkbook:
+    '''
+    Return shared IplpWorkbook for iplp_path, opening it if needed
+
+    The workbook is opened again if the file changed on disk.
+    '''
+    key = Path(iplp_path).resolve()
+    workbook = _WORKBOOKS.get(key)
+    if workbook is None or workbook.is_outdated():
+        if workbook is not None:
+            workbook.close()
+        workbook = IplpWorkbook(key, engine=engine,
+                                cache_path=get_cache_path(key))
+        _WORKBOOKS[key] = workbook
+    return workbook
+
+
+def read_iplp_sheet(iplp_path: Path, sheet_name, **kwargs) -> pd.DataFrame:
+    '''
+    Drop-in replacement of pd.read_excel for the IPLP file
+    '''
+    workbook = get_iplp_workbook(iplp_path, engine=kwargs.get('engine'))
+    return workbook.read_sheet(sheet_name, **kwargs)
+
+
+def close_iplp_workbooks():
+    '''
+    Close all open workbooks and free cached sheet data
+    '''
+    for workbook in _WORKBOOKS.values():
+        workbook.close()
+    _WORKBOOKS.clear()
+
+
+def reset_sheets_read():
+    '''
+    Start recording sheets read from now on
+    '''
+    _SHEETS_READ.clear()
+
+
+def get_sheets_read() -> list:
+    '''
+    Return sheets read since last reset, as (path, sheet name) pairs
+    '''
+    return sorted(_SHEETS_READ)